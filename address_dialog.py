@@ -1,12 +1,13 @@
 from PySide6.QtWidgets import QDialog, QVBoxLayout, QFormLayout, QLineEdit, QPushButton, QMessageBox
 from typing import Dict, Any
-import sqlite3
+from postal_code_service import get_postal_code_service, PostalCodeCompleter
 
 class AddressDialog(QDialog):
     def __init__(self, db, parent=None):
         super().__init__(parent)
         self.db = db
         self.parent = parent
+        self.postal_codes = get_postal_code_service()
         self.setWindowTitle("Cím bevitele")
         self.setMinimumSize(400, 300)
 
@@ -19,6 +20,7 @@ class AddressDialog(QDialog):
         self.street = QLineEdit()
         self.house_number = QLineEdit()
         self.floor_door = QLineEdit()
+        self.postal_completer = PostalCodeCompleter(self.postal_code, self.city, self.postal_codes)
 
         form_layout.addRow("Irányítószám:", self.postal_code)
         form_layout.addRow("Település:", self.city)
@@ -35,16 +37,12 @@ class AddressDialog(QDialog):
 
     def update_city(self):
         postal_code = self.postal_code.text().strip()
-        city = self.get_city_by_postal_code(postal_code)
-        self.city.setText(city)
+        # A javaslatok közül választott település megmarad
+        if self.city.text().strip() not in self.postal_codes.cities(postal_code):
+            self.city.setText(self.get_city_by_postal_code(postal_code))
 
     def get_city_by_postal_code(self, postal_code: str) -> str:
-        conn = sqlite3.connect('postal_codes.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT city FROM postal_codes WHERE postal_code = ?', (postal_code,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else ""
+        return self.postal_codes.city(postal_code)
 
     def save_address(self):
         address_data = {
@@ -3,12 +3,12 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QLineEdit, QSpinBox, QPushButton, QTableWidget,
                              QTableWidgetItem, QMessageBox, QHeaderView, QComboBox)
 from PySide6.QtCore import Qt
-from database_handler import DatabaseHandler  # Change from uppercase to lowercase
+from database_handler import get_database_handler
 
 class AddressManager(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.db = DatabaseHandler()  # Inicializáljuk a DatabaseHandler példányt
+        self.db = get_database_handler()  # A közös DatabaseHandler példány
         self.address_combo = QComboBox()
         self.address_combo.setEditable(True)  # Szerkeszthető legyen
         self.address_combo.setInsertPolicy(QComboBox.InsertPolicy.InsertAtBottom)
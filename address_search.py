@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Cím kiegészítő a címbeviteli mezőkhöz.
+
+A javaslatok a DatabaseHandler.search_addresses() teljes szöveges
+keresőjéből érkeznek, így a címtáblát nem kell a felületre betölteni,
+és a keresés ékezet- és szórendfüggetlen ("szolo 3" -> "Szőlő utca 3").
+
+Példa:
+    AddressCompleter(self.address_combo.lineEdit(), self.db)
+"""
+import logging
+
+from PySide6.QtCore import QStringListModel, Qt
+from PySide6.QtWidgets import QCompleter
+
+# Ennyi javaslat jelenik meg legfeljebb
+DEFAULT_SUGGESTION_LIMIT = 20
+
+
+class AddressCompleter(QCompleter):
+    """Beírás közben frissülő, relevancia szerint rendezett címjavaslatok"""
+
+    def __init__(self, line_edit, db, limit: int = DEFAULT_SUGGESTION_LIMIT):
+        super().__init__(line_edit)
+        self.db = db
+        self.limit = limit
+
+        self.suggestion_model = QStringListModel(self)
+        self.setModel(self.suggestion_model)
+        # A keresés már szűrt és rendezett, a QCompleter ne szűrjön újra
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+
+        line_edit.setCompleter(self)
+        line_edit.textEdited.connect(self.updateSuggestions)
+
+    def updateSuggestions(self, text: str) -> None:
+        try:
+            rows = self.db.search_addresses(text, self.limit)
+        except Exception as e:
+            logging.error(f"Címkeresési hiba: {str(e)}")
+            rows = []
+        self.suggestion_model.setStringList([row['address'] for row in rows])
+        if rows:
+            self.complete()
@@ -2,13 +2,14 @@
 from PySide6.QtGui import QColor, QFont
 import json
 import os
+from database_handler import DEFAULT_POOL_SIZE, DEFAULT_STORAGE_PROFILE, get_database_handler
 
 class ConfigManager:
     def __init__(self, config_file='config.json'):
         self.config_file = config_file
-        self.config = self.load_config()
         
-        # Alapértelmezett beállítások
+        # Alapértelmezett beállítások (a betöltés előtt kell, mert hiányzó
+        # konfigurációs fájl esetén ezekből indulunk)
         self.defaults = {
             'theme': 'Világos téma',
             'background_color': '#0078D7',  # Windows kék
@@ -17,8 +18,15 @@ class ConfigManager:
             'font_size': 10,
             'language': 'Magyar',
             'email_notifications': False,
-            'push_notifications': False
+            'push_notifications': False,
+            'db_pool_size': DEFAULT_POOL_SIZE,
+            'storage_profile': dict(DEFAULT_STORAGE_PROFILE),
+            'timing_enabled': False,        # indulási lépések időmérése (timing.py)
+            'timing_log': 'timing.log',
+            'query_profiling': False,       # lekérdezés statisztika (query_profiler.py)
+            'slow_query_ms': 200
         }
+        self.config = self.load_config()
 
     def load_config(self):
         """Beállítások betöltése fájlból"""
@@ -72,6 +80,27 @@ class ConfigManager:
         for key, value in settings.items():
             self.set(key, value)
 
+    def get_storage_profile(self):
+        """Adatbázis tárolási profil (PRAGMA beállítások) lekérése"""
+        profile = dict(DEFAULT_STORAGE_PROFILE)
+        profile.update(self.get('storage_profile') or {})
+        return profile
+
+    def save_storage_profile(self, profile):
+        """Adatbázis tárolási profil mentése (a következő kapcsolatoktól érvényes)"""
+        self.set('storage_profile', profile)
+
+    def open_database(self, db_path='fuvarok.db'):
+        """A közös adatbázis kezelő a beállított pool mérettel, tárolási profillal és profilozással"""
+        db = get_database_handler(
+            db_path,
+            pool_size=self.get('db_pool_size'),
+            storage_profile=self.get_storage_profile()
+        )
+        if self.get('query_profiling'):
+            db.enable_profiling(self.get('slow_query_ms'))
+        return db
+
     def get_color(self, key, default='#000000'):
         """Szín beállítás lekérése QColor objektumként"""
         color_str = self.get(key, default)
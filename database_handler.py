@@ -1,222 +1,706 @@
+import os
+import re
 import sqlite3
 import logging
-from typing import Dict, List, Any, Optional
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Callable, Iterable, Iterator, Sequence, Set, Tuple
 from datetime import datetime
+from migrations import run_migrations
+from queries import ADDRESS_SEARCH_QUERY
+from query_profiler import QueryProfiler
+
+# Egy adatbázis fájlhoz egyszerre nyitva tartható kapcsolatok alapértelmezett száma
+DEFAULT_POOL_SIZE = 4
+
+# Minden új kapcsolatra alkalmazott PRAGMA beállítások (tárolási profil).
+# WAL módban az olvasók (pl. számlázás fül) nem várnak az írókra.
+DEFAULT_STORAGE_PROFILE = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,       # negatív érték: KiB, kb. 20 MB lap-gyorsítótár
+    'mmap_size': 268435456,     # 256 MB memóriába leképezett I/O a nagy olvasásokhoz
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,       # ms várakozás zárolt adatbázis esetén
+}
+
+# A PRAGMA értékek nem paraméterezhetők, ezért csak ismert értékeket engedünk
+_PRAGMA_CHOICES = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY'),
+}
+_PRAGMA_INTEGERS = ('cache_size', 'mmap_size', 'busy_timeout')
+
+# Kezelt másodlagos indexek: név -> (tábla, oszlopok). Új index felvételekor a
+# migrations.py-ban új lépés is kell, saját rögzített index készlettel (INDEXES_V*)
+MANAGED_INDEXES = {
+    'idx_deliveries_date': ('deliveries', ('delivery_date',)),
+    'idx_deliveries_driver_date': ('deliveries', ('driver_id', 'delivery_date')),
+    'idx_deliveries_factory_date': ('deliveries', ('factory_id', 'delivery_date')),
+    'idx_deliveries_zone': ('deliveries', ('zone_id',)),
+    'idx_deliveries_status': ('deliveries', ('status',)),
+    'idx_fuel_consumption_vehicle_date': ('fuel_consumption', ('vehicle_id', 'date')),
+    'idx_fuel_consumption_vehicle_odometer': ('fuel_consumption', ('vehicle_id', 'odometer_reading')),
+    'idx_factory_zone_prices_factory': ('factory_zone_prices', ('factory_id', 'zone_name')),
+}
+
+# A stream_query / fetch_iter egy lépésben ennyi sort kér le a kurzortól
+DEFAULT_FETCH_SIZE = 500
+
+# Író utasítás céltáblája (a változásfigyelők értesítéséhez)
+_WRITE_TABLE_RE = re.compile(
+    r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)'
+    r'\s+[\[`"]?(\w+)',
+    re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=256)
+def _insert_statement(table_name: str, columns: Tuple[str, ...]) -> str:
+    """INSERT utasítás (tábla, oszlopok) szerint gyorsítótárazva"""
+    return f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+@lru_cache(maxsize=256)
+def _update_statement(table_name: str, set_columns: Tuple[str, ...],
+                      key_columns: Tuple[str, ...]) -> str:
+    """UPDATE utasítás (tábla, frissített oszlopok, kulcs oszlopok) szerint gyorsítótárazva"""
+    assignments = ', '.join(f"{column} = ?" for column in set_columns)
+    conditions = ' AND '.join(f"{column} = ?" for column in key_columns)
+    return f"UPDATE {table_name} SET {assignments} WHERE {conditions}"
+
+
+@lru_cache(maxsize=64)
+def _row_factory(row_type: Optional[type]) -> Optional[Callable]:
+    """
+    A kurzor row_factory értéke a kért sortípushoz.
+
+    None: sqlite3.Row (alapértelmezés, név és index szerint is olvasható);
+    tuple: nyers tuple, átalakítás nélkül (a leggyorsabb); egyéb osztály
+    (NamedTuple, dataclass(slots=True)): az oszlopok sorrendben a konstruktor
+    pozicionális paraméterei.
+    """
+    if row_type is None:
+        return sqlite3.Row
+    if row_type is tuple:
+        return None
+    return lambda cursor, row: row_type(*row)
+
+
+class ConnectionPool:
+    """
+    Folyamatszintű kapcsolat pool egy adatbázis fájlhoz.
+
+    Minden szál saját kapcsolatot kap, amelyet a release() hívásig megtart.
+    A felszabadított kapcsolatok a bemelegedett lap-gyorsítótárukkal együtt
+    újrahasznosulnak, így egy dialógus megnyitása nem nyit új kapcsolatot.
+    """
+
+    def __init__(self, db_path: str, connect: Callable[[str], sqlite3.Connection],
+                 max_size: int = DEFAULT_POOL_SIZE, timeout: float = 30.0):
+        """
+        Args:
+            db_path: Az adatbázis fájl elérési útja
+            connect: Új kapcsolatot létrehozó függvény
+            max_size: Egyszerre nyitva tartható kapcsolatok maximális száma
+            timeout: Várakozási idő másodpercben, ha minden kapcsolat foglalt
+        """
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.schema_ready = False
+        self.schema_lock = threading.Lock()
+        self._connect = connect
+        self._local = threading.local()
+        self._idle: List[sqlite3.Connection] = []
+        self._connections: List[sqlite3.Connection] = []
+        self._condition = threading.Condition()
+
+    def acquire(self) -> sqlite3.Connection:
+        """Visszaadja az aktuális szálhoz rendelt kapcsolatot, szükség esetén kiosztva egyet"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        with self._condition:
+            while True:
+                if self._idle:
+                    # A legutóbb visszaadott kapcsolat gyorsítótára a legmelegebb
+                    conn = self._idle.pop()
+                    break
+                if len(self._connections) < self.max_size:
+                    conn = self._connect(self.db_path)
+                    self._connections.append(conn)
+                    break
+                if not self._condition.wait(self.timeout):
+                    raise sqlite3.OperationalError(
+                        f"Nincs szabad adatbázis kapcsolat ({self.max_size} foglalt)")
+
+        self._local.conn = conn
+        return conn
+
+    def release(self) -> None:
+        """Visszaadja az aktuális szál kapcsolatát a poolnak (háttérszálak hívják)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self._condition:
+            self._idle.append(conn)
+            self._condition.notify()
+
+    def resize(self, max_size: int) -> None:
+        """A pool méretének módosítása; a már nyitott kapcsolatok megmaradnak"""
+        with self._condition:
+            self.max_size = max(1, int(max_size))
+            self._condition.notify_all()
+
+    def close_all(self) -> None:
+        """Lezárja az összes kapcsolatot (alkalmazás leállításakor)"""
+        with self._condition:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections.clear()
+            self._idle.clear()
+        self._local = threading.local()
+        self.schema_ready = False
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_handlers: Dict[str, 'DatabaseHandler'] = {}
+_registry_lock = threading.Lock()
+
+
+def get_connection_pool(db_path: str, connect: Callable[[str], sqlite3.Connection],
+                        max_size: Optional[int] = None) -> ConnectionPool:
+    """
+    Visszaadja az adatbázis fájlhoz tartozó közös poolt, szükség esetén létrehozva.
+
+    Args:
+        db_path: Az adatbázis fájl elérési útja
+        connect: Új kapcsolatot létrehozó függvény (csak az első hívásnál számít)
+        max_size: A pool mérete; None esetén az alapértelmezett vagy a meglévő érték
+    """
+    key = os.path.abspath(db_path)
+    with _registry_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, connect, max_size or DEFAULT_POOL_SIZE)
+            _pools[key] = pool
+        elif max_size:
+            pool.resize(max_size)
+        return pool
+
+
+def get_database_handler(db_path: str = 'fuvarok.db',
+                         pool_size: Optional[int] = None,
+                         storage_profile: Optional[Dict[str, Any]] = None) -> 'DatabaseHandler':
+    """
+    Folyamatonként egyetlen DatabaseHandler példány adatbázis fájlonként.
+
+    A kezelők (főablak, törzsadat dialógus, címkezelő, sofőrkezelő stb.) ezt
+    használják, így a kapcsolatok és a séma-ellenőrzés is közösek.
+    """
+    key = os.path.abspath(db_path)
+    with _registry_lock:
+        handler = _handlers.get(key)
+    if handler is None:
+        handler = DatabaseHandler(db_path, pool_size, storage_profile)
+        with _registry_lock:
+            handler = _handlers.setdefault(key, handler)
+    else:
+        if pool_size:
+            handler.pool.resize(pool_size)
+        if storage_profile:
+            handler.set_storage_profile(storage_profile)
+    return handler
+
 
 class DatabaseHandler:
     """Adatbázis kezelő osztály a fuvar adminisztrációs rendszerhez"""
     
-    def __init__(self, db_path: str = 'fuvarok.db'):
+    def __init__(self, db_path: str = 'fuvarok.db', pool_size: Optional[int] = None,
+                 storage_profile: Optional[Dict[str, Any]] = None):
         """
         Inicializálja az adatbázis kapcsolatot.
         
         Args:
             db_path: Az adatbázis fájl elérési útja
+            pool_size: A közös kapcsolat pool mérete
+            storage_profile: PRAGMA beállítások (lásd DEFAULT_STORAGE_PROFILE)
         """
         self.db_path = db_path
-        self.conn = None
-        self._create_connection()
-        self._initialize_database()
-        
-    def _create_connection(self) -> None:
-        """Létrehozza az adatbázis kapcsolatot"""
+        self.storage_profile = self._normalize_storage_profile(storage_profile)
+        self.pool = get_connection_pool(db_path, self._create_connection, pool_size)
+        self._local = threading.local()  # szálankénti tranzakció mélység és módosított táblák
+        self._change_listeners: List[Callable[[Set[str]], None]] = []
+        self._listeners_lock = threading.Lock()
+        # Lekérdezés statisztika (enable_profiling); kikapcsolva is megőrzi az eddigi adatokat
+        self.profiler = QueryProfiler()
+        self.profiling = False
+
+        # A sémát folyamatonként csak egyszer kell ellenőrizni
+        with self.pool.schema_lock:
+            if not self.pool.schema_ready:
+                self._initialize_database()
+                self.pool.schema_ready = True
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Az aktuális szálhoz tartozó kapcsolat a közös poolból"""
+        return self.pool.acquire()
+
+    def _create_connection(self, db_path: Optional[str] = None) -> sqlite3.Connection:
+        """Létrehoz egy új adatbázis kapcsolatot a pool számára"""
         try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row
+            # A kapcsolat szálak között vándorolhat a poolon keresztül,
+            # de egyszerre mindig csak egy szál használja
+            conn = sqlite3.connect(db_path or self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._apply_storage_profile(conn)
+            return conn
         except Exception as e:
             logging.error(f"Adatbázis kapcsolódási hiba: {str(e)}")
             raise
 
+    @staticmethod
+    def _normalize_storage_profile(profile: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Kiegészíti és ellenőrzi a tárolási profilt"""
+        result = dict(DEFAULT_STORAGE_PROFILE)
+        for key, value in (profile or {}).items():
+            if key in _PRAGMA_CHOICES:
+                value = str(value).upper()
+                if value not in _PRAGMA_CHOICES[key]:
+                    raise ValueError(f"Érvénytelen {key} érték: {value}")
+            elif key in _PRAGMA_INTEGERS:
+                value = int(value)
+            else:
+                raise ValueError(f"Ismeretlen tárolási beállítás: {key}")
+            result[key] = value
+        return result
+
+    def _apply_storage_profile(self, conn: sqlite3.Connection) -> None:
+        """A tárolási profil PRAGMA beállításainak alkalmazása egy kapcsolatra"""
+        profile = self.storage_profile
+        # A busy_timeout legyen az első, hogy a WAL váltás se akadjon el zároláson
+        conn.execute(f"PRAGMA busy_timeout = {profile['busy_timeout']}")
+        journal_mode = conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']}").fetchone()[0]
+        if journal_mode.upper() != profile['journal_mode']:
+            logging.warning(f"A journal_mode nem állítható {profile['journal_mode']} értékre "
+                            f"(jelenleg: {journal_mode})")
+        conn.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+        conn.execute(f"PRAGMA cache_size = {profile['cache_size']}")
+        conn.execute(f"PRAGMA mmap_size = {profile['mmap_size']}")
+        conn.execute(f"PRAGMA temp_store = {profile['temp_store']}")
+
+    def set_storage_profile(self, profile: Dict[str, Any]) -> None:
+        """
+        Új tárolási profil beállítása.
+
+        Az új kapcsolatok már ezzel jönnek létre; az aktuális szál
+        kapcsolatára azonnal alkalmazzuk.
+        """
+        self.storage_profile = self._normalize_storage_profile(profile)
+        self._apply_storage_profile(self.conn)
+
+    def release_connection(self) -> None:
+        """Az aktuális szál kapcsolatának visszaadása a poolnak"""
+        self.pool.release()
+
     def _initialize_database(self) -> None:
-        """Létrehozza az összes szükséges táblát"""
+        """Lefuttatja a függőben lévő sémamigrációkat (naprakész adatbázison nincs DDL)"""
         try:
-            # Sofőrök tábla
-            self.execute_query('''
-                CREATE TABLE IF NOT EXISTS drivers (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    birth_date TEXT,
-                    birth_place TEXT,
-                    address TEXT,
-                    mothers_name TEXT,
-                    tax_number TEXT,
-                    social_security_number TEXT,
-                    bank_name TEXT,
-                    bank_account TEXT,
-                    drivers_license_number TEXT,
-                    drivers_license_expiry TEXT,
-                    vacation_days INTEGER DEFAULT 29,
-                    used_vacation_days INTEGER DEFAULT 0
-                )
-            ''')
-
-            # Járművek tábla
-            self.execute_query('''
-                CREATE TABLE IF NOT EXISTS vehicles (
-                    id INTEGER PRIMARY KEY,
-                    plate_number TEXT NOT NULL,
-                    type TEXT,
-                    brand TEXT,
-                    model TEXT,
-                    year_of_manufacture INTEGER,
-                    chassis_number TEXT,
-                    engine_number TEXT,
-                    engine_type TEXT,
-                    fuel_type TEXT,
-                    max_weight INTEGER,
-                    own_weight INTEGER,
-                    payload_capacity INTEGER,
-                    seats INTEGER,
-                    technical_review_date TEXT,
-                    tachograph TEXT,
-                    tachograph_calibration_date TEXT,
-                    fire_extinguisher_expiry TEXT
-                )
-            ''')
-
-            # Gyárak és kapcsolódó táblák
-            self.execute_query('''
-                CREATE TABLE IF NOT EXISTS factories (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            self.execute_query('''
-                CREATE TABLE IF NOT EXISTS factory_zone_prices (
-                    id INTEGER PRIMARY KEY,
-                    factory_id INTEGER,
-                    zone_name TEXT,
-                    price INTEGER DEFAULT 0,
-                    FOREIGN KEY (factory_id) REFERENCES factories(id)
-                )
-            ''')
-
-            self.execute_query('''
-                CREATE TABLE IF NOT EXISTS factory_waiting_fees (
-                    id INTEGER PRIMARY KEY,
-                    factory_id INTEGER NOT NULL,
-                    price_per_15_min INTEGER DEFAULT 0,
-                    FOREIGN KEY (factory_id) REFERENCES factories(id)
-                )
-            ''')
-
-            # Címek tábla
-            self.execute_query('''
-                CREATE TABLE IF NOT EXISTS addresses (
-                    id INTEGER PRIMARY KEY,
-                    postal_code TEXT NOT NULL,
-                    city TEXT NOT NULL,
-                    street TEXT NOT NULL,
-                    house_number TEXT NOT NULL,
-                    floor_door TEXT,
-                    UNIQUE(postal_code, city, street, house_number, floor_door)
-                )
-            ''')
-
-            # Fuvarok tábla
-            self.execute_query('''
-                CREATE TABLE IF NOT EXISTS deliveries (
-                    id INTEGER PRIMARY KEY,
-                    delivery_date TEXT NOT NULL,
-                    driver_id INTEGER,
-                    vehicle_id INTEGER,
-                    factory_id INTEGER,
-                    zone_id INTEGER,
-                    address_id INTEGER,
-                    delivery_number TEXT NOT NULL,
-                    amount REAL,
-                    status TEXT DEFAULT 'pending',
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (driver_id) REFERENCES drivers(id),
-                    FOREIGN KEY (vehicle_id) REFERENCES vehicles(id),
-                    FOREIGN KEY (factory_id) REFERENCES factories(id),
-                    FOREIGN KEY (zone_id) REFERENCES factory_zone_prices(id),
-                    FOREIGN KEY (address_id) REFERENCES addresses(id)
-                )
-            ''')
-
-            # Szabadság nyilvántartás
-            self.execute_query('''
-                CREATE TABLE IF NOT EXISTS vacation_allowance (
-                    id INTEGER PRIMARY KEY,
-                    year INTEGER NOT NULL,
-                    total_days INTEGER DEFAULT 29,
-                    used_days INTEGER DEFAULT 0,
-                    UNIQUE(year)
-                )
-            ''')
-
-            # Üzemanyag fogyasztás
-            self.execute_query('''
-                CREATE TABLE IF NOT EXISTS fuel_consumption (
-                    id INTEGER PRIMARY KEY,
-                    vehicle_id INTEGER,
-                    date TEXT,
-                    odometer_reading INTEGER,
-                    fuel_amount REAL,
-                    fuel_price REAL,
-                    total_cost REAL,
-                    location TEXT,
-                    full_tank BOOLEAN,
-                    avg_consumption REAL,
-                    FOREIGN KEY (vehicle_id) REFERENCES vehicles(id)
-                )
-            ''')
-
-            # Alkalmazottak tábla
-            self.execute_query('''
-                CREATE TABLE IF NOT EXISTS employees (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    birth_date TEXT,
-                    birth_place TEXT,
-                    address TEXT,
-                    mothers_name TEXT,
-                    tax_number TEXT,
-                    social_security_number TEXT,
-                    bank_name TEXT,
-                    bank_account TEXT,
-                    title TEXT,
-                    vacation_days INTEGER DEFAULT 29,
-                    used_vacation_days INTEGER DEFAULT 0
-                )
-            ''')
-
+            run_migrations(self)
         except Exception as e:
             logging.error(f"Adatbázis inicializálási hiba: {str(e)}")
             raise
 
-    def execute_query(self, query: str, params: tuple = ()) -> Any:
+    def ensure_indexes(self, indexes: Optional[Dict[str, Tuple[str, Sequence[str]]]] = None) -> None:
+        """
+        Létrehozza a hiányzó indexeket (migrációból hívva)
+
+        Args:
+            indexes: Név -> (tábla, oszlopok); None esetén a MANAGED_INDEXES
+        """
+        try:
+            with self.transaction():
+                for name, (table, columns) in (MANAGED_INDEXES if indexes is None else indexes).items():
+                    self.execute_query(
+                        f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+                    )
+            # Csak akkor frissíti a statisztikákat, ha a tervezőnek szüksége van rá
+            self.execute_query("PRAGMA optimize")
+        except Exception as e:
+            logging.error(f"Index létrehozási hiba: {str(e)}")
+            raise
+
+    def explain_query_plan(self, query: str, params: tuple = ()) -> List[str]:
+        """
+        Visszaadja egy lekérdezés végrehajtási tervének sorait
+        
+        Args:
+            query: SQL lekérdezés szövege
+            params: Lekérdezés paraméterei (a tervhez minta értékek is elegendők)
+        """
+        rows = self.execute_query(f"EXPLAIN QUERY PLAN {query}", params)
+        return [row['detail'] for row in rows]
+
+    def find_full_scans(self, queries: Dict[str, tuple]) -> Dict[str, List[str]]:
+        """
+        Megkeresi azokat a lekérdezéseket, amelyek terve teljes tábla-bejárást tartalmaz
+        
+        Args:
+            queries: Név -> (SQL, paraméterek)
+            
+        Returns:
+            Név -> a SCAN tervsorok; a hibátlan lekérdezések kimaradnak
+        """
+        problems = {}
+        for name, (query, params) in queries.items():
+            try:
+                plan = self.explain_query_plan(query, params)
+                # A WITH / allekérdezés eredményének bejárása nem táblabejárás (a táblákét külön sor mutatja)
+                intermediate = {detail.split(' ', 1)[1] for detail in plan
+                                if detail.startswith(('MATERIALIZE ', 'CO-ROUTINE '))}
+                # A virtuális táblák (FTS5) saját indexüket használják, a SCAN sor náluk nem teljes bejárás
+                scans = [detail for detail in plan
+                         if detail.startswith('SCAN ') and 'CONSTANT ROW' not in detail
+                         and 'VIRTUAL TABLE' not in detail
+                         and detail.split(' ')[1] not in intermediate
+                         and not detail.startswith('SCAN (subquery-')]
+            except Exception as e:
+                scans = [f"Hibás lekérdezés: {str(e)}"]
+            if scans:
+                logging.warning(f"Problémás lekérdezésterv ({name}): {'; '.join(scans)}")
+                problems[name] = scans
+        return problems
+
+    def add_change_listener(self, listener: Callable[[Set[str]], None]) -> None:
+        """
+        Változásfigyelő regisztrálása.
+
+        A figyelő minden sikeres commit után megkapja a módosított táblák
+        neveit (kisbetűvel). A commit-oló szálon hívódik, ezért a Qt
+        objektumok jelzésen keresztül frissítsék magukat.
+        """
+        with self._listeners_lock:
+            if listener not in self._change_listeners:
+                self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener: Callable[[Set[str]], None]) -> None:
+        """Változásfigyelő eltávolítása (pl. a dialógus bezárásakor)"""
+        with self._listeners_lock:
+            if listener in self._change_listeners:
+                self._change_listeners.remove(listener)
+
+    def enable_profiling(self, slow_query_ms: Optional[float] = None) -> None:
+        """Az execute_query / execute_many hívások idejének és sorszámának rögzítése"""
+        if slow_query_ms is not None:
+            self.profiler.slow_query_ms = slow_query_ms
+        self.profiling = True
+
+    def disable_profiling(self) -> None:
+        self.profiling = False
+
+    def _record_change(self, query: str) -> None:
+        """Az író utasítás céltáblájának feljegyzése a következő commit-hoz"""
+        match = _WRITE_TABLE_RE.match(query)
+        if match:
+            if not hasattr(self._local, 'changed'):
+                self._local.changed = set()
+            self._local.changed.add(match.group(1).lower())
+
+    def _discard_changes(self) -> None:
+        self._local.changed = set()
+
+    def _notify_changes(self) -> None:
+        """A commit után a figyelők értesítése a módosított táblákról"""
+        tables = getattr(self._local, 'changed', None)
+        self._local.changed = set()
+        if not tables:
+            return
+        with self._listeners_lock:
+            listeners = list(self._change_listeners)
+        for listener in listeners:
+            try:
+                listener(set(tables))
+            except Exception as e:
+                logging.error(f"Változásfigyelő hiba: {str(e)}")
+
+    def _in_transaction(self) -> bool:
+        """Igaz, ha az aktuális szál egy transaction() blokkon belül fut"""
+        return getattr(self._local, 'tx_depth', 0) > 0
+
+    @contextmanager
+    def transaction(self) -> Iterator['DatabaseHandler']:
+        """
+        Több utasítás végrehajtása egyetlen tranzakcióban, egy commit-tal.
+
+        Egymásba ágyazható: csak a legkülső blokk végén történik commit,
+        bármely hiba esetén a teljes tranzakció visszagörgetődik.
+
+        Példa:
+            with db.transaction():
+                db.insert_record('factories', {...})
+                db.bulk_insert('factory_zone_prices', rows)
+        """
+        conn = self.conn
+        depth = getattr(self._local, 'tx_depth', 0)
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.tx_depth = depth + 1
+        try:
+            yield self
+        except Exception:
+            self._local.tx_depth = depth
+            if depth == 0:
+                conn.rollback()
+                self._discard_changes()
+            raise
+        self._local.tx_depth = depth
+        if depth == 0:
+            conn.commit()
+            self._notify_changes()
+
+    def execute_query(self, query: str, params: tuple = (), row_type: Optional[type] = None) -> Any:
         """
         SQL lekérdezés végrehajtása
         
         Args:
             query: SQL lekérdezés szövege
             params: Lekérdezés paraméterei
+            row_type: Az eredménysorok típusa (None: sqlite3.Row, tuple, NamedTuple
+                vagy dataclass; lásd _row_factory)
             
         Returns:
             Lekérdezés eredménye vagy None
         """
+        conn = self.conn
+        profiling = self.profiling
+        start = time.perf_counter() if profiling else 0.0
+        rows = None
+        failed = False
         try:
-            if not self.conn:
-                self._create_connection()
-            
-            cursor = self.conn.cursor()
+            cursor = conn.cursor()
+            if row_type is not None:
+                cursor.row_factory = _row_factory(row_type)
             cursor.execute(query, params)
             
             if query.lower().strip().startswith(('insert', 'update', 'delete')):
-                self.conn.commit()
+                self._record_change(query)
+                # Tranzakción belül a commit a transaction() blokk végén történik
+                if not self._in_transaction():
+                    conn.commit()
+                    self._notify_changes()
+                rows = cursor.rowcount
                 return cursor.lastrowid
             
-            return cursor.fetchall()
+            result = cursor.fetchall()
+            rows = len(result)
+            return result
             
         except Exception as e:
-            if self.conn:
-                self.conn.rollback()
+            failed = True
+            if not self._in_transaction():
+                conn.rollback()
+                self._discard_changes()
             logging.error(f"SQL végrehajtási hiba: {str(e)}")
             raise
+        finally:
+            if profiling:
+                self.profiler.record(query, (time.perf_counter() - start) * 1000, rows, failed)
+
+    def open_cursor(self, query: str, params: tuple = (),
+                    row_type: Optional[type] = None) -> sqlite3.Cursor:
+        """
+        Olvasó lekérdezés indítása az eredmény betöltése nélkül
+
+        A sorokat a hívó olvassa fetchmany()-vel, igény szerint (pl. a
+        QueryTableModel görgetéskor), majd lezárja a kurzort.
+
+        Args:
+            query: SQL lekérdezés szövege
+            params: Lekérdezés paraméterei
+            row_type: Az eredménysorok típusa (lásd execute_query)
+
+        Returns:
+            A végrehajtott lekérdezés kurzora
+        """
+        try:
+            cursor = self.conn.cursor()
+            if row_type is not None:
+                cursor.row_factory = _row_factory(row_type)
+            cursor.execute(query, params)
+            return cursor
+        except Exception as e:
+            logging.error(f"SQL végrehajtási hiba: {str(e)}")
+            raise
+
+    def stream_query(self, query: str, params: tuple = (), batch_size: int = DEFAULT_FETCH_SIZE,
+                     row_type: Optional[type] = None) -> Iterator[List[Any]]:
+        """
+        Olvasó lekérdezés eredménye legfeljebb batch_size soros lapokban
+
+        A sorok fetchmany()-vel, a bejárással együtt olvasódnak, így a
+        memóriában egyszerre csak egy lap van (táblamodell, Excel export,
+        több évet átfogó riport). A kurzor a bejárás végén vagy a generátor
+        lezárásakor záródik. Bejárás közben ugyanezen a szálon írni nem
+        érdemes, mert az a még olvasott táblát módosíthatja.
+
+        Profilozásnál csak a végrehajtás és a lapok olvasásának ideje
+        számít, a hívó feldolgozása nem.
+
+        Példa:
+            for batch in db.stream_query(BILLING_DETAIL_QUERY.format(where=where), params):
+                export(batch)
+
+        Args:
+            query: SQL lekérdezés szövege
+            params: Lekérdezés paraméterei
+            batch_size: Egy lapban lekért sorok száma
+            row_type: Az eredménysorok típusa (lásd execute_query)
+        """
+        profiling = self.profiling
+        elapsed = 0.0
+        start = time.perf_counter()  # None, amíg a hívó dolgozza fel a lapot
+        rows = 0
+        failed = True
+        cursor = None
+        try:
+            cursor = self.open_cursor(query, params, row_type)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                rows += len(batch)
+                elapsed += time.perf_counter() - start
+                start = None
+                yield batch
+                start = time.perf_counter()
+            failed = False
+        except GeneratorExit:
+            failed = False  # a hívó a végéig olvasás előtt lezárta
+            raise
+        except Exception as e:
+            # A végrehajtási hibát az open_cursor már naplózta
+            if cursor is not None:
+                logging.error(f"Sorok olvasási hiba: {str(e)}")
+            raise
+        finally:
+            if cursor is not None:
+                cursor.close()
+            if profiling:
+                if start is not None:
+                    elapsed += time.perf_counter() - start
+                self.profiler.record(query, elapsed * 1000, rows, failed)
+
+    def fetch_iter(self, query: str, params: tuple = (), row_type: Optional[type] = None,
+                   batch_size: int = DEFAULT_FETCH_SIZE) -> Iterator[Any]:
+        """
+        Olvasó lekérdezés sorai egyenként, a teljes eredmény betöltése nélkül
+        (a stream_query lapjai kibontva)
+
+        Példa:
+            for row in db.fetch_iter("SELECT id, date FROM deliveries", row_type=tuple):
+                ...
+
+        Args:
+            query: SQL lekérdezés szövege
+            params: Lekérdezés paraméterei
+            row_type: Az eredménysorok típusa (lásd execute_query)
+            batch_size: Egy lépésben lekért sorok száma
+        """
+        for batch in self.stream_query(query, params, batch_size, row_type):
+            yield from batch
+
+    def execute_many(self, query: str, params_list: Iterable[Sequence[Any]]) -> int:
+        """
+        Ugyanazon utasítás végrehajtása több paraméter sorral, egy tranzakcióban
+        
+        Args:
+            query: SQL utasítás szövege
+            params_list: Paraméter sorok listája
+            
+        Returns:
+            Az érintett sorok száma
+        """
+        profiling = self.profiling
+        start = time.perf_counter() if profiling else 0.0
+        rows = None
+        try:
+            with self.transaction():
+                cursor = self.conn.executemany(query, params_list)
+                self._record_change(query)
+                rows = cursor.rowcount
+            return rows
+        except Exception as e:
+            logging.error(f"Kötegelt végrehajtási hiba: {str(e)}")
+            raise
+        finally:
+            if profiling:
+                self.profiler.record(query, (time.perf_counter() - start) * 1000, rows, rows is None)
+
+    def bulk_insert(self, table_name: str, records: List[Dict[str, Any]]) -> int:
+        """
+        Több rekord beszúrása egyetlen tranzakcióban
+        
+        Args:
+            table_name: Tábla neve
+            records: Beszúrandó adatok listája; minden elem ugyanazokkal a kulcsokkal
+            
+        Returns:
+            A beszúrt rekordok száma
+        """
+        if not records:
+            return 0
+        try:
+            keys = tuple(records[0].keys())
+            query = _insert_statement(table_name, keys)
+            
+            return self.execute_many(query, [tuple(record[key] for key in keys) for record in records])
+            
+        except Exception as e:
+            logging.error(f"Tömeges beszúrási hiba: {str(e)}")
+            raise
+
+    def bulk_update(self, table_name: str, records: List[Dict[str, Any]],
+                    key_columns: Sequence[str] = ('id',)) -> int:
+        """
+        Több rekord frissítése egyetlen tranzakcióban
+        
+        Args:
+            table_name: Tábla neve
+            records: Frissítendő adatok; minden elem tartalmazza a kulcs oszlopokat
+                és ugyanazokat a frissítendő oszlopokat
+            key_columns: A WHERE feltételben használt oszlopok
+            
+        Returns:
+            A frissített sorok száma
+        """
+        if not records:
+            return 0
+        try:
+            key_columns = tuple(key_columns)
+            set_keys = tuple(key for key in records[0].keys() if key not in key_columns)
+            query = _update_statement(table_name, set_keys, key_columns)
+            params_list = [
+                tuple(record[key] for key in set_keys) + tuple(record[key] for key in key_columns)
+                for record in records
+            ]
+            
+            return self.execute_many(query, params_list)
+            
+        except Exception as e:
+            logging.error(f"Tömeges frissítési hiba: {str(e)}")
+            raise
 
     def insert_record(self, table_name: str, data: Dict[str, Any]) -> int:
         """
@@ -230,9 +714,7 @@ class DatabaseHandler:
             Az új rekord ID-ja
         """
         try:
-            columns = ', '.join(data.keys())
-            placeholders = ', '.join(['?' for _ in data])
-            query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+            query = _insert_statement(table_name, tuple(data))
             
             return self.execute_query(query, tuple(data.values()))
             
@@ -250,8 +732,7 @@ class DatabaseHandler:
             record_id: A frissítendő rekord ID-ja
         """
         try:
-            columns = ', '.join([f"{key} = ?" for key in data.keys()])
-            query = f"UPDATE {table_name} SET {columns} WHERE id = ?"
+            query = _update_statement(table_name, tuple(data), ('id',))
             params = tuple(data.values()) + (record_id,)
             self.execute_query(query, params)
             
@@ -259,6 +740,81 @@ class DatabaseHandler:
             logging.error(f"Frissítési hiba: {str(e)}")
             raise
 
+    def get_driver_id(self, name: str) -> Optional[int]:
+        """A sofőr azonosítója név alapján (a felület név szerint választ sofőrt)"""
+        rows = self.execute_query("SELECT id FROM drivers WHERE name = ? ORDER BY id LIMIT 1", (name,))
+        return rows[0]['id'] if rows else None
+
+    def search_addresses(self, query: str, limit: int = 20) -> List[sqlite3.Row]:
+        """
+        Címek keresése az addresses_fts indexben, ékezetektől függetlenül.
+
+        A keresőszöveg minden szava a cím valamely szavának eleje kell legyen
+        (pl. "kos 12" -> "1051 Budapest, Kossuth utca 12").
+
+        Args:
+            query: A beírt keresőszöveg
+            limit: Legfeljebb ennyi találat
+
+        Returns:
+            Relevancia szerint rendezett sorok (id, address, price)
+        """
+        words = re.findall(r'\w+', query)
+        if not words:
+            return []
+        match = " ".join(f'"{word}"*' for word in words)
+        return self.execute_query(ADDRESS_SEARCH_QUERY, (match, limit))
+
+    def mark_billed(self, delivery_ids: Iterable[int], user_id: Optional[int] = None) -> int:
+        """
+        Fuvarok számlázottnak jelölése egyetlen UPDATE utasítással, audit bejegyzéssel.
+
+        Az azonosítók egy ideiglenes táblába kerülnek, így tetszőleges számú
+        fuvar (pl. egy teljes hónap) is egy utasítással frissül.
+
+        Args:
+            delivery_ids: A fuvarok (deliveries.id) azonosítói
+            user_id: Az audit naplóba kerülő felhasználó
+
+        Returns:
+            A ténylegesen átállított fuvarok száma
+        """
+        ids = sorted({int(delivery_id) for delivery_id in delivery_ids})
+        if not ids:
+            return 0
+        insert = "INSERT INTO temp.billing_selection (id) VALUES (?)"
+        update = '''
+            UPDATE deliveries SET status = 'billed'
+            WHERE id IN (SELECT id FROM temp.billing_selection) AND status IS NOT 'billed'
+        '''
+        profiling = self.profiling
+        try:
+            with self.transaction():
+                conn = self.conn
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS billing_selection (id INTEGER PRIMARY KEY)")
+                conn.execute("DELETE FROM temp.billing_selection")
+                # A közvetlen conn hívások az execute_query-t megkerülik, ezért itt rögzítjük őket
+                start = time.perf_counter()
+                conn.executemany(insert, [(delivery_id,) for delivery_id in ids])
+                if profiling:
+                    self.profiler.record(insert, (time.perf_counter() - start) * 1000, len(ids))
+                start = time.perf_counter()
+                count = conn.execute(update).rowcount
+                if profiling:
+                    self.profiler.record(update, (time.perf_counter() - start) * 1000, count)
+                self._record_change(update)
+                conn.execute("DELETE FROM temp.billing_selection")
+                if count:
+                    self.insert_record('audit_log', {
+                        'user_id': user_id,
+                        'action': 'mark_billed',
+                        'details': f"{count} fuvar számlázottnak jelölve: {','.join(map(str, ids))}"
+                    })
+            return count
+        except Exception as e:
+            logging.error(f"Számlázottnak jelölési hiba: {str(e)}")
+            raise
+
     def load_factories(self) -> List[sqlite3.Row]:
         """Betölti az összes gyárat"""
         try:
@@ -266,11 +822,3 @@ class DatabaseHandler:
         except Exception as e:
             logging.error(f"Gyárak betöltési hiba: {str(e)}")
             return []
-
-    def __del__(self):
-        """Destruktor - lezárja az adatbázis kapcsolatot"""
-        if self.conn:
-            try:
-                self.conn.close()
-            except:
-                pass
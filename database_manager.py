@@ -1,22 +1,30 @@
 # -*- coding: utf-8 -*-
-from PySide6.QtCore import Qt, QDate
+from PySide6.QtCore import Qt, QDate, Signal
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QWidget, QFormLayout,
     QLineEdit, QSpinBox, QPushButton, QHBoxLayout,
-    QTableWidget, QTabWidget, QTableWidgetItem, QMenuBar,
+    QTableWidget, QTabWidget, QTableWidgetItem, QMenuBar, QTableView,
     QMessageBox, QComboBox, QDateEdit, QCheckBox, QGridLayout,
-    QFrame, QLabel, QFileDialog, QDoubleSpinBox
+    QFrame, QLabel, QFileDialog, QDoubleSpinBox, QAbstractItemView
 )
 from PySide6.QtCore import Qt, QDate
 from PySide6.QtWidgets import QMainWindow
 from datetime import datetime
 import os
-from openpyxl import Workbook
+from excel_export import export_rows, PLAIN_HEADER_STYLE
 from typing import Dict, Any
 
 import sys
 sys.path.append('.')
-from database_handler import DatabaseHandler
+from database_handler import get_database_handler
+from queries import (
+    BILLING_DETAIL_QUERY, BILLING_SUMMARY_QUERY, BILLING_SUMMARY_IDS_QUERY, LAST_FUEL_DATE_QUERY,
+    ZONE_PRICES_QUERY, billing_where
+)
+from query_table_model import QueryTableModel, Column
+from query_executor import QueryExecutor
+from zone_engine import get_zone_engine
+from fuel_analytics import get_fuel_analytics
 from vacation_manager import VacationManager
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from config_manager import ConfigManager
@@ -24,20 +32,42 @@ from driver_address_dialog import DriverAddressDialog
 
 
 class DatabaseManager(QDialog):
+    # Az adatbázis változásfigyelője bármely szálról jelezhet; a fülek a GUI szálon frissülnek
+    tablesChanged = Signal(object)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumSize(1024, 768)
-        self.db = DatabaseHandler()
+        self.db = get_database_handler()
         self.vacation_manager = VacationManager(self.db)
+        self.fuel_analytics = get_fuel_analytics(self.db)
         self.config_manager = ConfigManager()
-        self.setupDatabase()
+
+        # Háttérben futó lekérdezések: kulcs -> (nézet, modell)
+        self.query_executor = QueryExecutor(self.db, self)
+        self.query_executor.batchReady.connect(self.onQueryBatch)
+        self.query_executor.finished.connect(self.onQueryFinished)
+        self.query_executor.failed.connect(self.onQueryFailed)
+        self.query_executor.loadingChanged.connect(self.onQueryLoading)
+        self._query_targets = {}
+
         self.initUI()
+
+        # Más fülön vagy ablakban történt módosítások elavulttá teszik az érintett füleket
+        self.tablesChanged.connect(self.onTablesChanged)
+        self.db.add_change_listener(self.tablesChanged.emit)
+
         self.loadSettings()
 
     def closeEvent(self, event):
         self.saveSettings()
         event.accept()
 
+    def done(self, result):
+        self.query_executor.cancelAll()
+        self.db.remove_change_listener(self.tablesChanged.emit)
+        super().done(result)
+
     def loadSettings(self):
         # Ablak méret és pozíció
         size = self.config_manager.get('window_size', (1024, 768))
@@ -45,9 +75,10 @@ class DatabaseManager(QDialog):
         pos = self.config_manager.get('window_position', (100, 100))
         self.move(*pos)
 
-        # Aktuális fül
+        # Aktuális fül (csak ez épül fel és töltődik be megnyitáskor)
         current_tab = self.config_manager.get('current_tab', 0)
         self.tabs.setCurrentIndex(current_tab)
+        self.onTabChanged(self.tabs.currentIndex())
 
         # Színséma
         theme = self.config_manager.get('theme', 'light')
@@ -73,7 +104,7 @@ class DatabaseManager(QDialog):
                     background-color: #2e2e2e;
                     color: #ffffff;
                 }
-                QLineEdit, QSpinBox, QDateEdit, QComboBox, QTableWidget, QPushButton {
+                QLineEdit, QSpinBox, QDateEdit, QComboBox, QTableWidget, QTableView, QPushButton {
                     background-color: #3e3e3e;
                     color: #ffffff;
                     border: 1px solid #5e5e5e;
@@ -91,21 +122,106 @@ class DatabaseManager(QDialog):
     def showError(self, title, message):
         QMessageBox.critical(self, title, f"Hiba: {message}")
 
+    def _createQueryView(self, columns):
+        """Soronként kijelölhető táblanézet QueryTableModel-lel"""
+        view = QTableView()
+        view.setModel(QueryTableModel(columns, view))
+        view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        return view
+
+    def _selectedRecords(self, view):
+        """A nézetben kijelölt sorok adatbázis rekordjai"""
+        model = view.model()
+        rows = sorted({index.row() for index in view.selectionModel().selectedIndexes()})
+        return [model.rowData(row) for row in rows]
+
+    def _selectedRecord(self, view):
+        """Az első kijelölt sor rekordja, vagy None"""
+        records = self._selectedRecords(view)
+        return records[0] if records else None
+
+    def _loadAsync(self, key, view, model, query, params=()):
+        """
+        Lekérdezés háttérszálon; csak az első lap töltődik be, a többit a
+        modell fetchMore-ja kéri görgetéskor (a teljes tábla nem kerül a memóriába).
+
+        Ugyanazon kulcs új lekérdezése megszakítja az előzőt (pl. szűrőváltáskor).
+        """
+        model.clear()
+        self._query_targets[key] = (view, model)
+        model.setFetcher(lambda: self._isQueryTarget(key, model) and self.query_executor.canFetchMore(key),
+                         lambda: self._isQueryTarget(key, model) and self.query_executor.fetchMore(key))
+        self.query_executor.submit(key, query, tuple(params), page_size=model.batch_size)
+
+    def _isQueryTarget(self, key, model):
+        """A modell-e a kulcs aktuális célja (a számlázás fül két modellje ugyanazt a kulcsot használja)"""
+        target = self._query_targets.get(key)
+        return target is not None and target[1] is model
+
+    def onQueryBatch(self, key, rows):
+        view, model = self._query_targets[key]
+        model.appendRows(rows)
+
+    def onQueryFinished(self, key, count):
+        view, model = self._query_targets[key]
+        # Az oszlopszélesség az első lap alapján áll be, a további lapok nem ugráltatják
+        if model.rowCount() <= count:
+            view.resizeColumnsToContents()
+
+    def onQueryFailed(self, key, message):
+        self.showError("Adatok betöltése sikertelen", message)
+
+    def onQueryLoading(self, key, loading):
+        """Betöltés jelzése: homokóra a nézeten és állapotszöveg a dialógus alján"""
+        view, model = self._query_targets[key]
+        if loading:
+            view.setCursor(Qt.BusyCursor)
+        else:
+            view.unsetCursor()
+        self.loading_label.setVisible(any(
+            self.query_executor.isLoading(k) for k in self._query_targets))
+
     def initUI(self):
         self.setWindowTitle("Törzsadat Kezelő")
         layout = QVBoxLayout()
 
+        self.loading_label = QLabel("Adatok betöltése...")
+        self.loading_label.hide()
+
+        # A fülek első megjelenítéskor épülnek fel (onTabChanged); addig csak
+        # egy üres helyőrző áll a helyükön. A 'tables' halmaz módosulásakor
+        # a fül elavult, és a következő aktiváláskor újratöltődik.
+        self.tab_states = [
+            {'title': "Gyárak", 'build': self.createFactoriesTab, 'load': self.loadFactories,
+             'tables': {'factories', 'factory_waiting_fees', 'factory_zone_prices'}},
+            {'title': "Sofőrök", 'build': self.createDriversTab, 'load': self.loadDrivers,
+             'tables': {'drivers'}},
+            {'title': "Gépjárművek", 'build': self.createVehiclesTab, 'load': self.loadVehicles,
+             'tables': {'vehicles'}},
+            {'title': "Szabadság", 'build': self.createVacationTab, 'load': self.loadVacationData,
+             'tables': {'vacation_allowance'}},
+            {'title': "Üzemanyag", 'build': self.createFuelTab, 'load': self.loadFuelTab,
+             'tables': {'fuel_consumption', 'vehicles'}},
+            {'title': "Alkalmazottak", 'build': self.createEmployeesTab, 'load': self.loadEmployees,
+             'tables': {'employees'}},
+            {'title': "Számlázás", 'build': self.createBillingTab, 'load': self.onBillingFiltersChanged,
+             'tables': {'deliveries', 'billing_daily_summary', 'drivers', 'factories',
+                        'factory_zone_prices'}},
+        ]
+
         self.tabs = QTabWidget()
-        self.tabs.addTab(self.createFactoriesTab(), "Gyárak")
-        self.tabs.addTab(self.createDriversTab(), "Sofőrök")
-        self.tabs.addTab(self.createVehiclesTab(), "Gépjárművek")
-        self.tabs.addTab(self.createVacationTab(), "Szabadság")
-        self.tabs.addTab(self.createFuelTab(), "Üzemanyag")
-        self.tabs.addTab(self.createEmployeesTab(), "Alkalmazottak")  # Új fül hozzáadása
+        for state in self.tab_states:
+            placeholder = QWidget()
+            placeholder_layout = QVBoxLayout(placeholder)
+            placeholder_layout.setContentsMargins(0, 0, 0, 0)
+            state['built'] = False
+            state['stale'] = True
+            self.tabs.addTab(placeholder, state['title'])
 
         layout.addWidget(self.tabs)
+        layout.addWidget(self.loading_label)
         self.setLayout(layout)
-        self.setupConnections()
 
         # Eseménykezelő hozzáadása a fülváltáshoz
         self.tabs.currentChanged.connect(self.onTabChanged)
@@ -122,159 +238,36 @@ class DatabaseManager(QDialog):
             self.applyTheme('dark')
 
     def onTabChanged(self, index):
-        if self.tabs.tabText(index) == "Sofőrök":
-            self.loadDrivers()
-
-    def setupConnections(self):
-        # Drivers tab
-        self.driver_table.itemClicked.connect(self.onDriverSelected)
-        self.add_driver_btn.clicked.connect(self.addDriver)
-        self.save_driver_btn.clicked.connect(self.saveDriverChanges)
-        self.delete_driver_btn.clicked.connect(self.deleteDriver)
-
-        # Vehicles tab
-        self.vehicles_table.itemClicked.connect(self.onVehicleSelected)
-        self.add_vehicle_btn.clicked.connect(self.addVehicle)
-        self.save_vehicle_btn.clicked.connect(self.saveVehicleChanges)
-        self.delete_vehicle_btn.clicked.connect(self.deleteVehicle)
-
-    def setupDatabase(self):
-        try:
-            # FK ellenőrzés kikapcsolása
-            self.db.execute_query("PRAGMA foreign_keys=OFF")
-    
-            # Táblák létrehozása
-            self.db.execute_query('''
-                CREATE TABLE IF NOT EXISTS vehicles (
-                    id INTEGER PRIMARY KEY,
-                    plate_number TEXT NOT NULL,
-                    type TEXT,
-                    brand TEXT,
-                    model TEXT,
-                    year_of_manufacture INTEGER,
-                    chassis_number TEXT,
-                    engine_number TEXT, 
-                    engine_type TEXT,
-                    fuel_type TEXT,
-                    max_weight INTEGER,
-                    own_weight INTEGER,
-                    payload_capacity INTEGER,
-                    seats INTEGER,
-                    technical_review_date TEXT,
-                    tachograph_type TEXT,
-                    tachograph_calibration_date TEXT,
-                    fire_extinguisher_expiry TEXT
-                )
-            ''')
-
-            self.db.execute_query('''
-                CREATE TABLE IF NOT EXISTS factories (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            self.db.execute_query('''
-                CREATE TABLE IF NOT EXISTS factory_zone_prices (
-                    id INTEGER PRIMARY KEY,
-                    factory_id INTEGER,
-                    zone_name TEXT, 
-                    price INTEGER DEFAULT 0,
-                    FOREIGN KEY (factory_id) REFERENCES factories(id)
-                )
-            ''')
-
-            self.db.execute_query('''
-                CREATE TABLE IF NOT EXISTS factory_waiting_fees (
-                    id INTEGER PRIMARY KEY,
-                    factory_id INTEGER NOT NULL,
-                    price_per_15_min INTEGER DEFAULT 0,
-                    FOREIGN KEY (factory_id) REFERENCES factories(id)
-                )
-            ''')
-
-            self.db.execute_query('''
-                CREATE TABLE IF NOT EXISTS drivers (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    birth_date TEXT,
-                    birth_place TEXT,
-                    address TEXT,
-                    mothers_name TEXT,
-                    tax_number TEXT,
-                    social_security_number TEXT,
-                    bank_name TEXT,
-                    bank_account TEXT,
-                    drivers_license_number TEXT,
-                    drivers_license_expiry TEXT,
-                    vacation_days INTEGER DEFAULT 29,
-                    used_vacation_days INTEGER DEFAULT 0
-                )
-            ''')
-
-            self.db.execute_query('''
-                CREATE TABLE IF NOT EXISTS vacation_allowance (
-                    id INTEGER PRIMARY KEY,
-                    year INTEGER NOT NULL,
-                    total_days INTEGER DEFAULT 29,
-                    used_days INTEGER DEFAULT 0,
-                    UNIQUE(year)
-                )
-            ''')
-
-            self.db.execute_query('''
-                CREATE TABLE IF NOT EXISTS fuel_consumption (
-                    id INTEGER PRIMARY KEY,
-                    vehicle_id INTEGER,
-                    date TEXT,
-                    odometer_reading INTEGER,
-                    fuel_amount REAL,
-                    fuel_price REAL,
-                    total_cost REAL,
-                    location TEXT,
-                    full_tank BOOLEAN,
-                    avg_consumption REAL,
-                    FOREIGN KEY (vehicle_id) REFERENCES vehicles(id)
-                )
-            ''')
-
-            self.db.execute_query('''
-                CREATE TABLE IF NOT EXISTS deliveries (
-                    id INTEGER PRIMARY KEY,
-                    delivery_date TEXT NOT NULL,
-                    driver_id INTEGER,
-                    vehicle_id INTEGER,
-                    factory_id INTEGER,
-                    zone_id INTEGER,
-                    address_id INTEGER,
-                    delivery_number TEXT NOT NULL,
-                    amount REAL,
-                    status TEXT DEFAULT 'pending',
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (driver_id) REFERENCES drivers(id),
-                    FOREIGN KEY (vehicle_id) REFERENCES vehicles(id),
-                    FOREIGN KEY (factory_id) REFERENCES factories(id),
-                    FOREIGN KEY (zone_id) REFERENCES factory_zone_prices(id),
-                    FOREIGN KEY (address_id) REFERENCES addresses(id)
-                )
-            ''')
-
-            # FK ellenőrzés visszakapcsolása
-            self.db.execute_query("PRAGMA foreign_keys=ON")
-
-        except Exception as e:
-            print(f"Database initialization error: {str(e)}")
-            raise
-
+        """A fül felépítése első aktiváláskor, és újratöltése, ha elavult"""
+        if not 0 <= index < len(self.tab_states):
+            return
+        state = self.tab_states[index]
+        if not state['built']:
+            self.tabs.widget(index).layout().addWidget(state['build']())
+            state['built'] = True
+        if state['stale']:
+            state['stale'] = False
+            state['load']()
+
+    def onTablesChanged(self, tables):
+        """
+        A módosított táblákat használó fülek elavultnak jelölése.
+
+        Az aktuális fül a saját műveletei után maga tölti újra a táblázatát,
+        a többi fül a következő aktiváláskor frissül.
+        """
+        current = self.tabs.currentIndex()
+        for index, state in enumerate(self.tab_states):
+            if index != current and state['built'] and state['tables'] & tables:
+                state['stale'] = True
 
     def saveDriverChanges(self):
-        selected = self.driver_table.selectedItems()
-        if not selected:
+        selected = self._selectedRecord(self.driver_table)
+        if selected is None:
             QMessageBox.warning(self, "Figyelmeztetés", "Válasszon sofőrt!")
             return
     
-        driver_id = int(self.driver_table.item(selected[0].row(), 0).text())
+        driver_id = selected['id']
         driver_data = self._collectDriverData()
 
         try:
@@ -288,35 +281,25 @@ class DatabaseManager(QDialog):
 
     def loadDrivers(self):
         try:
-            results = self.db.execute_query("""
+            self.driver_table.model().setQuery(self.db, """
                 SELECT id, name, birth_date, birth_place, address, 
                        mothers_name, tax_number, social_security_number,
-                       drivers_license_number, bank_name, bank_account, vacation_days
+                       drivers_license_number, drivers_license_expiry,
+                       bank_name, bank_account, vacation_days
                 FROM drivers 
                 ORDER BY name""")
-
-            self.driver_table.setRowCount(len(results))
-            for row, driver in enumerate(results):
-                fields = ['id', 'name', 'birth_date', 'birth_place', 'address',
-                         'mothers_name', 'tax_number', 'social_security_number', 
-                         'drivers_license_number', 'bank_name', 'bank_account', 'vacation_days']
-
-                for col, field in enumerate(fields):
-                    item = QTableWidgetItem(str(driver[field] if driver[field] else ""))
-                    item.setTextAlignment(Qt.AlignCenter)
-                    self.driver_table.setItem(row, col, item)
         except Exception as e:
             self.showError("Betöltési hiba", str(e))
 
 
 
     def deleteDriver(self):
-        selected = self.driver_table.selectedItems()
-        if not selected:
+        selected = self._selectedRecord(self.driver_table)
+        if selected is None:
             QMessageBox.warning(self, "Figyelmeztetés", "Válasszon sofőrt!")
             return
         
-        driver_id = int(self.driver_table.item(selected[0].row(), 0).text())
+        driver_id = selected['id']
     
         if QMessageBox.question(self, 'Megerősítés', 'Biztosan törli a sofőrt?',
                               QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
@@ -367,6 +350,23 @@ class DatabaseManager(QDialog):
         layout = QVBoxLayout()
         form_layout = QFormLayout()
 
+        # Beviteli mezők
+        self.driver_name = QLineEdit()
+        self.birth_date = QDateEdit()
+        self.birth_date.setCalendarPopup(True)
+        self.birth_place = QLineEdit()
+        self.mothers_name = QLineEdit()
+        self.tax_number = QLineEdit()
+        self.social_security_number = QLineEdit()
+        self.drivers_license_number = QLineEdit()
+        self.drivers_license_expiry = QDateEdit()
+        self.drivers_license_expiry.setCalendarPopup(True)
+        self.bank_name = QLineEdit()
+        self.bank_account = QLineEdit()
+        # A Szabadság fül saját vacation_days mezőt használ
+        self.driver_vacation_days = QSpinBox()
+        self.driver_vacation_days.setRange(0, 100)
+
         # Ez a rész rögtön a beviteli mezők létrehozása után jön:
         self.driver_address = QLineEdit()
         self.driver_address.setReadOnly(True)  # Ez teszi csak olvashatóvá
@@ -390,7 +390,7 @@ class DatabaseManager(QDialog):
         form_layout.addRow("Jogosítvány lejárata:", self.drivers_license_expiry)
         form_layout.addRow("Bank neve:", self.bank_name)
         form_layout.addRow("Bankszámlaszám:", self.bank_account)
-        form_layout.addRow("Szabadság napok:", self.vacation_days)  # Új mező hozzáadása
+        form_layout.addRow("Szabadság napok:", self.driver_vacation_days)
 
         # Gombok
         btn_layout = QHBoxLayout()
@@ -403,18 +403,25 @@ class DatabaseManager(QDialog):
         btn_layout.addWidget(self.delete_driver_btn)
 
         # Táblázat
-        self.driver_table = QTableWidget()
-        self.driver_table.setColumnCount(12)  # Frissítve a szabadság napok oszlop hozzáadásához
-        self.driver_table.setHorizontalHeaderLabels([
-            "ID", "Név", "Születési idő", "Születési hely", "Lakcím",
-            "Anyja neve", "Adószám", "TAJ szám", "Jogosítvány száma",
-            "Bank neve", "Bankszámlaszám", "Szabadság napok"  # Új oszlop hozzáadása
+        self.driver_table = self._createQueryView([
+            Column('id', "ID"), Column('name', "Név"),
+            Column('birth_date', "Születési idő"), Column('birth_place', "Születési hely"),
+            Column('address', "Lakcím"), Column('mothers_name', "Anyja neve"),
+            Column('tax_number', "Adószám"), Column('social_security_number', "TAJ szám"),
+            Column('drivers_license_number', "Jogosítvány száma"),
+            Column('bank_name', "Bank neve"), Column('bank_account', "Bankszámlaszám"),
+            Column('vacation_days', "Szabadság napok")
         ])
 
         layout.addLayout(form_layout)
         layout.addLayout(btn_layout)
         layout.addWidget(self.driver_table)
 
+        self.driver_table.clicked.connect(self.onDriverSelected)
+        self.add_driver_btn.clicked.connect(self.addDriver)
+        self.save_driver_btn.clicked.connect(self.saveDriverChanges)
+        self.delete_driver_btn.clicked.connect(self.deleteDriver)
+
         self.driver_tab.setLayout(layout)
         return self.driver_tab
 
@@ -597,21 +604,21 @@ class DatabaseManager(QDialog):
 
 
 
-    def onDriverSelected(self, item):
+    def onDriverSelected(self, index):
         try:
-            row = item.row()
-            self.driver_name.setText(self.driver_table.item(row, 1).text() if self.driver_table.item(row, 1) else "")
-            self.birth_date.setDate(QDate.fromString(self.driver_table.item(row, 2).text(), 'yyyy-MM-dd') if self.driver_table.item(row, 2) else QDate.currentDate())
-            self.birth_place.setText(self.driver_table.item(row, 3).text() if self.driver_table.item(row, 3) else "")
-            self.driver_address.setText(self.driver_table.item(row, 4).text() if self.driver_table.item(row, 4) else "")
-            self.mothers_name.setText(self.driver_table.item(row, 5).text() if self.driver_table.item(row, 5) else "")
-            self.tax_number.setText(self.driver_table.item(row, 6).text() if self.driver_table.item(row, 6) else "")
-            self.social_security_number.setText(self.driver_table.item(row, 7).text() if self.driver_table.item(row, 7) else "")
-            self.drivers_license_number.setText(self.driver_table.item(row, 8).text() if self.driver_table.item(row, 8) else "")
-            self.drivers_license_expiry.setDate(QDate.fromString(self.driver_table.item(row, 9).text(), 'yyyy-MM-dd') if self.driver_table.item(row, 9) else QDate.currentDate())
-            self.bank_name.setText(self.driver_table.item(row, 10).text() if self.driver_table.item(row, 10) else "")
-            self.bank_account.setText(self.driver_table.item(row, 11).text() if self.driver_table.item(row, 11) else "")
-            self.vacation_days.setValue(int(self.driver_table.item(row, 12).text()) if self.driver_table.item(row, 12) and self.driver_table.item(row, 12).text().isdigit() else 0)
+            driver = self.driver_table.model().rowData(index.row())
+            self.driver_name.setText(driver['name'] or "")
+            self.birth_date.setDate(QDate.fromString(driver['birth_date'], 'yyyy-MM-dd') if driver['birth_date'] else QDate.currentDate())
+            self.birth_place.setText(driver['birth_place'] or "")
+            self.driver_address.setText(driver['address'] or "")
+            self.mothers_name.setText(driver['mothers_name'] or "")
+            self.tax_number.setText(driver['tax_number'] or "")
+            self.social_security_number.setText(driver['social_security_number'] or "")
+            self.drivers_license_number.setText(driver['drivers_license_number'] or "")
+            self.drivers_license_expiry.setDate(QDate.fromString(driver['drivers_license_expiry'], 'yyyy-MM-dd') if driver['drivers_license_expiry'] else QDate.currentDate())
+            self.bank_name.setText(driver['bank_name'] or "")
+            self.bank_account.setText(driver['bank_account'] or "")
+            self.driver_vacation_days.setValue(driver['vacation_days'] or 0)
         except Exception as e:
             QMessageBox.critical(self, "Hiba", f"Hiba történt az adatok betöltése során: {str(e)}")
 
@@ -694,32 +701,36 @@ class DatabaseManager(QDialog):
         btn_layout.addWidget(self.delete_vehicle_btn)
         
         # Táblázat
-        self.vehicles_table = QTableWidget()
-        self.vehicles_table.setColumnCount(17)
-        self.vehicles_table.setHorizontalHeaderLabels([
-            "ID", "Rendszám", "Típus", "Márka", "Model", "Gyártási év",
-            "Alvázszám", "Motorszám", "Motor típus", "Üzemanyag",
-            "Össztömeg", "Saját tömeg", "Hasznos terhelés", "Ülések száma",
-            "Műszaki vizsga", "Tachográf típus", "Tachográf hitelesítés"
+        kg = lambda value: f"{value} kg"
+        self.vehicles_table = self._createQueryView([
+            Column('id', "ID"), Column('plate_number', "Rendszám"),
+            Column('type', "Típus"), Column('brand', "Márka"), Column('model', "Model"),
+            Column('year_of_manufacture', "Gyártási év"),
+            Column('chassis_number', "Alvázszám"), Column('engine_number', "Motorszám"),
+            Column('engine_type', "Motor típus"), Column('fuel_type', "Üzemanyag"),
+            Column('max_weight', "Össztömeg", kg), Column('own_weight', "Saját tömeg", kg),
+            Column('payload_capacity', "Hasznos terhelés", kg), Column('seats', "Ülések száma"),
+            Column('technical_review_date', "Műszaki vizsga"),
+            Column('tachograph_type', "Tachográf típus"),
+            Column('tachograph_calibration_date', "Tachográf hitelesítés")
         ])
-        self.vehicles_table.itemClicked.connect(self.onVehicleSelected)
+        self.vehicles_table.clicked.connect(self.onVehicleSelected)
         
         layout.addLayout(form_layout)
         layout.addLayout(btn_layout)
         layout.addWidget(self.vehicles_table)
         
         widget.setLayout(layout)
-        self.loadVehicles()
         return widget
 
     def saveVehicleChanges(self):
         """Jármű módosításainak mentése"""
-        selected = self.vehicles_table.selectedItems()
-        if not selected:
+        selected = self._selectedRecord(self.vehicles_table)
+        if selected is None:
             QMessageBox.warning(self, "Figyelmeztetés", "Válasszon járművet!")
             return
             
-        vehicle_id = int(self.vehicles_table.item(selected[0].row(), 0).text())
+        vehicle_id = selected['id']
         
         try:
             data = {
@@ -737,7 +748,7 @@ class DatabaseManager(QDialog):
                 'payload_capacity': self.payload_capacity.value(),
                 'seats': self.seats.value(),
                 'technical_review_date': self.technical_review_date.date().toString('yyyy-MM-dd'),
-                'tachograph': self.tachograph_type.text().strip(),
+                'tachograph_type': self.tachograph_type.text().strip(),
                 'tachograph_calibration_date': self.tachograph_calibration_date.date().toString('yyyy-MM-dd'),
                 'fire_extinguisher_expiry': self.fire_extinguisher_expiry.date().toString('yyyy-MM-dd')
             }
@@ -756,8 +767,7 @@ class DatabaseManager(QDialog):
 
     def loadVehicles(self):
        try:
-           # Debug információ
-           results = self.db.execute_query("""
+           self.vehicles_table.model().setQuery(self.db, """
                SELECT id, plate_number, type, brand, model, 
                       year_of_manufacture, chassis_number, engine_number,
                       engine_type, fuel_type, max_weight, own_weight,
@@ -767,72 +777,11 @@ class DatabaseManager(QDialog):
                FROM vehicles
                ORDER BY plate_number
            """)
-
-           self.vehicles_table.setRowCount(len(results))
-       
-           # Minden járműhöz végigmegyünk az oszlopokon
-           for row, vehicle in enumerate(results):
-               # ID
-               self.vehicles_table.setItem(row, 0, QTableWidgetItem(str(vehicle['id'])))
-           
-               # Rendszám
-               self.vehicles_table.setItem(row, 1, QTableWidgetItem(vehicle['plate_number']))
-           
-               # Típus
-               self.vehicles_table.setItem(row, 2, QTableWidgetItem(vehicle['type']))
-           
-               # Márka
-               self.vehicles_table.setItem(row, 3, QTableWidgetItem(vehicle['brand']))
-           
-               # Modell
-               self.vehicles_table.setItem(row, 4, QTableWidgetItem(vehicle['model']))
-           
-               # Gyártási év 
-               self.vehicles_table.setItem(row, 5, QTableWidgetItem(str(vehicle['year_of_manufacture'])))
-           
-               # Alvázszám
-               self.vehicles_table.setItem(row, 6, QTableWidgetItem(vehicle['chassis_number']))
-           
-               # Motorszám
-               self.vehicles_table.setItem(row, 7, QTableWidgetItem(vehicle['engine_number']))
-           
-               # Motor típus
-               self.vehicles_table.setItem(row, 8, QTableWidgetItem(vehicle['engine_type']))
-           
-               # Üzemanyag
-               self.vehicles_table.setItem(row, 9, QTableWidgetItem(vehicle['fuel_type']))
-           
-               # Össztömeg
-               self.vehicles_table.setItem(row, 10, QTableWidgetItem(f"{vehicle['max_weight']} kg"))
-           
-               # Saját tömeg
-               self.vehicles_table.setItem(row, 11, QTableWidgetItem(f"{vehicle['own_weight']} kg"))
-           
-               # Hasznos terhelés
-               self.vehicles_table.setItem(row, 12, QTableWidgetItem(f"{vehicle['payload_capacity']} kg"))
-           
-               # Ülések száma
-               self.vehicles_table.setItem(row, 13, QTableWidgetItem(str(vehicle['seats'])))
-           
-               # Műszaki vizsga
-               self.vehicles_table.setItem(row, 14, QTableWidgetItem(vehicle['technical_review_date']))
-           
-               # Tachográf típus
-               self.vehicles_table.setItem(row, 15, QTableWidgetItem(vehicle['tachograph_type']))
-           
-               # Tachográf hitelesítés
-               self.vehicles_table.setItem(row, 16, QTableWidgetItem(vehicle['tachograph_calibration_date']))
-           
-               # Minden cella középre igazítása
-               for col in range(self.vehicles_table.columnCount()):
-                   item = self.vehicles_table.item(row, col)
-                   if item:
-                       item.setTextAlignment(Qt.AlignCenter)
        
            # Oszlopok méretezése
            self.vehicles_table.resizeColumnsToContents()
        
-           for col in range(self.vehicles_table.columnCount()):
+           for col in range(self.vehicles_table.model().columnCount()):
                width = self.vehicles_table.columnWidth(col)
                if width < 100:  # Minimum szélesség
                    self.vehicles_table.setColumnWidth(col, 100)
@@ -845,13 +794,13 @@ class DatabaseManager(QDialog):
 
     def deleteVehicle(self):
         """Jármű törlése"""
-        selected = self.vehicles_table.selectedItems()
-        if not selected:
+        selected = self._selectedRecord(self.vehicles_table)
+        if selected is None:
             QMessageBox.warning(self, "Figyelmeztetés", "Válasszon járművet!")
             return
         
-        vehicle_id = int(self.vehicles_table.item(selected[0].row(), 0).text())
-        plate = self.vehicles_table.item(selected[0].row(), 1).text()
+        vehicle_id = selected['id']
+        plate = selected['plate_number']
         
         reply = QMessageBox.question(self, 'Megerősítés', 
                                    f'Biztosan törli a {plate} rendszámú járművet?',
@@ -932,9 +881,10 @@ class DatabaseManager(QDialog):
                                        QMessageBox.Yes | QMessageBox.No)
                                    
             if reply == QMessageBox.Yes:
-                self.db.execute_query("DELETE FROM factory_waiting_fees WHERE factory_id = ?", (factory_id,))
-                self.db.execute_query("DELETE FROM factory_zone_prices WHERE factory_id = ?", (factory_id,))
-                self.db.execute_query("DELETE FROM factories WHERE id = ?", (factory_id,))
+                with self.db.transaction():
+                    self.db.execute_query("DELETE FROM factory_waiting_fees WHERE factory_id = ?", (factory_id,))
+                    self.db.execute_query("DELETE FROM factory_zone_prices WHERE factory_id = ?", (factory_id,))
+                    self.db.execute_query("DELETE FROM factories WHERE id = ?", (factory_id,))
             
                 self.loadFactories()
                 self.factory_name.clear()
@@ -965,7 +915,7 @@ class DatabaseManager(QDialog):
             'drivers_license_expiry': self.drivers_license_expiry.date().toString('yyyy-MM-dd'),
             'bank_name': self.bank_name.text().strip(),
             'bank_account': self.bank_account.text().strip(),
-            'vacation_days': self.vacation_days.value()  # Új mező hozzáadása
+            'vacation_days': self.driver_vacation_days.value()
         }
 
 
@@ -982,33 +932,33 @@ class DatabaseManager(QDialog):
         self.birth_date.setDate(QDate.currentDate())
         self.drivers_license_expiry.setDate(QDate.currentDate())
 
-    def onVehicleSelected(self, item):
+    def onVehicleSelected(self, index):
        try:
-           row = item.row()
+           vehicle = self.vehicles_table.model().rowData(index.row())
            # Minden mező óvatos beállítása
-           self.plate_number.setText(self.vehicles_table.item(row, 1).text() if self.vehicles_table.item(row, 1) else "")
-           self.vehicle_type.setText(self.vehicles_table.item(row, 2).text() if self.vehicles_table.item(row, 2) else "")
-           self.brand.setText(self.vehicles_table.item(row, 3).text() if self.vehicles_table.item(row, 3) else "")
-           self.model.setText(self.vehicles_table.item(row, 4).text() if self.vehicles_table.item(row, 4) else "")
-           self.year_of_manufacture.setValue(int(self.vehicles_table.item(row, 5).text()) if self.vehicles_table.item(row, 5) and self.vehicles_table.item(row, 5).text().isdigit() else 1900)
-           self.chassis_number.setText(self.vehicles_table.item(row, 6).text() if self.vehicles_table.item(row, 6) else "")
-           self.engine_number.setText(self.vehicles_table.item(row, 7).text() if self.vehicles_table.item(row, 7) else "")
-           self.engine_type.setText(self.vehicles_table.item(row, 8).text() if self.vehicles_table.item(row, 8) else "")
-           self.fuel_type.setCurrentText(self.vehicles_table.item(row, 9).text() if self.vehicles_table.item(row, 9) else "Dízel")
-           self.max_weight.setValue(int(self.vehicles_table.item(row, 10).text()) if self.vehicles_table.item(row, 10) and self.vehicles_table.item(row, 10).text().isdigit() else 0)
-           self.own_weight.setValue(int(self.vehicles_table.item(row, 11).text()) if self.vehicles_table.item(row, 11) and self.vehicles_table.item(row, 11).text().isdigit() else 0)
-           self.payload_capacity.setValue(int(self.vehicles_table.item(row, 12).text()) if self.vehicles_table.item(row, 12) and self.vehicles_table.item(row, 12).text().isdigit() else 0)
-           self.seats.setValue(int(self.vehicles_table.item(row, 13).text()) if self.vehicles_table.item(row, 13) and self.vehicles_table.item(row, 13).text().isdigit() else 2)
+           self.plate_number.setText(vehicle['plate_number'] or "")
+           self.vehicle_type.setText(vehicle['type'] or "")
+           self.brand.setText(vehicle['brand'] or "")
+           self.model.setText(vehicle['model'] or "")
+           self.year_of_manufacture.setValue(vehicle['year_of_manufacture'] or 1900)
+           self.chassis_number.setText(vehicle['chassis_number'] or "")
+           self.engine_number.setText(vehicle['engine_number'] or "")
+           self.engine_type.setText(vehicle['engine_type'] or "")
+           self.fuel_type.setCurrentText(vehicle['fuel_type'] or "Dízel")
+           self.max_weight.setValue(vehicle['max_weight'] or 0)
+           self.own_weight.setValue(vehicle['own_weight'] or 0)
+           self.payload_capacity.setValue(vehicle['payload_capacity'] or 0)
+           self.seats.setValue(vehicle['seats'] or 2)
        
            # Dátumok beállítása
            date_fields = [
-               (self.technical_review_date, 14),
-               (self.tachograph_calibration_date, 16),
-               (self.fire_extinguisher_expiry, 17)
+               (self.technical_review_date, 'technical_review_date'),
+               (self.tachograph_calibration_date, 'tachograph_calibration_date'),
+               (self.fire_extinguisher_expiry, 'fire_extinguisher_expiry')
            ]
-           for date_field, col in date_fields:
-               if self.vehicles_table.item(row, col) and self.vehicles_table.item(row, col).text():
-                   date_field.setDate(QDate.fromString(self.vehicles_table.item(row, col).text(), 'yyyy-MM-dd'))
+           for date_field, field in date_fields:
+               if vehicle[field]:
+                   date_field.setDate(QDate.fromString(vehicle[field], 'yyyy-MM-dd'))
                else:
                    date_field.setDate(QDate.currentDate())
        except Exception as e:
@@ -1095,8 +1045,6 @@ class DatabaseManager(QDialog):
         layout.addLayout(btn_layout)
         layout.addWidget(self.vacation_table)
         widget.setLayout(layout)
-    
-        self.loadVacationData()
         return widget
 
     def createFactoriesTab(self):
@@ -1115,7 +1063,7 @@ class DatabaseManager(QDialog):
         # Övezeti díj hozzáadása szekció
         zone_layout = QHBoxLayout()
         self.zone_combo = QComboBox()
-        self.zone_combo.addItems([f"Övezet {i}-{i+5}" for i in range(0, 50, 5)])
+        self.zone_combo.addItems(get_zone_engine(self.db).zoneNames())
         self.zone_price = QSpinBox()
         self.zone_price.setRange(0, 100000)
         self.zone_price.setSingleStep(500)
@@ -1157,7 +1105,6 @@ class DatabaseManager(QDialog):
         layout.addWidget(self.zone_prices_table)
     
         widget.setLayout(layout)
-        self.loadFactories()
         return widget
 
     def onFactorySelected(self, item):
@@ -1206,25 +1153,23 @@ class DatabaseManager(QDialog):
                 QMessageBox.warning(self, "Figyelmeztetés", "A gyár nevét kötelező megadni!")
                 return
 
-            # Gyár beszúrása
-            factory_id = self.db.execute_query(
-                "INSERT INTO factories (name) VALUES (?)",
-                (name,)
-            )
-        
-            # Állásidő díj beszúrása
-            self.db.execute_query(
-                "INSERT INTO factory_waiting_fees (factory_id, price_per_15_min) VALUES (?, ?)",
-                (factory_id, self.waiting_fee.value())
-            )
-        
-            # Övezeti díjak inicializálása
-            for i in range(0, 50, 5):
-                zone_name = f"Övezet {i}-{i+5}"
+            # Gyár, állásidő díj és övezeti díjak egyetlen tranzakcióban
+            with self.db.transaction():
+                factory_id = self.db.execute_query(
+                    "INSERT INTO factories (name) VALUES (?)",
+                    (name,)
+                )
+            
                 self.db.execute_query(
-                    "INSERT INTO factory_zone_prices (factory_id, zone_name, price) VALUES (?, ?, 0)",
-                    (factory_id, zone_name)
+                    "INSERT INTO factory_waiting_fees (factory_id, price_per_15_min) VALUES (?, ?)",
+                    (factory_id, self.waiting_fee.value())
                 )
+            
+                # Övezeti díjak inicializálása
+                self.db.bulk_insert('factory_zone_prices', [
+                    {'factory_id': factory_id, 'zone_name': zone_name, 'price': 0}
+                    for zone_name in get_zone_engine(self.db).zoneNames()
+                ])
 
             self.loadFactories()
             self.factory_name.clear()
@@ -1323,12 +1268,7 @@ class DatabaseManager(QDialog):
 
     def loadZonePrices(self, factory_id):
         try:
-            prices = self.db.execute_query("""
-                SELECT zone_name, price 
-                FROM factory_zone_prices 
-                WHERE factory_id = ?
-                ORDER BY zone_name""", 
-                (factory_id,))
+            prices = self.db.execute_query(ZONE_PRICES_QUERY, (factory_id,))
             
             self.zone_prices_table.setRowCount(len(prices))
             for row, price in enumerate(prices):
@@ -1358,23 +1298,6 @@ class DatabaseManager(QDialog):
         except Exception as e:
             self.showError("Betöltési hiba", str(e))
 
-    def setupFuelDatabase(self):
-        self.db.execute_query('''
-            CREATE TABLE IF NOT EXISTS fuel_consumption (
-                id INTEGER PRIMARY KEY,
-                vehicle_id INTEGER,
-                date TEXT,
-                odometer_reading INTEGER,
-                fuel_amount REAL,
-                fuel_price REAL,
-                total_cost REAL,
-                location TEXT,
-                full_tank BOOLEAN,
-                avg_consumption REAL,
-                FOREIGN KEY (vehicle_id) REFERENCES vehicles(id)
-            )
-        ''')
-
     def createFuelTab(self):
         widget = QWidget()
         layout = QVBoxLayout()
@@ -1383,7 +1306,6 @@ class DatabaseManager(QDialog):
         form_layout = QFormLayout()
     
         self.fuel_vehicle_combo = QComboBox()
-        self.loadVehiclesForFuel()
     
         self.fuel_date = QDateEdit()
         self.fuel_date.setCalendarPopup(True)
@@ -1434,12 +1356,16 @@ class DatabaseManager(QDialog):
         btn_layout.addWidget(delete_btn)
     
         # Táblázat
-        self.fuel_table = QTableWidget()
-        self.fuel_table.setColumnCount(10)
-        self.fuel_table.setHorizontalHeaderLabels([
-            "ID", "Jármű", "Dátum", "Kilométeróra", "Mennyiség (L)",
-            "Ár (Ft/L)", "Összköltség (Ft)", "Helyszín", "Tele tank",
-            "Átlagfogyasztás (L/100km)"
+        self.fuel_table = self._createQueryView([
+            Column('id', "ID"), Column('plate_number', "Jármű"), Column('date', "Dátum"),
+            Column('odometer_reading', "Kilométeróra"),
+            Column('fuel_amount', "Mennyiség (L)", lambda v: f"{v:.1f}"),
+            Column('fuel_price', "Ár (Ft/L)", lambda v: f"{v:.2f}"),
+            Column('total_cost', "Összköltség (Ft)", lambda v: f"{v:.2f}"),
+            Column('location', "Helyszín"),
+            Column(lambda r: "Igen" if r['full_tank'] else "Nem", "Tele tank"),
+            Column('avg_consumption', "Átlagfogyasztás (L/100km)",
+                   lambda v: f"{v:.2f}" if v else "")
         ])
     
         layout.addLayout(form_layout)
@@ -1447,9 +1373,12 @@ class DatabaseManager(QDialog):
         layout.addWidget(self.fuel_table)
     
         widget.setLayout(layout)
-        self.loadFuelRecords()
         return widget
 
+    def loadFuelTab(self):
+        self.loadVehiclesForFuel()
+        self.loadFuelRecords()
+
     def calculateFuelConsumption(self, previous_record, current_record):
         try:
             distance = current_record[3] - previous_record[3]  # kilométeróra különbség
@@ -1464,46 +1393,21 @@ class DatabaseManager(QDialog):
 
     def addFuelRecord(self):
         try:
-            vehicle_id = self.fuel_vehicle_combo.currentData()
-            new_odometer = int(self.odometer.value())
-            new_fuel_amount = float(self.fuel_amount.value())
-            is_full_tank = self.full_tank.isChecked()
-
-            # Előző tankolás lekérdezése
-            last_record = self.db.execute_query('''
-                SELECT odometer_reading, fuel_amount 
-                FROM fuel_consumption 
-                WHERE vehicle_id = ? AND full_tank = TRUE
-                ORDER BY date DESC, odometer_reading DESC 
-                LIMIT 1
-            ''', (vehicle_id,))
-
-            # Átlagfogyasztás számítása
-            avg_consumption = None
-            if last_record and is_full_tank:
-                prev_odometer = last_record[0]['odometer_reading']
-                distance = new_odometer - prev_odometer
-                if distance > 0:
-                    avg_consumption = (new_fuel_amount / distance) * 100
-
-            # Új rekord beszúrása
-            self.db.execute_query('''
-                INSERT INTO fuel_consumption (
-                    vehicle_id, date, odometer_reading, fuel_amount,
-                    fuel_price, total_cost, location, full_tank,
-                    avg_consumption
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                vehicle_id,
-                self.fuel_date.date().toString('yyyy-MM-dd'),
-                new_odometer,
-                new_fuel_amount,
-                self.fuel_price.value(),
-                float(self.total_cost.text().replace(' ', '')) if self.total_cost.text() else 0,
-                self.location.text(),
-                is_full_tank,
-                avg_consumption
-            ))
+            # Az átlagfogyasztást (előző tele tanktól, a részleges tankolásokkal együtt)
+            # és a későbbi tankolásokét a FuelAnalytics számolja ugyanabban a tranzakcióban
+            record_id = self.fuel_analytics.addRecord({
+                'vehicle_id': self.fuel_vehicle_combo.currentData(),
+                'date': self.fuel_date.date().toString('yyyy-MM-dd'),
+                'odometer_reading': int(self.odometer.value()),
+                'fuel_amount': float(self.fuel_amount.value()),
+                'fuel_price': self.fuel_price.value(),
+                'total_cost': float(self.total_cost.text().replace(' ', '')) if self.total_cost.text() else 0,
+                'location': self.location.text(),
+                'full_tank': self.full_tank.isChecked(),
+            })
+            rows = self.db.execute_query(
+                "SELECT avg_consumption FROM fuel_consumption WHERE id = ?", (record_id,))
+            avg_consumption = rows[0]['avg_consumption'] if rows else None
 
             self.loadFuelRecords()
 
@@ -1520,13 +1424,7 @@ class DatabaseManager(QDialog):
             if vehicle_id is None:
                 return
             
-            previous_record = self.db.execute_query('''
-                SELECT date
-                FROM fuel_consumption 
-                WHERE vehicle_id = ? 
-                ORDER BY date DESC
-                LIMIT 1
-            ''', (vehicle_id,))
+            previous_record = self.db.execute_query(LAST_FUEL_DATE_QUERY, (vehicle_id,))
         
             if previous_record and previous_record[0]['date']:
                 try:
@@ -1545,7 +1443,7 @@ class DatabaseManager(QDialog):
 
     def loadFuelRecords(self):
         try:
-            results = self.db.execute_query('''
+            self._loadAsync('fuel', self.fuel_table, self.fuel_table.model(), '''
                 SELECT 
                     f.id,
                     v.plate_number,
@@ -1562,44 +1460,25 @@ class DatabaseManager(QDialog):
                 ORDER BY f.date DESC, f.odometer_reading DESC
             ''')
         
-            self.fuel_table.setRowCount(len(results))
-            for row, record in enumerate(results):
-                for col, value in enumerate([
-                    str(record['id']),
-                    record['plate_number'],
-                    record['date'],
-                    str(record['odometer_reading']),
-                    f"{record['fuel_amount']:.1f}",
-                    f"{record['fuel_price']:.2f}",
-                    f"{record['total_cost']:.2f}",
-                    record['location'],
-                    "Igen" if record['full_tank'] else "Nem",
-                    f"{record['avg_consumption']:.2f}" if record['avg_consumption'] else ""
-                ]):
-                    item = QTableWidgetItem(value)
-                    item.setTextAlignment(Qt.AlignCenter)
-                    self.fuel_table.setItem(row, col, item)
-                
-            self.fuel_table.resizeColumnsToContents()
-        
         except Exception as e:
             self.showError("Betöltési hiba", str(e))
 
     def deleteFuelRecord(self):
         try:
-            selected_items = self.fuel_table.selectedItems()
-            if not selected_items:
+            selected = self._selectedRecord(self.fuel_table)
+            if selected is None:
                 QMessageBox.warning(self, "Figyelmeztetés", "Kérem válasszon ki egy rekordot!")
                 return
         
-            record_id = int(self.fuel_table.item(selected_items[0].row(), 0).text())
+            record_id = selected['id']
         
             reply = QMessageBox.question(self, 'Megerősítés', 
                                        'Biztosan törli a kiválasztott rekordot?',
                                        QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
                                
             if reply == QMessageBox.Yes:
-                self.db.execute_query("DELETE FROM fuel_consumption WHERE id = ?", (record_id,))
+                # A következő tele tankolás átlagfogyasztása is frissül
+                self.fuel_analytics.deleteRecord(record_id)
                 self.loadFuelRecords()
         
         except Exception as e:
@@ -1607,37 +1486,29 @@ class DatabaseManager(QDialog):
 
     def generateFuelReport(self, vehicle_id=None, start_date=None, end_date=None):
         try:
-            query = '''
-                SELECT 
-                    v.plate_number,
-                    COUNT(*) as tankolas_szam,
-                    SUM(f.fuel_amount) as ossz_mennyiseg,
-                    SUM(f.total_cost) as ossz_koltseg,
-                    MAX(f.odometer_reading) - MIN(f.odometer_reading) as megtett_km,
-                    CASE 
-                        WHEN MAX(f.odometer_reading) - MIN(f.odometer_reading) > 0 
-                        THEN (SUM(f.fuel_amount) / (MAX(f.odometer_reading) - MIN(f.odometer_reading))) * 100
-                        ELSE 0 
-                    END as atlag_fogyasztas
-                FROM fuel_consumption f
-                JOIN vehicles v ON f.vehicle_id = v.id
-                WHERE 1=1
-            '''
-    
-            params = []
+            # A távolság és az átlagfogyasztás tele tanktól tele tankig (részleges tankolásokkal)
+            query = "SELECT id, plate_number FROM vehicles"
+            params = ()
             if vehicle_id:
-                query += " AND v.id = ?"
-                params.append(vehicle_id)
-            if start_date:
-                query += " AND f.date >= ?"
-                params.append(start_date)
-            if end_date:
-                query += " AND f.date <= ?"
-                params.append(end_date)
-        
-            query += " GROUP BY v.id, v.plate_number"
-    
-            return self.db.execute_query(query, params)
+                query += " WHERE id = ?"
+                params = (vehicle_id,)
+
+            report = []
+            for vehicle in self.db.execute_query(query, params):
+                summary = self.fuel_analytics.summary(vehicle['id'], start_date, end_date)
+                if not summary['fill_count']:
+                    continue
+                report.append({
+                    'plate_number': vehicle['plate_number'],
+                    'tankolas_szam': summary['fill_count'],
+                    'ossz_mennyiseg': summary['fuel_amount'],
+                    'ossz_koltseg': summary['total_cost'],
+                    'megtett_km': summary['distance'],
+                    'atlag_fogyasztas': summary['consumption'],
+                    'km_koltseg': summary['cost_per_km'],
+                    'elteresek': summary['anomaly_count'],
+                })
+            return report
     
         except Exception as e:
             QMessageBox.critical(self, "Hiba", f"Hiba történt a riport generálása során: {str(e)}")
@@ -1671,11 +1542,14 @@ class DatabaseManager(QDialog):
     
         filter_layout = QGridLayout()
 
-        # Date range
+        # Date range (alapértelmezés: az aktuális hónap)
         self.date_from = QDateEdit()
         self.date_to = QDateEdit()
         self.date_from.setCalendarPopup(True)
         self.date_to.setCalendarPopup(True)
+        today = QDate.currentDate()
+        self.date_from.setDate(QDate(today.year(), today.month(), 1))
+        self.date_to.setDate(QDate(today.year(), today.month(), today.daysInMonth()))
     
         filter_layout.addWidget(QLabel("Időszak:"), 0, 0)
         filter_layout.addWidget(self.date_from, 0, 1)
@@ -1694,13 +1568,44 @@ class DatabaseManager(QDialog):
         filter_layout.addWidget(QLabel("Övezet:"), 1, 4)
         filter_layout.addWidget(self.billing_zone_combo, 1, 5)
 
+        # A -1 azonosító: nincs szűrés (_billingFilters)
+        for combo, table in ((self.billing_driver_combo, 'drivers'),
+                             (self.billing_factory_combo, 'factories')):
+            combo.addItem("Összes", -1)
+            for row in self.db.execute_query(f"SELECT id, name FROM {table} ORDER BY name"):
+                combo.addItem(row['name'], row['id'])
+
         filter_frame.setLayout(filter_layout)
         layout.addWidget(filter_frame)
 
-        # Table
-        self.billing_table = QTableWidget()
+        self.date_from.dateChanged.connect(self.onBillingFiltersChanged)
+        self.date_to.dateChanged.connect(self.onBillingFiltersChanged)
+        self.billing_driver_combo.currentIndexChanged.connect(self.onBillingFiltersChanged)
+        self.billing_factory_combo.currentIndexChanged.connect(self.onBillingFiltersChanged)
+
+        # Table: tételes (loadBillingData) és összesítő (refreshBillingItems) nézet
+        huf = lambda value: f"{value:,.0f} Ft"
+        right = Qt.AlignRight | Qt.AlignVCenter
+        self.billing_table = self._createQueryView([
+            Column('delivery_date', "Dátum"), Column('driver_name', "Sofőr"),
+            Column('factory_name', "Gyár"), Column('zone_name', "Övezet"),
+            Column('delivery_number', "Szállítólevél"), Column('amount', "Mennyiség"),
+            Column(lambda r: r['amount'] * r['unit_price'] if r['amount'] and r['unit_price'] else 0,
+                   "Összeg", huf),
+            Column('address', "Cím"), Column('status', "Státusz")
+        ])
+        self.billing_detail_model = self.billing_table.model()
+        self.billing_summary_model = QueryTableModel([
+            Column('delivery_date', "Dátum"), Column('driver_name', "Sofőr"),
+            Column('factory_name', "Gyár"), Column('zone_name', "Övezet"),
+            Column('delivery_count', "Fuvarok", lambda v: f"{v:,}", right),
+            Column('total_amount', "Mennyiség", lambda v: f"{v:,.1f}", right),
+            Column('zone_price', "Egységár", huf, right),
+            Column('total_price', "Összeg", huf, right),
+            Column('status', "Státusz")
+        ], self.billing_table)
         self.billing_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 color: black;
                 gridline-color: #cccccc;
@@ -1716,9 +1621,15 @@ class DatabaseManager(QDialog):
         layout.addWidget(self.billing_table)
 
         # Bottom buttons
+        self.billing_refresh_button = QPushButton("Frissítés")
+        self.billing_refresh_button.clicked.connect(self.refreshBillingItems)
+        self.billing_export_button = QPushButton("Excel export")
+        self.billing_export_button.clicked.connect(self.exportBillingItems)
+        self.billing_mark_button = QPushButton("Számlázottnak jelöl")
+        self.billing_mark_button.clicked.connect(self.markItemsAsBilled)
+
         btn_layout = QHBoxLayout()
-        for btn_text in ["Frissítés", "Excel export", "Számlázottnak jelöl"]:
-            btn = QPushButton(btn_text)
+        for btn in (self.billing_refresh_button, self.billing_export_button, self.billing_mark_button):
             btn.setStyleSheet("""
                 QPushButton {
                     background-color: #4a90e2;
@@ -1735,127 +1646,52 @@ class DatabaseManager(QDialog):
         layout.addLayout(btn_layout)
         widget.setLayout(layout)
     
-        self.loadBillingData()
+        # Az adatok a fül első aktiválásakor töltődnek be (tab_states 'load')
         return widget
 
-    def loadBillingData(self):
-        try:
-            conditions = ["1=1"]
-            params = []
-
-            if self.date_from.date():
-                conditions.append("d.delivery_date >= ?")
-                params.append(self.date_from.date().toString('yyyy-MM-dd'))
-
-            if self.date_to.date():
-                conditions.append("d.delivery_date <= ?")
-                params.append(self.date_to.date().toString('yyyy-MM-dd'))
+    def _billingFilters(self):
+        """A számlázási szűrők WHERE feltétele és paraméterei"""
+        driver_id = self.billing_driver_combo.currentData()
+        factory_id = self.billing_factory_combo.currentData()
+        return billing_where(
+            self.date_from.date().toString('yyyy-MM-dd') if self.date_from.date() else None,
+            self.date_to.date().toString('yyyy-MM-dd') if self.date_to.date() else None,
+            None if driver_id in (None, -1) else driver_id,
+            None if factory_id in (None, -1) else factory_id
+        )
+
+    def onBillingFiltersChanged(self):
+        """Szűrőváltáskor az aktuális nézet újratöltése (a futó lekérdezés megszakad)"""
+        if self.billing_table.model() is self.billing_summary_model:
+            self.refreshBillingItems()
+        else:
+            self.loadBillingData()
 
-            if self.billing_driver_combo.currentData() != -1:
-                conditions.append("d.driver_id = ?")
-                params.append(self.billing_driver_combo.currentData())
+    def _showBillingModel(self, model):
+        """A számlázási táblázat átváltása a tételes vagy az összesítő modellre"""
+        if self.billing_table.model() is not model:
+            self.billing_table.setModel(model)
 
-            if self.billing_factory_combo.currentData() != -1:
-                conditions.append("d.factory_id = ?")
-                params.append(self.billing_factory_combo.currentData())
+    def _billingQuery(self, model):
+        """A számlázási modell (tételes vagy összesítő) lekérdezése az aktuális szűrőkkel"""
+        where, params = self._billingFilters()
+        template = BILLING_SUMMARY_QUERY if model is self.billing_summary_model else BILLING_DETAIL_QUERY
+        return template.format(where=where), params
 
-            query = f"""
-                SELECT 
-                    d.delivery_date,
-                    dr.name as driver_name,
-                    f.name as factory_name,
-                    z.zone_name,
-                    d.delivery_number,
-                    d.amount,
-                    z.price as unit_price,
-                    a.address,
-                    d.status
-                FROM deliveries d
-                LEFT JOIN drivers dr ON d.driver_id = dr.id
-                LEFT JOIN factories f ON d.factory_id = f.id
-                LEFT JOIN zone_prices z ON d.zone_id = z.id
-                LEFT JOIN addresses a ON d.address_id = a.id
-                WHERE {' AND '.join(conditions)}
-            """
-
-            deliveries = self.db.execute_query(query, params)
-
-            self.billing_table.setRowCount(len(deliveries))
-            for row, delivery in enumerate(deliveries):
-                for col, value in enumerate(delivery):
-                    if col == 6:  # Összeg számítás
-                        amount = delivery[5]
-                        price = value
-                        total = amount * price if amount and price else 0
-                        item = QTableWidgetItem(f"{total:,.0f} Ft")
-                    else:
-                        item = QTableWidgetItem(str(value if value else ""))
-                    item.setTextAlignment(Qt.AlignCenter)
-                    self.billing_table.setItem(row, col, item)
+    def loadBillingData(self):
+        try:
+            self._showBillingModel(self.billing_detail_model)
+            self._loadAsync('billing', self.billing_table, self.billing_detail_model,
+                            *self._billingQuery(self.billing_detail_model))
 
         except Exception as e:
                self.showError("Adatok betöltése sikertelen", str(e))
 
     def refreshBillingItems(self):
        try:
-           conditions = ["1=1"]
-           params = []
-       
-           if self.date_from.date():
-               conditions.append("d.delivery_date >= ?")
-               params.append(self.date_from.date().toString('yyyy-MM-dd'))
-       
-           if self.date_to.date():
-               conditions.append("d.delivery_date <= ?")
-               params.append(self.date_to.date().toString('yyyy-MM-dd'))
-       
-           if self.billing_driver_combo.currentData() != -1:
-               conditions.append("d.driver_id = ?")
-               params.append(self.billing_driver_combo.currentData())
-       
-           if self.billing_factory_combo.currentData() != -1:
-               conditions.append("d.factory_id = ?")
-               params.append(self.billing_factory_combo.currentData())
-       
-           query = """
-               SELECT 
-                   d.delivery_date,
-                   dr.name as driver_name,
-                   f.name as factory_name,
-                   z.zone_name,
-                   COUNT(*) as delivery_count,
-                   SUM(d.amount) as total_amount,
-                   z.price as zone_price,
-                   SUM(d.amount * z.price) as total_price,
-                   d.status
-               FROM deliveries d
-               JOIN drivers dr ON d.driver_id = dr.id
-               JOIN factories f ON d.factory_id = f.id
-               JOIN factory_zone_prices z ON d.zone_id = z.id
-               WHERE {}
-               GROUP BY d.delivery_date, d.driver_id, d.factory_id, d.zone_id
-               ORDER BY d.delivery_date DESC
-           """.format(" AND ".join(conditions))
-
-           rows = self.db.execute_query(query, params)
-       
-           self.billing_table.setRowCount(len(rows))
-           for i, row in enumerate(rows):
-               for j, value in enumerate(row):
-                   item = QTableWidgetItem(str(value))
-                   if isinstance(value, (int, float)) and j not in (0, 1, 2, 3, 8):
-                       item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                       if j == 6:  # Egységár
-                           item.setText(f"{value:,.0f} Ft")
-                       elif j == 7:  # Összeg
-                           item.setText(f"{value:,.0f} Ft")
-                       else:  # Mennyiségek
-                           item.setText(f"{value:,.1f}")
-                   else:
-                       item.setTextAlignment(Qt.AlignCenter)
-                   self.billing_table.setItem(i, j, item)
-
-           self.billing_table.resizeColumnsToContents()
+           self._showBillingModel(self.billing_summary_model)
+           self._loadAsync('billing', self.billing_table, self.billing_summary_model,
+                           *self._billingQuery(self.billing_summary_model))
 
        except Exception as e:
            self.showError("Adatok betöltése sikertelen", str(e))
@@ -1866,33 +1702,51 @@ class DatabaseManager(QDialog):
                 self, "Excel mentése", "", "Excel fájlok (*.xlsx)")
         
             if filename:
-                wb = Workbook()
-                ws = wb.active
-            
-                # Fejlécek
-                headers = []
-                for col in range(self.billing_table.columnCount()):
-                    headers.append(self.billing_table.horizontalHeaderItem(col).text())
-            
-                for col, header in enumerate(headers, 1):
-                    ws.cell(row=1, column=col, value=header)
-            
-                # Adatok
-                for row in range(self.billing_table.rowCount()):
-                    for col in range(self.billing_table.columnCount()):
-                        value = self.billing_table.item(row, col).text()
-                        ws.cell(row=row+2, column=col+1, value=value)
-            
-                wb.save(filename)
+                model = self.billing_table.model()
+                # Az export közvetlenül a lekérdezésből olvas lapokban (akár több évnyi
+                # tétel), nem vár a táblázat betöltésére és nem tölti be a modellbe
+                rows = (
+                    model.formatRecord(record)
+                    for batch in self.db.stream_query(*self._billingQuery(model))
+                    for record in batch
+                )
+                export_rows(filename, model.headers(), rows, sheet_title="Számlázás",
+                            header_style=PLAIN_HEADER_STYLE)
                 QMessageBox.information(self, "Siker", "Excel exportálás sikeres!")
             
         except Exception as e:
             QMessageBox.critical(self, "Hiba", f"Excel exportálási hiba: {str(e)}")
 
+    def _billingDeliveryIds(self, records):
+        """
+        A kijelölt számlázási sorok fuvar azonosítói (tételes és összesítő nézetben is).
+
+        Az összesítő sorok fuvarjai csak itt, a kijelölt sorokra kerülnek lekérdezésre.
+        """
+        ids = []
+        for record in records:
+            if 'delivery_id' in record.keys():
+                ids.append(record['delivery_id'])
+            else:
+                ids.extend(row['id'] for row in self.db.execute_query(BILLING_SUMMARY_IDS_QUERY, (
+                    record['driver_id'], record['delivery_date'], record['factory_id'],
+                    record['zone_id'], record['status'])))
+        return ids
+
+    def _currentUserId(self):
+        """A bejelentkezett felhasználó azonosítója a főablak tokenjéből (None, ha nem állapítható meg)"""
+        window = self.parent()
+        token = getattr(window, 'current_token', None)
+        auth_manager = getattr(window, 'auth_manager', None)
+        if not token or auth_manager is None:
+            return None
+        valid, payload = auth_manager.verify_token(token)
+        return payload.get('user_id') if valid else None
+
     def markItemsAsBilled(self):
        try:
-           selected_rows = set(item.row() for item in self.billing_table.selectedItems())
-           if not selected_rows:
+           selected = self._selectedRecords(self.billing_table)
+           if not selected:
                QMessageBox.warning(self, "Figyelmeztetés", "Válasszon ki tételeket!")
                return
        
@@ -1902,22 +1756,8 @@ class DatabaseManager(QDialog):
                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
        
            if reply == QMessageBox.Yes:
-               for row in selected_rows:
-                   date = self.billing_table.item(row, 0).text()
-                   driver_name = self.billing_table.item(row, 1).text()
-                   factory_name = self.billing_table.item(row, 2).text()
-                   zone_name = self.billing_table.item(row, 3).text()
-               
-                   self.db.execute_query("""
-                       UPDATE deliveries 
-                       SET status = 'billed'
-                       WHERE delivery_date = ?
-                       AND driver_id = (SELECT id FROM drivers WHERE name = ?)
-                       AND factory_id = (SELECT id FROM factories WHERE name = ?)
-                       AND zone_id = (SELECT id FROM zone_prices WHERE zone_name = ?)
-                   """, (date, driver_name, factory_name, zone_name))
-           
-               self.refreshBillingItems()
+               self.db.mark_billed(self._billingDeliveryIds(selected), self._currentUserId())
+               self.onBillingFiltersChanged()
                QMessageBox.information(self, "Siker", "Tételek sikeresen megjelölve!")
            
        except Exception as e:
@@ -1,24 +1,37 @@
 # -*- coding: utf-8 -*-
 from PySide6.QtCore import Qt, QDate
 from PySide6.QtWidgets import QTableWidget, QTableWidgetItem, QMessageBox
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import PatternFill, Border, Side, Alignment, Font
 import os
-import json
 from datetime import datetime
+from database_handler import get_database_handler
+from queries import M3_ENTRIES_MONTH_QUERY
+from zone_engine import get_zone_engine
+from timing import timed
 
 class DeliveryManager:
+    """
+    Fuvar m3 bejegyzések kezelése.
+
+    Minden beírt érték azonnal a delivery_m3_entries táblába kerül; a
+    táblázat egy cellájának kézi átírása ("6.0 + 3,5") a cella bejegyzéseit
+    cseréli le. A stored_values csak az aktuális sofőr betöltött hónapjának
+    gyorsítótára. Az Excel fájl csak export (exportDeliveryData).
+    """
+
     def __init__(self, parent=None):
         self.parent = parent
         self.delivery_table = None
         self.stored_values = {}
+        self.db = get_database_handler()
+        self.zones = get_zone_engine(self.db)
 
     def setup_delivery_table(self, table):
         self.delivery_table = table
         self.setup_headers()
-        
+        table.itemChanged.connect(self.onCellEdited)
+
     def setup_headers(self):
-        headers = ["Dátum"] + [f"Övezet {i}-{i+5}" for i in range(0, 45, 5)]
+        headers = ["Dátum"] + self.zones.zoneNames()
         self.delivery_table.setColumnCount(len(headers))
         self.delivery_table.setHorizontalHeaderLabels(headers)
 
@@ -28,34 +41,127 @@ class DeliveryManager:
             if not text:
                 QMessageBox.warning(self.parent, "Hiba", "Kérem adjon meg egy számot!")
                 return
-                
+
             value = float(text)
             if value < 0:
                 QMessageBox.warning(self.parent, "Hiba", "Kérem pozitív számot adjon meg!")
                 return
-                
-            self._store_m3_value(value)
-            self._update_display()
-            
+
+            if self._store_m3_value(value):
+                self._update_display()
+
         except ValueError:
             QMessageBox.warning(self.parent, "Hiba", "Kérem számot adjon meg (pl.: 6.0 vagy 6,0)")
 
+    def onCellEdited(self, item):
+        """Kézzel átírt övezet cella mentése (a programból kitöltött cellák nem jeleznek)"""
+        row, col = item.row(), item.column()
+        date_item = self.delivery_table.item(row, 0)
+        if col == 0 or date_item is None:
+            return
+        current_date = date_item.text()
+        zone = self.zones.zoneNames()[col - 1]
+        previous = self.stored_values.get(current_date, {}).get(zone, [])
+
+        try:
+            values = [float(part.strip().replace(',', '.'))
+                      for part in item.text().split('+') if part.strip()]
+            if any(value < 0 for value in values):
+                QMessageBox.warning(self.parent, "Hiba", "Kérem pozitív számot adjon meg!")
+                values = None
+        except ValueError:
+            QMessageBox.warning(self.parent, "Hiba", "Kérem számokat adjon meg (pl.: 6.0 + 3,5)")
+            values = None
+
+        if values is not None and values != previous \
+                and not self._replace_m3_values(current_date, zone, values):
+            values = None
+        if values is None:
+            values = previous
+        self._setCell(row, col, values)
+
+        if current_date == self.parent.date_edit.date().toString('yyyy-MM-dd') \
+                and zone == self.parent.km_combo.currentText():
+            self.updateM3Sum(current_date, zone)
+
+    def _replace_m3_values(self, current_date, zone, values):
+        """Egy nap egy övezetének bejegyzései helyett a megadott értékek, egy tranzakcióban"""
+        current_driver = self.parent.driver_combo.currentText()
+        if not current_driver:
+            QMessageBox.warning(self.parent, "Hiba", "Válasszon sofőrt!")
+            return False
+
+        try:
+            driver_id = self.db.get_driver_id(current_driver)
+            if driver_id is None:
+                QMessageBox.warning(self.parent, "Hiba", "A sofőr nem található az adatbázisban!")
+                return False
+
+            cell = (driver_id, current_date, zone)
+            with self.db.transaction():
+                self.db.execute_query("""
+                    DELETE FROM delivery_m3_entries
+                    WHERE driver_id = ? AND delivery_date = ? AND zone_name = ?
+                """, cell)
+                if values:
+                    self.db.execute_many("""
+                        INSERT INTO delivery_m3_entries (driver_id, delivery_date, zone_name, position, m3)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, [cell + (position, value) for position, value in enumerate(values)])
+
+            zones = self.stored_values.setdefault(current_date, {})
+            if values:
+                zones[zone] = values
+            else:
+                zones.pop(zone, None)
+            return True
+
+        except Exception as e:
+            QMessageBox.critical(self.parent, "Hiba", f"Mentési hiba: {str(e)}")
+            return False
+
     def _store_m3_value(self, value):
+        current_driver = self.parent.driver_combo.currentText()
+        if not current_driver:
+            QMessageBox.warning(self.parent, "Hiba", "Válasszon sofőrt!")
+            return False
+
         current_date = self.parent.date_edit.date().toString('yyyy-MM-dd')
         current_zone = self.parent.km_combo.currentText()
-        
-        if current_date not in self.stored_values:
-            self.stored_values[current_date] = {}
-            
-        if current_zone not in self.stored_values[current_date]:
-            self.stored_values[current_date][current_zone] = []
-            
-        self.stored_values[current_date][current_zone].append(value)
+
+        try:
+            driver_id = self.db.get_driver_id(current_driver)
+            if driver_id is None:
+                QMessageBox.warning(self.parent, "Hiba", "A sofőr nem található az adatbázisban!")
+                return False
+
+            # A pozíció az adatbázisból számolódik: a gyorsítótár csak az aktuális
+            # hónapot tartalmazza, és más kliens is írhatott ugyanabba a cellába
+            cell = (driver_id, current_date, current_zone)
+            with self.db.transaction():
+                self.db.execute_query("""
+                    INSERT INTO delivery_m3_entries (driver_id, delivery_date, zone_name, position, m3)
+                    VALUES (?, ?, ?, COALESCE((
+                        SELECT MAX(position) + 1 FROM delivery_m3_entries
+                        WHERE driver_id = ? AND delivery_date = ? AND zone_name = ?
+                    ), 0), ?)
+                """, cell + cell + (value,))
+                rows = self.db.execute_query("""
+                    SELECT m3 FROM delivery_m3_entries
+                    WHERE driver_id = ? AND delivery_date = ? AND zone_name = ?
+                    ORDER BY position
+                """, cell)
+            self.stored_values.setdefault(current_date, {})[current_zone] = [row['m3'] for row in rows]
+            return True
+
+        except Exception as e:
+            QMessageBox.critical(self.parent, "Hiba", f"Mentési hiba: {str(e)}")
+            return False
 
     def _update_display(self):
         self.updateDeliveryTableWithStoredValues()
         self.parent.m3_input.clear()
-        
+
         current_date = self.parent.date_edit.date().toString('yyyy-MM-dd')
         current_zone = self.parent.km_combo.currentText()
         self.updateM3Sum(current_date, current_zone)
@@ -70,107 +176,124 @@ class DeliveryManager:
             self.parent.m3_sum.setText("(0)")
 
     def getZoneColumn(self, zone_text):
+        return self.zones.column(zone_text)
+
+    @staticmethod
+    def _cellText(values):
+        return " + ".join(f"{v:.1f}" for v in values)
+
+    def _setCell(self, row, col, values):
+        # A programból írt cella nem számít kézi szerkesztésnek
+        blocked = self.delivery_table.blockSignals(True)
         try:
-            start_km = int(zone_text.split(' ')[1].split('-')[0])
-            return (start_km // 5) + 1
-        except:
-            return 0
+            item = self.delivery_table.item(row, col)
+            if item is None:
+                item = QTableWidgetItem()
+                item.setTextAlignment(Qt.AlignCenter)
+                self.delivery_table.setItem(row, col, item)
+            item.setText(self._cellText(values))
+        finally:
+            self.delivery_table.blockSignals(blocked)
+
+    def _fillRow(self, row, zones):
+        for zone, values in zones.items():
+            col = self.getZoneColumn(zone)
+            if col > 0:
+                self._setCell(row, col, values)
 
     def updateDeliveryTableWithStoredValues(self):
         current_date = self.parent.date_edit.date().toString('yyyy-MM-dd')
         if current_date in self.stored_values:
             for row in range(self.delivery_table.rowCount()):
                 if self.delivery_table.item(row, 0) and self.delivery_table.item(row, 0).text() == current_date:
-                    for zone, values in self.stored_values[current_date].items():
-                        col = self.getZoneColumn(zone)
-                        if col > 0:
-                            display_text = " + ".join(f"{v:.1f}" for v in values)
-                            new_item = QTableWidgetItem(display_text)
-                            new_item.setTextAlignment(Qt.AlignCenter)
-                            self.delivery_table.setItem(row, col, new_item)
+                    self._fillRow(row, self.stored_values[current_date])
+                    break
 
-    def saveDeliveryData(self):
+    def loadMonth(self, driver, year, month):
+        """A sofőr adott havi m3 bejegyzései: dátum -> övezet -> értékek listája"""
+        driver_id = self.db.get_driver_id(driver)
+        if driver_id is None:
+            return {}
+        first_day = QDate(year, month, 1)
+        last_day = first_day.addDays(first_day.daysInMonth() - 1)
+        rows = self.db.execute_query(M3_ENTRIES_MONTH_QUERY, (
+            driver_id, first_day.toString('yyyy-MM-dd'), last_day.toString('yyyy-MM-dd')
+        ))
+        values = {}
+        for row in rows:
+            values.setdefault(row['delivery_date'], {}).setdefault(row['zone_name'], []).append(row['m3'])
+        return values
+
+    @timed()
+    def loadDeliveryData(self, current_driver):
         try:
-            if not self.parent.driver_combo.currentText():
-                QMessageBox.warning(self.parent, "Hiba", "Válasszon sofőrt!")
-                return False
+            now = datetime.now()
+            self.stored_values = self.loadMonth(current_driver, now.year, now.month)
 
-            current_driver = self.parent.driver_combo.currentText()
-            month_dir = os.path.join('driver_records', current_driver, 
-                                   f"{datetime.now().year}_{datetime.now().month:02d}")
-            os.makedirs(month_dir, exist_ok=True)
-            
-            excel_path = os.path.join(month_dir, 'fuvar_nyilvantartas.xlsx')
-            
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Fuvar adatok"
-
-            # Headers
-            headers = ["Dátum"] + [f"Övezet {i}-{i+5}" for i in range(0, 45, 5)]
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.border = Border(
-                    left=Side(style='thin'),
-                    right=Side(style='thin'),
-                    top=Side(style='thin'),
-                    bottom=Side(style='thin')
-                )
-
-            # Data
+            # Az előző sofőr adatainak törlése, a dátum oszlop marad
             for row in range(self.delivery_table.rowCount()):
-                for col in range(self.delivery_table.columnCount()):
-                    item = self.delivery_table.item(row, col)
-                    cell = ws.cell(row=row + 2, column=col + 1)
-                    cell.value = item.text() if item else ""
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                    cell.border = Border(
-                        left=Side(style='thin'),
-                        right=Side(style='thin'),
-                        top=Side(style='thin'),
-                        bottom=Side(style='thin')
-                    )
-
-            wb.save(excel_path)
-            QMessageBox.information(self.parent, "Siker", "Fuvar adatok mentve!")
-            return True
+                for col in range(1, self.delivery_table.columnCount()):
+                    self.delivery_table.setItem(row, col, None)
+
+            for table_row in range(self.delivery_table.rowCount()):
+                table_date = self.delivery_table.item(table_row, 0)
+                if table_date and table_date.text() in self.stored_values:
+                    self._fillRow(table_row, self.stored_values[table_date.text()])
+
+            return bool(self.stored_values)
 
         except Exception as e:
-            QMessageBox.critical(self.parent, "Hiba", f"Mentési hiba: {str(e)}")
+            QMessageBox.warning(self.parent, "Hiba", f"Betöltési hiba: {str(e)}")
+            return False
+
+    def saveDeliveryData(self):
+        """A bejegyzések beíráskor mentődnek; a mentés az Excel exportot készíti el"""
+        return self.exportDeliveryData()
+
+    def exportDeliveryData(self, excel_path=None, driver=None, year=None, month=None):
+        """
+        Havi fuvar nyilvántartás exportálása Excel fájlba az adatbázisból.
+
+        Alapértelmezés: az aktuális sofőr aktuális hónapja a
+        driver_records/<sofőr>/<ÉÉÉÉ_HH>/fuvar_nyilvantartas.xlsx fájlba.
+        """
+        driver = driver or self.parent.driver_combo.currentText()
+        if not driver:
+            QMessageBox.warning(self.parent, "Hiba", "Válasszon sofőrt!")
             return False
 
-    def loadDeliveryData(self, current_driver):
         try:
-            month_dir = os.path.join('driver_records', current_driver, 
-                                   f"{datetime.now().year}_{datetime.now().month:02d}")
-            excel_path = os.path.join(month_dir, 'fuvar_nyilvantartas.xlsx')
-            
-            if not os.path.exists(excel_path):
-                return False
+            now = datetime.now()
+            year = year or now.year
+            month = month or now.month
+            if excel_path is None:
+                month_dir = os.path.join('driver_records', driver, f"{year}_{month:02d}")
+                os.makedirs(month_dir, exist_ok=True)
+                excel_path = os.path.join(month_dir, 'fuvar_nyilvantartas.xlsx')
 
-            wb = load_workbook(excel_path, data_only=True)
-            ws = wb.active
-
-            for row in range(2, ws.max_row + 1):
-                date = ws.cell(row=row, column=1).value
-                if not date:
-                    continue
-                    
-                for table_row in range(self.delivery_table.rowCount()):
-                    table_date = self.delivery_table.item(table_row, 0)
-                    if table_date and table_date.text() == str(date):
-                        for col in range(1, self.delivery_table.columnCount()):
-                            value = ws.cell(row=row, column=col+1).value
-                            if value:
-                                item = QTableWidgetItem(str(value))
-                                item.setTextAlignment(Qt.AlignCenter)
-                                self.delivery_table.setItem(table_row, col, item)
-                        break
+            stored_values = self.loadMonth(driver, year, month)
 
+            headers = ["Dátum"] + self.zones.zoneNames()
+
+            # A hónap minden napja egy sor
+            def rows():
+                first_day = QDate(year, month, 1)
+                for i in range(first_day.daysInMonth()):
+                    date_str = first_day.addDays(i).toString('yyyy-MM-dd')
+                    values = [date_str] + [""] * (len(headers) - 1)
+                    for zone, zone_values in stored_values.get(date_str, {}).items():
+                        col = self.getZoneColumn(zone)
+                        if 0 < col < len(headers):
+                            values[col] = self._cellText(zone_values)
+                    yield values
+
+            # Az openpyxl betöltése lassú, csak az első exportnál töltődik be (nem az induláskor)
+            from excel_export import export_rows, PLAIN_HEADER_STYLE, CELL_STYLE
+            export_rows(excel_path, headers, rows(), sheet_title="Fuvar adatok",
+                        header_style=PLAIN_HEADER_STYLE, cell_style=CELL_STYLE)
+            QMessageBox.information(self.parent, "Siker", f"Fuvar adatok exportálva: {excel_path}")
             return True
 
         except Exception as e:
-            QMessageBox.warning(self.parent, "Hiba", f"Betöltési hiba: {str(e)}")
-            return False
\ No newline at end of file
+            QMessageBox.critical(self.parent, "Hiba", f"Exportálási hiba: {str(e)}")
+            return False
@@ -1,5 +1,6 @@
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, 
                              QLineEdit, QPushButton, QHBoxLayout)
+from postal_code_service import get_postal_code_service, PostalCodeCompleter
 
 class DriverAddressDialog(QDialog):
     def __init__(self, parent=None):
@@ -29,6 +30,11 @@ class DriverAddressDialog(QDialog):
         
         self.door = QLineEdit()
         self.door.setPlaceholderText("pl.: 12")
+
+        # Irányítószám javaslatok és a település automatikus kitöltése
+        self.postal_codes = get_postal_code_service()
+        self.postal_completer = PostalCodeCompleter(self.zip_code, self.city, self.postal_codes)
+        self.zip_code.textChanged.connect(self.update_city)
         
         # Mezők hozzáadása
         form_layout.addRow("Irányítószám:", self.zip_code)
@@ -54,6 +60,11 @@ class DriverAddressDialog(QDialog):
         
         self.setLayout(layout)
     
+    def update_city(self):
+        cities = self.postal_codes.cities(self.zip_code.text())
+        if cities and self.city.text().strip() not in cities:
+            self.city.setText(cities[0])
+
     def get_address(self):
         """Visszaadja a formázott címet"""
         address_parts = [
@@ -1,16 +1,18 @@
 # -*- coding: utf-8 -*-
 import os
 import json
+import logging
 import shutil
 from datetime import datetime
-import sqlite3
 from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, Alignment, Border, Side
+from database_handler import get_database_handler
+from excel_export import export_rows, PLAIN_HEADER_STYLE
+from zone_engine import get_zone_engine
 
 class DriverFileManager:
     def __init__(self, base_dir="sofor_nyilvantartas"):
         self.base_dir = base_dir
-        self.conn = sqlite3.connect('fuvarok.db')
+        self.db = get_database_handler()
         self.setup_directory_structure()
 
     def setup_directory_structure(self):
@@ -20,9 +22,8 @@ class DriverFileManager:
 
     def get_drivers(self):
         """Fetch all drivers from the database"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT name FROM drivers")
-        return [driver[0] for driver in cursor.fetchall()]
+        drivers = self.db.execute_query("SELECT name FROM drivers")
+        return [driver['name'] for driver in drivers]
 
     def create_driver_folders(self):
         """Create folders for each driver with monthly subfolders"""
@@ -73,31 +74,16 @@ class DriverFileManager:
             os.makedirs(month_dir, exist_ok=True)
             excel_path = os.path.join(month_dir, 'fuvar_nyilvantartas.xlsx')
         
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Fuvar adatok"
-        
-            # Add headers
-            headers = ["Datum"]
-            headers.extend([f"Övezet {i}-{i+5}" for i in range(0, 45, 5)])
-        
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.border = Border(
-                    left=Side(style='thin'),
-                    right=Side(style='thin'),
-                    top=Side(style='thin'),
-                    bottom=Side(style='thin')
-                )
-            
+            # Add headers (az övezetek a zones táblából)
+            headers = ["Datum"] + get_zone_engine(self.db).zoneNames()
+
             # Save directly without using JSON
-            wb.save(excel_path)
+            export_rows(excel_path, headers, [], sheet_title="Fuvar adatok",
+                        header_style=PLAIN_HEADER_STYLE)
             return True
         
         except Exception as e:
-            print(f"Error organizing delivery data: {str(e)}")
+            logging.error(f"Error organizing delivery data: {str(e)}")
             return False
 
     def update_work_hours_excel(self, excel_path, data):
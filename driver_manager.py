@@ -3,13 +3,13 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QLineEdit, QPushButton, QTableWidget,
                              QTableWidgetItem, QMessageBox, QHeaderView, QFormLayout)
 from PySide6.QtCore import Qt
-from database_handler import DatabaseHandler
+from database_handler import get_database_handler
 from driver_address_dialog import DriverAddressDialog
 
 class DriverManager(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.db = DatabaseHandler()
+        self.db = get_database_handler()
         self.initUI()
         self.loadDrivers()  # Betöltjük az adatokat
 
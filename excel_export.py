@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Közös Excel export (munkaórák, fuvar adatok, számlázási tételek).
+
+A munkafüzet openpyxl write-only módban készül: a sorok egy bejárható
+forrásból (lista, generátor, kurzor) egyenként kerülnek a fájlba, így a
+memóriahasználat nem függ a sorok számától. A cellák formázása a
+munkafüzetben egyszer regisztrált elnevezett stílusokkal történik, nem
+cellánként létrehozott Font/Border objektumokkal. Az oszlopszélesség a
+fejlécből és az első width_sample sorból számolódik, a fájl újbóli
+bejárása nélkül.
+
+Példa:
+    export_rows('munkaorak.xlsx', ["Dátum", "Órák"],
+                ((row['work_date'], row['hours']) for row in rows),
+                sheet_title="Munkaórák")
+"""
+from itertools import islice
+from typing import Any, Iterable, List, Optional, Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+# Elnevezett stílusok
+HEADER_STYLE = 'fuvar_header'              # fehér félkövér szöveg kék háttéren
+PLAIN_HEADER_STYLE = 'fuvar_header_plain'  # félkövér, keretes, középre igazított
+CELL_STYLE = 'fuvar_cell'                  # keretes, középre igazított
+
+# Ennyi sorból számoljuk az oszlopszélességet
+DEFAULT_WIDTH_SAMPLE = 500
+
+MIN_COLUMN_WIDTH = 8
+MAX_COLUMN_WIDTH = 60
+
+
+def _named_styles() -> List[NamedStyle]:
+    """A stílusok munkafüzetenként új példányok (a NamedStyle egy munkafüzethez kötődik)"""
+    thin = Side(style='thin')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    return [
+        NamedStyle(
+            name=HEADER_STYLE,
+            font=Font(bold=True, color="FFFFFF"),
+            fill=PatternFill("solid", fgColor="4F81BD"),
+            border=border,
+            alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        ),
+        NamedStyle(
+            name=PLAIN_HEADER_STYLE,
+            font=Font(bold=True),
+            border=border,
+            alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        ),
+        NamedStyle(
+            name=CELL_STYLE,
+            border=border,
+            alignment=Alignment(horizontal='center', vertical='center'),
+        ),
+    ]
+
+
+def _text_width(value: Any) -> int:
+    """A cella szövegének leghosszabb sora"""
+    if value is None:
+        return 0
+    return max(len(line) for line in str(value).split('\n'))
+
+
+def column_widths(headers: Sequence[str], rows: Sequence[Sequence[Any]],
+                  min_width: int = MIN_COLUMN_WIDTH,
+                  max_width: int = MAX_COLUMN_WIDTH) -> List[float]:
+    """Oszlopszélességek a fejlécből és a minta sorokból"""
+    widths = [_text_width(header) for header in headers]
+    for row in rows:
+        for col, value in enumerate(row[:len(widths)]):
+            widths[col] = max(widths[col], _text_width(value))
+    return [min(max(width + 2, min_width), max_width) for width in widths]
+
+
+def export_rows(path: str, headers: Sequence[str], rows: Iterable[Sequence[Any]],
+                sheet_title: Optional[str] = None,
+                header_style: Optional[str] = HEADER_STYLE,
+                cell_style: Optional[str] = None,
+                width_sample: int = DEFAULT_WIDTH_SAMPLE) -> int:
+    """
+    Sorok írása egy új Excel munkafüzetbe.
+
+    Args:
+        path: A mentendő fájl elérési útja
+        headers: Fejléc szövegek
+        rows: A sorok (a forrás csak egyszer kerül bejárásra)
+        sheet_title: A munkalap neve
+        header_style: A fejléc elnevezett stílusa (None: formázatlan)
+        cell_style: Az adatcellák elnevezett stílusa (None: formázatlan, ez a leggyorsabb)
+        width_sample: Az oszlopszélesség ennyi sorból számolódik
+
+    Returns:
+        A kiírt adatsorok száma
+    """
+    wb = Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+    ws = wb.create_sheet(sheet_title)
+
+    rows = iter(rows)
+    # A szélességet az első lapból kell számolni, mert write-only módban
+    # az oszlopbeállítások csak az első sor előtt adhatók meg
+    sample = [list(row) for row in islice(rows, width_sample)]
+    for col, width in enumerate(column_widths(headers, sample), start=1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    ws.append([_styled(ws, header, header_style) for header in headers])
+
+    count = 0
+    for source in (sample, rows):
+        for row in source:
+            if cell_style:
+                row = [_styled(ws, value, cell_style) for value in row]
+            ws.append(row)
+            count += 1
+
+    wb.save(path)
+    return count
+
+
+def _styled(ws, value: Any, style: Optional[str]) -> Any:
+    if style is None:
+        return value
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Üzemanyag-fogyasztás elemzés járművenként.
+
+A fogyasztás tele tanktól tele tankig számolódik: a két tele tankolás közti
+összes (részleges) tankolás mennyisége osztva a megtett távolsággal. A
+számítás SQL ablakfüggvényekkel történik (FUEL_ANALYTICS_QUERY), mellette
+gördülő átlag az utolsó FUEL_ROLLING_SEGMENTS szakaszra, km-költség és
+eltérés jelzések (kiugró fogyasztás, ellentmondó kilométeróra állás).
+
+Az eredmény járművenként gyorsítótárba kerül. Egy tankolás módosításakor
+(recordChanged) csak az utána következő sorok számolódnak újra.
+
+A tankolásokat az addRecord / updateRecord / deleteRecord írja: ugyanabban
+a tranzakcióban a módosítás után következő tele tankolások tárolt
+átlagfogyasztása (avg_consumption) is frissül, de csak azoké, amelyek
+szakasza a módosítástól változhatott.
+
+Példa:
+    analytics = get_fuel_analytics()
+    analytics.deleteRecord(record_id)
+    for stat in analytics.vehicleStats(vehicle_id):
+        stat.consumption, stat.rolling_consumption, stat.anomalies
+"""
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from database_handler import get_database_handler
+from queries import (
+    FUEL_ANALYTICS_QUERY, FUEL_CONTEXT_START_QUERY, FUEL_NEXT_FULL_QUERY,
+    FUEL_MAX_ODOMETER, FUEL_ROLLING_SEGMENTS
+)
+
+# A gördülő átlagtól ennyivel (arányosan) eltérő fogyasztás számít kiugrónak
+ANOMALY_TOLERANCE = 0.25
+
+ANOMALY_HIGH = "magas fogyasztás"
+ANOMALY_LOW = "alacsony fogyasztás"
+ANOMALY_ODOMETER = "kilométeróra ellentmondás"
+
+
+class FuelStat(NamedTuple):
+    id: int
+    date: str
+    odometer: int
+    fuel_amount: float
+    total_cost: Optional[float]
+    full_tank: bool
+    distance: Optional[int]              # az előző tankolás óta megtett km
+    segment_distance: Optional[int]      # tele tankolásnál az előző tele tankolás óta megtett km
+    consumption: Optional[float]         # L/100km, csak szakaszt lezáró tele tankolásnál
+    cost_per_km: Optional[float]         # Ft/km a szakaszra
+    rolling_consumption: Optional[float]  # L/100km az utolsó FUEL_ROLLING_SEGMENTS szakaszra
+    anomalies: Tuple[str, ...]
+
+
+def _anomalies(row) -> Tuple[str, ...]:
+    flags = []
+    if row['distance'] is not None and (
+            row['distance'] <= 0 or (row['previous_date'] and row['previous_date'] > row['date'])):
+        flags.append(ANOMALY_ODOMETER)
+    reference = row['previous_rolling_consumption']
+    consumption = row['consumption']
+    if consumption is not None and reference:
+        if consumption > reference * (1 + ANOMALY_TOLERANCE):
+            flags.append(ANOMALY_HIGH)
+        elif consumption < reference * (1 - ANOMALY_TOLERANCE):
+            flags.append(ANOMALY_LOW)
+    return tuple(flags)
+
+
+def _stat(row) -> FuelStat:
+    return FuelStat(
+        row['id'], row['date'], row['odometer_reading'], row['fuel_amount'], row['total_cost'],
+        bool(row['full_tank']), row['distance'], row['segment_distance'], row['consumption'],
+        row['cost_per_km'], row['rolling_consumption'], _anomalies(row)
+    )
+
+
+class FuelAnalytics:
+    """Járművenként gyorsítótárazott fogyasztási statisztikák"""
+
+    def __init__(self, db=None):
+        self.db = db or get_database_handler()
+        self._stats: Dict[int, List[FuelStat]] = {}
+        # Jármű -> az a kilométeróra állás, ahonnan a tárolt sorok elavultak
+        self._stale_from: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def recordChanged(self, vehicle_id: int, odometer: Optional[int] = None) -> None:
+        """
+        Egy tankolás beszúrása, módosítása vagy törlése után hívandó.
+
+        Args:
+            vehicle_id: A jármű azonosítója
+            odometer: A módosított tankolás kilométeróra állása (áthelyezésnél
+                a régi és az új közül a kisebb); None esetén a jármű teljes
+                statisztikája elavul
+        """
+        with self._lock:
+            if vehicle_id not in self._stats:
+                return
+            if odometer is None:
+                del self._stats[vehicle_id]
+                self._stale_from.pop(vehicle_id, None)
+            else:
+                self._stale_from[vehicle_id] = min(odometer, self._stale_from.get(vehicle_id, odometer))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats = {}
+            self._stale_from = {}
+
+    def _contextStart(self, vehicle_id: int, odometer: int,
+                      segments: int = FUEL_ROLLING_SEGMENTS) -> int:
+        """Az újraszámolás kezdő kilométeróra állása a módosított állás előtt"""
+        rows = self.db.execute_query(FUEL_CONTEXT_START_QUERY, (vehicle_id, odometer, segments))
+        return rows[0]['odometer_reading'] if rows else 0
+
+    def _compute(self, vehicle_id: int, start: int = 0) -> List[FuelStat]:
+        rows = self.db.execute_query(FUEL_ANALYTICS_QUERY, (vehicle_id, start, FUEL_MAX_ODOMETER))
+        return [_stat(row) for row in rows]
+
+    def vehicleStats(self, vehicle_id: int) -> List[FuelStat]:
+        """A jármű tankolásai kilométeróra szerinti sorrendben, a számított értékekkel"""
+        with self._lock:
+            stats = self._stats.get(vehicle_id)
+            stale_from = self._stale_from.pop(vehicle_id, None)
+            if stats is None:
+                stats = self._compute(vehicle_id)
+            elif stale_from is not None:
+                # Az elavult állás előtti sorok változatlanok; utánuk a friss számítás
+                fresh = self._compute(vehicle_id, self._contextStart(vehicle_id, stale_from))
+                keep = bisect_left([stat.odometer for stat in stats], stale_from)
+                stats = stats[:keep] + [stat for stat in fresh if stat.odometer >= stale_from]
+            self._stats[vehicle_id] = stats
+            return list(stats)
+
+    def summary(self, vehicle_id: int, date_from: Optional[str] = None,
+                date_to: Optional[str] = None) -> Dict[str, float]:
+        """
+        A jármű összesített adatai egy időszakra.
+
+        A tankolások száma, mennyisége és költsége az időszak összes
+        tankolásából, a távolság és az átlagfogyasztás az időszakban lezárult
+        szakaszokból adódik.
+        """
+        fills = [stat for stat in self.vehicleStats(vehicle_id)
+                 if (not date_from or stat.date >= date_from) and (not date_to or stat.date <= date_to)]
+        closed = [stat for stat in fills if stat.consumption is not None]
+        distance = sum(stat.segment_distance for stat in closed)
+        closed_fuel = sum(stat.consumption * stat.segment_distance / 100 for stat in closed)
+        closed_cost = sum(stat.cost_per_km * stat.segment_distance
+                          for stat in closed if stat.cost_per_km is not None)
+        return {
+            'fill_count': len(fills),
+            'fuel_amount': sum(stat.fuel_amount or 0 for stat in fills),
+            'total_cost': sum(stat.total_cost or 0 for stat in fills),
+            'distance': distance,
+            'consumption': closed_fuel * 100 / distance if distance else 0,
+            'cost_per_km': closed_cost / distance if distance else 0,
+            'anomaly_count': sum(1 for stat in fills if stat.anomalies),
+        }
+
+    # --- Írás ---
+
+    def refreshStoredConsumption(self, vehicle_id: Optional[int], odometer: Optional[int]) -> int:
+        """
+        A módosított állás utáni tárolt átlagfogyasztások frissítése.
+
+        Csak az állást tartalmazó szakasz és az azt követő szakasz lezáró
+        tele tankolása változhat (ha a módosított tankolás maga is tele
+        tankolás volt, a szakaszhatár is elmozdul); az ennél későbbi
+        tankolások szakasza érintetlen. A hívó tranzakcióján belül fut.
+
+        Returns:
+            A frissített tankolások száma
+        """
+        if vehicle_id is None or odometer is None:
+            return 0
+        start = self._contextStart(vehicle_id, odometer, 0)
+        rows = self.db.execute_query(FUEL_NEXT_FULL_QUERY, (vehicle_id, odometer, 1))
+        end = rows[0]['odometer_reading'] if rows else FUEL_MAX_ODOMETER
+        updates = [
+            (row['consumption'], row['id'])
+            for row in self.db.execute_query(FUEL_ANALYTICS_QUERY, (vehicle_id, start, end))
+            if row['odometer_reading'] >= odometer and row['avg_consumption'] != row['consumption']
+        ]
+        if updates:
+            self.db.execute_many("UPDATE fuel_consumption SET avg_consumption = ? WHERE id = ?", updates)
+        return len(updates)
+
+    def _position(self, record_id: int) -> Optional[Tuple[Optional[int], Optional[int]]]:
+        rows = self.db.execute_query(
+            "SELECT vehicle_id, odometer_reading FROM fuel_consumption WHERE id = ?", (record_id,))
+        return (rows[0]['vehicle_id'], rows[0]['odometer_reading']) if rows else None
+
+    def _writeRecord(self, write, record_id: Optional[int] = None) -> Any:
+        """Írás és a tárolt átlagfogyasztások frissítése egy tranzakcióban, majd a gyorsítótár frissítése"""
+        with self.db.transaction():
+            before = self._position(record_id) if record_id is not None else None
+            result = write()
+            after = self._position(record_id if record_id is not None else result)
+            # Áthelyezésnél (más jármű vagy állás) a régi és az új hely utáni tankolások is érintettek
+            positions = {position for position in (before, after) if position}
+            for vehicle_id, odometer in positions:
+                self.refreshStoredConsumption(vehicle_id, odometer)
+        for vehicle_id, odometer in positions:
+            if vehicle_id is not None:
+                self.recordChanged(vehicle_id, odometer)
+        return result
+
+    def addRecord(self, data: Dict[str, Any]) -> int:
+        """Új tankolás; az átlagfogyasztás számított érték, a data-ban nem kell megadni"""
+        return self._writeRecord(lambda: self.db.insert_record('fuel_consumption', data))
+
+    def updateRecord(self, record_id: int, data: Dict[str, Any]) -> None:
+        self._writeRecord(lambda: self.db.update_record('fuel_consumption', data, record_id), record_id)
+
+    def deleteRecord(self, record_id: int) -> None:
+        self._writeRecord(
+            lambda: self.db.execute_query("DELETE FROM fuel_consumption WHERE id = ?", (record_id,)),
+            record_id)
+
+
+_instances: Dict[int, FuelAnalytics] = {}
+_instances_lock = threading.Lock()
+
+
+def get_fuel_analytics(db=None) -> FuelAnalytics:
+    """Adatbázis kezelőnként egyetlen, közös FuelAnalytics példány"""
+    db = db or get_database_handler()
+    with _instances_lock:
+        analytics = _instances.get(id(db))
+        if analytics is None:
+            analytics = _instances[id(db)] = FuelAnalytics(db)
+    return analytics
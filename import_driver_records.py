@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+"""
+A régi, sofőr-hónaponkénti Excel nyilvántartások betöltése az adatbázisba.
+
+A driver_records és sofor_nyilvantartas könyvtárak
+<sofőr>/<ÉÉÉÉ_HH>/<fájl>.xlsx szerkezetű fájljait olvassa be:
+
+    munkaora_nyilvantartas.xlsx -> work_hours
+    fuvar_nyilvantartas.xlsx    -> delivery_m3_entries
+    fuvar_adatok.xlsx           -> transport_records
+
+A munkafüzeteket több folyamat olvassa (openpyxl read-only módban), az
+adatbázisba írás a fő folyamatban, kötegelt tranzakciókban történik. A
+betöltött fájlok az imported_files táblába kerülnek; újrafuttatáskor a
+változatlan fájlok kimaradnak, a módosultak felülírják a korábbi sorokat.
+
+Használat:
+    python import_driver_records.py
+    python import_driver_records.py driver_records --workers 4 --force
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, time as dt_time
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from openpyxl import load_workbook
+
+from database_handler import get_database_handler
+
+DEFAULT_ROOTS = ('driver_records', 'sofor_nyilvantartas')
+
+# Fájlnév -> adatfajta
+RECORD_FILES = {
+    'munkaora_nyilvantartas.xlsx': 'work_hours',
+    'fuvar_nyilvantartas.xlsx': 'delivery',
+    'fuvar_adatok.xlsx': 'transport',
+}
+
+# Ennyi beolvasott sor után történik commit
+DEFAULT_BATCH_SIZE = 5000
+
+# A hónap könyvtárának neve (<sofőr>/<ÉÉÉÉ_HH>/)
+_MONTH_DIR_RE = re.compile(r'^(\d{4})_(\d{2})$')
+
+
+class RecordFile(NamedTuple):
+    path: str
+    driver: str
+    kind: str
+    mtime: float
+    size: int
+
+
+class ParseResult(NamedTuple):
+    file: RecordFile
+    records: List[tuple]
+    error: Optional[str]
+
+
+# --- Fájlok keresése ---
+
+def find_record_files(roots: Iterable[str]) -> List[RecordFile]:
+    """A <gyökér>/<sofőr>/.../<ismert fájlnév> fájlok listája"""
+    files = []
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                kind = RECORD_FILES.get(filename.lower())
+                if kind is None:
+                    continue
+                path = os.path.abspath(os.path.join(dirpath, filename))
+                driver = os.path.relpath(dirpath, root).split(os.sep)[0]
+                if driver in ('', '.'):
+                    continue
+                stat = os.stat(path)
+                files.append(RecordFile(path, driver, kind, stat.st_mtime, stat.st_size))
+    return sorted(files)
+
+
+# --- Cellaértékek egységesítése ---
+
+def _date(value: Any) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value.strip()[:10], '%Y-%m-%d').strftime('%Y-%m-%d')
+        except ValueError:
+            return None
+    return None
+
+
+def _time(value: Any) -> Optional[str]:
+    if isinstance(value, (datetime, dt_time)):
+        return value.strftime('%H:%M')
+    if isinstance(value, str) and value.strip():
+        text = value.strip()
+        for fmt in ('%H:%M', '%H:%M:%S'):
+            try:
+                return datetime.strptime(text, fmt).strftime('%H:%M')
+            except ValueError:
+                continue
+    return None
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value.strip():
+        try:
+            return float(value.strip().replace(',', '.'))
+        except ValueError:
+            return None
+    return None
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def _hours(start: Optional[str], end: Optional[str], value: Any) -> Optional[float]:
+    hours = _number(value)
+    if hours is None and start and end:
+        delta = datetime.strptime(end, '%H:%M') - datetime.strptime(start, '%H:%M')
+        hours = round(delta.total_seconds() / 3600.0, 2)
+    return hours
+
+
+def _padded(rows: Iterator[tuple], width: int) -> Iterator[tuple]:
+    for row in rows:
+        yield tuple(row[:width]) + (None,) * (width - len(row))
+
+
+# --- Munkafüzetek feldolgozása (a munkafolyamatokban fut) ---
+
+def _parse_work_hours(ws) -> List[tuple]:
+    """(dátum, típus, kezdés, végzés, órák) sorok a munkaóra táblázatból"""
+    records = []
+    for row in _padded(ws.iter_rows(min_row=2, values_only=True), 10):
+        work_date = _date(row[0])
+        if work_date is None:
+            continue
+        if row[2] or row[3]:
+            start, end = _time(row[2]), _time(row[3])
+            records.append((work_date, "Sima munkanap", start, end, _hours(start, end, row[4])))
+        elif row[5] or row[6]:
+            start, end = _time(row[5]), _time(row[6])
+            records.append((work_date, "Műhely nap", start, end, _hours(start, end, row[7])))
+        elif _number(row[8]):
+            records.append((work_date, "Szabadság", None, None, None))
+        elif _number(row[9]):
+            records.append((work_date, "Betegszabadság (TP)", None, None, None))
+    return records
+
+
+def _parse_delivery(ws) -> List[tuple]:
+    """(dátum, övezet, sorszám, m3) sorok a fuvar táblázat "6.0 + 4.5" formájú celláiból"""
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+    if not header:
+        return []
+    zones = [_text(name) for name in header]
+
+    records = []
+    for row in rows:
+        delivery_date = _date(row[0]) if row else None
+        if delivery_date is None:
+            continue
+        for col in range(1, min(len(row), len(zones))):
+            if zones[col] is None or row[col] is None:
+                continue
+            parts = str(row[col]).strip('() ').split('+')
+            values = [_number(part.strip('() ')) for part in parts]
+            for position, m3 in enumerate(v for v in values if v is not None):
+                records.append((delivery_date, zones[col], position, m3))
+    return records
+
+
+def _parse_transport(ws) -> List[tuple]:
+    """(dátum, fuvar azonosító, indulás, érkezés, távolság, üzemanyag) sorok"""
+    records = []
+    for row in _padded(ws.iter_rows(min_row=2, values_only=True), 6):
+        transport_date, number = _date(row[0]), _text(row[1])
+        if transport_date is None or number is None:
+            continue
+        records.append((transport_date, number, _text(row[2]), _text(row[3]),
+                        _number(row[4]), _number(row[5])))
+    return records
+
+
+_PARSERS = {
+    'work_hours': _parse_work_hours,
+    'delivery': _parse_delivery,
+    'transport': _parse_transport,
+}
+
+
+def parse_record_file(record_file: RecordFile) -> ParseResult:
+    """Egy munkafüzet beolvasása; a hibát nem dobja tovább, hanem visszaadja"""
+    try:
+        wb = load_workbook(record_file.path, read_only=True, data_only=True)
+        try:
+            records = _PARSERS[record_file.kind](wb.active)
+        finally:
+            wb.close()
+        return ParseResult(record_file, records, None)
+    except Exception as e:
+        return ParseResult(record_file, [], str(e))
+
+
+# --- Adatbázisba írás (fő folyamat) ---
+
+_UPSERTS = {
+    'work_hours': '''
+        INSERT INTO work_hours (driver_id, work_date, work_type, start_time, end_time, hours)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (driver_id, work_date) DO UPDATE SET
+            work_type = excluded.work_type,
+            start_time = excluded.start_time,
+            end_time = excluded.end_time,
+            hours = excluded.hours,
+            updated_at = CURRENT_TIMESTAMP
+    ''',
+    'delivery': '''
+        INSERT INTO delivery_m3_entries (driver_id, delivery_date, zone_name, position, m3)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (driver_id, delivery_date, zone_name, position) DO UPDATE SET
+            m3 = excluded.m3
+    ''',
+    'transport': '''
+        INSERT INTO transport_records
+            (driver_id, transport_date, transport_number, departure, arrival, distance, fuel)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (driver_id, transport_date, transport_number) DO UPDATE SET
+            departure = excluded.departure,
+            arrival = excluded.arrival,
+            distance = excluded.distance,
+            fuel = excluded.fuel
+    ''',
+}
+
+# Módosult fájl újratöltésekor a sofőr teljes hónapja újraíródik, így a
+# munkafüzetben kiürített cellák sorai is törlődnek
+_DELETE_DELIVERY_MONTH = '''
+    DELETE FROM delivery_m3_entries
+    WHERE driver_id = ? AND delivery_date BETWEEN ? AND ?
+'''
+
+
+def _record_months(result: ParseResult) -> Set[str]:
+    """A fájl hónapja(i) ÉÉÉÉ-HH alakban: a <ÉÉÉÉ_HH> könyvtárból, ennek hiányában a sorok dátumaiból"""
+    match = _MONTH_DIR_RE.match(os.path.basename(os.path.dirname(result.file.path)))
+    if match:
+        return {f"{match.group(1)}-{match.group(2)}"}
+    return {record[0][:7] for record in result.records}
+
+
+class DriverRecordImporter:
+    """Beolvasott munkafüzetek írása az adatbázisba kötegelt tranzakciókban"""
+
+    def __init__(self, db, batch_size: int = DEFAULT_BATCH_SIZE, force: bool = False):
+        self.db = db
+        self.batch_size = batch_size
+        self.force = force
+        self._driver_ids: Dict[str, Optional[int]] = {}
+        self._pending: List[Tuple[ParseResult, int]] = []
+        self._pending_rows = 0
+        self.stats = {'files': 0, 'rows': 0, 'skipped': 0, 'failed': 0, 'unknown_driver': 0}
+
+    def pending_files(self, files: List[RecordFile]) -> List[RecordFile]:
+        """A még be nem töltött vagy azóta módosult fájlok"""
+        if self.force:
+            return files
+        imported = {
+            row['path']: (row['mtime'], row['size'])
+            for row in self.db.execute_query("SELECT path, mtime, size FROM imported_files")
+        }
+        pending = [f for f in files if imported.get(f.path) != (f.mtime, f.size)]
+        self.stats['skipped'] += len(files) - len(pending)
+        return pending
+
+    def _driver_id(self, name: str) -> Optional[int]:
+        if name not in self._driver_ids:
+            self._driver_ids[name] = self.db.get_driver_id(name)
+        return self._driver_ids[name]
+
+    def add(self, result: ParseResult) -> str:
+        """Egy beolvasott fájl sorba állítása; a köteg betelésekor commit. Állapotszöveget ad vissza."""
+        if result.error:
+            self.stats['failed'] += 1
+            logging.error(f"Excel beolvasási hiba ({result.file.path}): {result.error}")
+            return f"HIBA: {result.error}"
+
+        driver_id = self._driver_id(result.file.driver)
+        if driver_id is None:
+            # Nem kerül az imported_files táblába, a sofőr felvétele után újra betölthető
+            self.stats['unknown_driver'] += 1
+            return f"ismeretlen sofőr: {result.file.driver}"
+
+        self._pending.append((result, driver_id))
+        self._pending_rows += len(result.records)
+        if self._pending_rows >= self.batch_size:
+            self.flush()
+        return f"{len(result.records)} sor"
+
+    def flush(self) -> None:
+        """A sorban álló fájlok írása egyetlen tranzakcióban"""
+        if not self._pending:
+            return
+        with self.db.transaction():
+            for result, driver_id in self._pending:
+                self._write(result, driver_id)
+        for result, _ in self._pending:
+            self.stats['files'] += 1
+            self.stats['rows'] += len(result.records)
+        self._pending = []
+        self._pending_rows = 0
+
+    def _write(self, result: ParseResult, driver_id: int) -> None:
+        record_file = result.file
+        if record_file.kind == 'delivery':
+            months = [(driver_id, f"{month}-01", f"{month}-31") for month in sorted(_record_months(result))]
+            if months:
+                self.db.execute_many(_DELETE_DELIVERY_MONTH, months)
+
+        rows = [(driver_id,) + record for record in result.records]
+        if rows:
+            self.db.execute_many(_UPSERTS[record_file.kind], rows)
+
+        self.db.execute_query('''
+            INSERT INTO imported_files (path, kind, mtime, size, row_count)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET
+                kind = excluded.kind,
+                mtime = excluded.mtime,
+                size = excluded.size,
+                row_count = excluded.row_count,
+                imported_at = CURRENT_TIMESTAMP
+        ''', (record_file.path, record_file.kind, record_file.mtime,
+              record_file.size, len(result.records)))
+
+
+def _parse_all(files: List[RecordFile], workers: int) -> Iterator[ParseResult]:
+    """A fájlok beolvasása; workers > 1 esetén folyamat poolban, befejezési sorrendben"""
+    if workers <= 1 or len(files) <= 1:
+        for record_file in files:
+            yield parse_record_file(record_file)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(parse_record_file, record_file) for record_file in files]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def import_driver_records(roots: Iterable[str] = DEFAULT_ROOTS, db=None,
+                          workers: Optional[int] = None,
+                          batch_size: int = DEFAULT_BATCH_SIZE,
+                          force: bool = False, verbose: bool = True) -> Dict[str, int]:
+    """
+    Excel nyilvántartások betöltése.
+
+    Args:
+        roots: A bejárandó gyökérkönyvtárak
+        db: DatabaseHandler példány (alapértelmezés: a közös kezelő)
+        workers: Beolvasó folyamatok száma (alapértelmezés: CPU magok száma)
+        batch_size: Ennyi sor után történik commit
+        force: A korábban már betöltött, változatlan fájlok újratöltése is
+        verbose: Fájlonkénti előrehaladás kiírása
+
+    Returns:
+        Összesítő: betöltött fájlok és sorok, kihagyott, hibás és ismeretlen sofőrű fájlok száma
+    """
+    db = db or get_database_handler()
+    importer = DriverRecordImporter(db, batch_size, force)
+    files = importer.pending_files(find_record_files(roots))
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    for done, result in enumerate(_parse_all(files, workers), start=1):
+        status = importer.add(result)
+        if verbose:
+            print(f"[{done}/{len(files)}] {result.file.path}: {status}")
+    importer.flush()
+
+    if verbose:
+        stats = importer.stats
+        print(f"Kész {time.perf_counter() - started:.1f} mp alatt: "
+              f"{stats['files']} fájl, {stats['rows']} sor betöltve; "
+              f"{stats['skipped']} változatlan, {stats['failed']} hibás, "
+              f"{stats['unknown_driver']} ismeretlen sofőr")
+    return importer.stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Régi sofőr nyilvántartások (Excel) betöltése az adatbázisba")
+    parser.add_argument('roots', nargs='*', default=list(DEFAULT_ROOTS),
+                        help="Bejárandó könyvtárak (alapértelmezés: %(default)s)")
+    parser.add_argument('--db', default='fuvarok.db', help="Adatbázis fájl")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Beolvasó folyamatok száma (alapértelmezés: CPU magok)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Ennyi sor után történik commit")
+    parser.add_argument('--force', action='store_true',
+                        help="A már betöltött, változatlan fájlok újratöltése is")
+    args = parser.parse_args(argv)
+
+    stats = import_driver_records(args.roots, get_database_handler(args.db),
+                                  args.workers, args.batch_size, args.force)
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,153 @@
-import pandas as pd
+# -*- coding: utf-8 -*-
+"""
+Irányítószám jegyzék betöltése / frissítése XLS vagy CSV fájlból.
+
+A fájl tartalma összevetésre kerül az adatbázissal, és csak a különbség
+íródik ki egyetlen tranzakcióban (új, módosult és megszűnt sorok).
+Egy irányítószámhoz több település is tartozhat, ezért a kulcs az
+(irányítószám, település) pár.
+
+Használat:
+    python load_postal_codes.py
+    python load_postal_codes.py uj_iranyitoszamok.csv --db postal_codes.db --dry-run
+"""
+import argparse
+import os
 import sqlite3
+import sys
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+# A forrásfájl oszlopai
+CODE_COLUMN = 'Irányítószám'
+CITY_COLUMN = 'Település'
+COUNTY_COLUMN = 'Megye'
+
+DEFAULT_SOURCE = 'postal_codes.xls'
+DEFAULT_DB = 'postal_codes.db'
+
+PostalKey = Tuple[str, str]
+
+
+def read_postal_codes(file_path: str) -> Dict[PostalKey, Optional[str]]:
+    """
+    A forrásfájl beolvasása.
 
-def load_postal_codes_from_xls(file_path: str, db_path: str):
-    # Beolvasás az .xls fájlból
-    df = pd.read_excel(file_path)
+    Returns:
+        (irányítószám, település) -> megye
+    """
+    if os.path.splitext(file_path)[1].lower() == '.csv':
+        df = pd.read_csv(file_path, dtype=str)
+    else:
+        df = pd.read_excel(file_path, dtype=str)
 
-    # Kapcsolódás az SQLite adatbázishoz
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    df = df[[CODE_COLUMN, CITY_COLUMN, COUNTY_COLUMN]].dropna(subset=[CODE_COLUMN, CITY_COLUMN])
+    # A számként tárolt irányítószámok ("8128.0") egységesítése
+    codes = df[CODE_COLUMN].str.strip().str.replace(r'\.0$', '', regex=True)
+    cities = df[CITY_COLUMN].str.strip()
+    counties = df[COUNTY_COLUMN].str.strip().astype(object).where(df[COUNTY_COLUMN].notna(), None)
+    return dict(zip(zip(codes, cities), counties))
 
-    # Táblázat létrehozása, ha nem létezik
-    cursor.execute('''
+
+def _ensure_table(conn: sqlite3.Connection) -> bool:
+    """
+    A postal_codes tábla létrehozása.
+
+    Returns:
+        Igaz, ha a régi (csak irányítószám kulcsú) táblát újra kellett építeni
+    """
+    columns = conn.execute("PRAGMA table_info(postal_codes)").fetchall()
+    primary_key = [column[1] for column in sorted(columns, key=lambda c: c[5]) if column[5]]
+    rebuilt = bool(columns) and primary_key != ['postal_code', 'city']
+    if rebuilt:
+        conn.execute("ALTER TABLE postal_codes RENAME TO postal_codes_old")
+
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS postal_codes (
-            postal_code TEXT PRIMARY KEY,
+            postal_code TEXT NOT NULL,
             city TEXT NOT NULL,
-            county TEXT
+            county TEXT,
+            PRIMARY KEY (postal_code, city)
         )
     ''')
-
-    # Adatok betöltése az adatbázisba
-    for _, row in df.iterrows():
-        cursor.execute('''
+    if rebuilt:
+        conn.execute('''
             INSERT OR IGNORE INTO postal_codes (postal_code, city, county)
-            VALUES (?, ?, ?)
-        ''', (row['Irányítószám'], row['Település'], row['Megye']))
+            SELECT CAST(postal_code AS TEXT), city, county FROM postal_codes_old
+        ''')
+        conn.execute("DROP TABLE postal_codes_old")
+    return rebuilt
+
+
+def load_postal_codes(file_path: str = DEFAULT_SOURCE, db_path: str = DEFAULT_DB,
+                      dry_run: bool = False) -> Dict[str, int]:
+    """
+    Az irányítószám tábla frissítése a forrásfájl alapján.
+
+    Args:
+        file_path: XLS/XLSX vagy CSV fájl (Irányítószám, Település, Megye oszlopok)
+        db_path: Az irányítószám adatbázis
+        dry_run: Csak a különbség kiszámítása, írás nélkül
+
+    Returns:
+        A beszúrt, módosított, törölt és változatlan sorok száma
+    """
+    new_rows = read_postal_codes(file_path)
+
+    # Kézi tranzakció: a tábla átépítése (DDL) is visszagörgethető legyen
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _ensure_table(conn)
+            old_rows = {
+                (code, city): county
+                for code, city, county in conn.execute(
+                    "SELECT postal_code, city, county FROM postal_codes")
+            }
 
-    # Változások mentése és kapcsolat lezárása
-    conn.commit()
-    conn.close()
+            inserts = [(code, city, county) for (code, city), county in new_rows.items()
+                       if (code, city) not in old_rows]
+            updates = [(county, code, city) for (code, city), county in new_rows.items()
+                       if (code, city) in old_rows and old_rows[(code, city)] != county]
+            deletes = [key for key in old_rows if key not in new_rows]
 
-# Használat példa
-load_postal_codes_from_xls('postal_codes.xls', 'postal_codes.db')
+            conn.executemany(
+                "DELETE FROM postal_codes WHERE postal_code = ? AND city = ?", deletes)
+            conn.executemany(
+                "UPDATE postal_codes SET county = ? WHERE postal_code = ? AND city = ?", updates)
+            conn.executemany(
+                "INSERT INTO postal_codes (postal_code, city, county) VALUES (?, ?, ?)", inserts)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("ROLLBACK" if dry_run else "COMMIT")
+    finally:
+        conn.close()
 
+    return {
+        'inserted': len(inserts),
+        'updated': len(updates),
+        'deleted': len(deletes),
+        'unchanged': len(new_rows) - len(inserts) - len(updates),
+    }
 
 
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Irányítószám jegyzék betöltése / frissítése")
+    parser.add_argument('source', nargs='?', default=DEFAULT_SOURCE,
+                        help="XLS/XLSX vagy CSV forrásfájl (alapértelmezés: %(default)s)")
+    parser.add_argument('--db', default=DEFAULT_DB, help="Irányítószám adatbázis")
+    parser.add_argument('--dry-run', action='store_true', help="Csak a különbség kiírása")
+    args = parser.parse_args(argv)
 
+    counts = load_postal_codes(args.source, args.db, args.dry_run)
+    print(f"{'(próba) ' if args.dry_run else ''}"
+          f"{counts['inserted']} új, {counts['updated']} módosult, "
+          f"{counts['deleted']} törölt, {counts['unchanged']} változatlan sor")
+    return 0
 
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,14 @@
 # -*- coding: utf-8 -*-
 from PySide6.QtWidgets import (QMenuBar, QMenu, QMessageBox, QDialog,
                               QInputDialog, QFileDialog, QTableWidgetItem)
-from PySide6.QtPrintSupport import QPrintDialog, QPrinter
 from PySide6.QtGui import QTextDocument, QTextCursor, QTextTableFormat
 from PySide6.QtCore import Qt, QTimer
 from datetime import datetime
 import os
-from openpyxl import Workbook, load_workbook
-from database_manager import DatabaseManager
 from address_manager import AddressManager
 from settings_dialog import SettingsDialog
 from theme_manager import ThemeManager
+from queries import check_query_plans
 
 class MenuBar(QMenuBar):
     def __init__(self, parent=None):
@@ -33,9 +31,13 @@ class MenuBar(QMenuBar):
         if hasattr(self.parent(), 'work_hours_manager'):
             self.parent().work_hours_manager.saveWorkHours()
 
-    def saveDelivery(self):
+    def exportWorkHours(self):
+        if hasattr(self.parent(), 'work_hours_manager'):
+            self.parent().work_hours_manager.exportWorkHours()
+
+    def exportDelivery(self):
         if hasattr(self.parent(), 'delivery_manager'):
-            self.parent().delivery_manager.saveDeliveryData()
+            self.parent().delivery_manager.exportDeliveryData()
 
     def openExcelFile(self):
         try:
@@ -64,13 +66,38 @@ class MenuBar(QMenuBar):
         address_action.triggered.connect(self.openAddressManager)
         
         fileMenu.addAction("Munkaórák mentése").triggered.connect(self.saveWorkHours)
-        fileMenu.addAction("Fuvar mentése").triggered.connect(self.saveDelivery)
+        fileMenu.addAction("Munkaórák exportálása Excel-be").triggered.connect(self.exportWorkHours)
+        fileMenu.addAction("Fuvar adatok exportálása Excel-be").triggered.connect(self.exportDelivery)
         fileMenu.addSeparator()
         fileMenu.addAction("Kilépés").triggered.connect(self.parent().close)
 
     def createDatabaseMenu(self):
         dbMenu = self.addMenu("Adatbázis")
         dbMenu.addAction("Törzsadatok kezelése").triggered.connect(self.openDatabaseManager)
+        dbMenu.addAction("Lekérdezéstervek ellenőrzése").triggered.connect(self.checkQueryPlans)
+        dbMenu.addAction("Lekérdezés statisztika").triggered.connect(self.showQueryStats)
+
+    def showQueryStats(self):
+        try:
+            from query_stats_dialog import QueryStatsDialog
+            dialog = QueryStatsDialog(self.parent().db, getattr(self.parent(), 'config_manager', None),
+                                      self.parent())
+            dialog.exec()
+        except Exception as e:
+            QMessageBox.critical(self.parent(), "Hiba", f"Hiba a statisztika megnyitásakor: {str(e)}")
+
+    def checkQueryPlans(self):
+        try:
+            problems = check_query_plans(self.parent().db)
+            if not problems:
+                QMessageBox.information(self.parent(), "Lekérdezéstervek",
+                                        "Minden ismert lekérdezés indexet használ.")
+                return
+            details = "\n".join(f"{name}: {'; '.join(scans)}" for name, scans in problems.items())
+            QMessageBox.warning(self.parent(), "Lekérdezéstervek",
+                                f"Teljes tábla-bejárást tartalmazó lekérdezések:\n\n{details}")
+        except Exception as e:
+            QMessageBox.critical(self.parent(), "Hiba", f"Ellenőrzési hiba: {str(e)}")
 
     def openExcel(self, filename):
         try:
@@ -97,6 +124,7 @@ class MenuBar(QMenuBar):
             if not os.path.exists(excel_path):
                 return
             
+            from openpyxl import load_workbook
             wb = load_workbook(excel_path)
             ws = wb.active
             
@@ -136,6 +164,8 @@ class MenuBar(QMenuBar):
 
     def openDatabaseManager(self):
         try:
+            # A törzsadat kezelő modul nagy, csak az első megnyitáskor töltődik be
+            from database_manager import DatabaseManager
             db_manager = DatabaseManager(self.parent())
             db_manager.exec()
             # DatabaseManager bezárása után frissítsük a főablak gyárlistáját
@@ -146,6 +176,7 @@ class MenuBar(QMenuBar):
 
     def printData(self):
         try:
+            from PySide6.QtPrintSupport import QPrintDialog, QPrinter
             printer = QPrinter()
             dialog = QPrintDialog(printer, self.parent())
             
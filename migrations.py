@@ -0,0 +1,602 @@
+# -*- coding: utf-8 -*-
+"""
+Verziózott sémamigrációk a fuvar adminisztrációs adatbázishoz.
+
+Minden migráció egyszer fut le, saját tranzakcióban. A lefutott verziókat a
+schema_version tábla és a PRAGMA user_version tárolja, így naprakész
+adatbázison az indításkor egyetlen PRAGMA olvasás történik, DDL nem.
+
+Új sémamódosításnál új lépést kell a MIGRATIONS lista végére felvenni;
+a meglévő lépéseket nem szabad módosítani.
+"""
+import logging
+from typing import Callable, List, Tuple
+
+
+def _table_columns(db, table: str) -> List[str]:
+    """A tábla oszlopainak nevei (üres lista, ha a tábla nem létezik)"""
+    return [row['name'] for row in db.execute_query(f"PRAGMA table_info({table})")]
+
+
+def _create_base_tables(db) -> None:
+    """Az alkalmazás összes alap táblája (a korábbi CREATE TABLE blokkok egyesítve)"""
+    # Sofőrök tábla
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS drivers (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            birth_date TEXT,
+            birth_place TEXT,
+            address TEXT,
+            mothers_name TEXT,
+            tax_number TEXT,
+            social_security_number TEXT,
+            bank_name TEXT,
+            bank_account TEXT,
+            drivers_license_number TEXT,
+            drivers_license_expiry TEXT,
+            vacation_days INTEGER DEFAULT 29,
+            used_vacation_days INTEGER DEFAULT 0
+        )
+    ''')
+
+    # Járművek tábla
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS vehicles (
+            id INTEGER PRIMARY KEY,
+            plate_number TEXT NOT NULL,
+            type TEXT,
+            brand TEXT,
+            model TEXT,
+            year_of_manufacture INTEGER,
+            chassis_number TEXT,
+            engine_number TEXT,
+            engine_type TEXT,
+            fuel_type TEXT,
+            max_weight INTEGER,
+            own_weight INTEGER,
+            payload_capacity INTEGER,
+            seats INTEGER,
+            technical_review_date TEXT,
+            tachograph_type TEXT,
+            tachograph_calibration_date TEXT,
+            fire_extinguisher_expiry TEXT
+        )
+    ''')
+
+    # Gyárak és kapcsolódó táblák
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS factories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS factory_zone_prices (
+            id INTEGER PRIMARY KEY,
+            factory_id INTEGER,
+            zone_name TEXT,
+            price INTEGER DEFAULT 0,
+            FOREIGN KEY (factory_id) REFERENCES factories(id)
+        )
+    ''')
+
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS factory_waiting_fees (
+            id INTEGER PRIMARY KEY,
+            factory_id INTEGER NOT NULL,
+            price_per_15_min INTEGER DEFAULT 0,
+            FOREIGN KEY (factory_id) REFERENCES factories(id)
+        )
+    ''')
+
+    # Címek tábla: a teljes cím szövege egyedi, a részletek opcionálisak
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS addresses (
+            id INTEGER PRIMARY KEY,
+            address TEXT NOT NULL UNIQUE,
+            price INTEGER DEFAULT 0,
+            postal_code TEXT,
+            city TEXT,
+            street TEXT,
+            house_number TEXT,
+            floor_door TEXT
+        )
+    ''')
+
+    # Fuvarok tábla
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS deliveries (
+            id INTEGER PRIMARY KEY,
+            delivery_date TEXT NOT NULL,
+            driver_id INTEGER,
+            vehicle_id INTEGER,
+            factory_id INTEGER,
+            zone_id INTEGER,
+            address_id INTEGER,
+            delivery_number TEXT NOT NULL,
+            amount REAL,
+            status TEXT DEFAULT 'pending',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (driver_id) REFERENCES drivers(id),
+            FOREIGN KEY (vehicle_id) REFERENCES vehicles(id),
+            FOREIGN KEY (factory_id) REFERENCES factories(id),
+            FOREIGN KEY (zone_id) REFERENCES factory_zone_prices(id),
+            FOREIGN KEY (address_id) REFERENCES addresses(id)
+        )
+    ''')
+
+    # Szabadság nyilvántartás
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS vacation_allowance (
+            id INTEGER PRIMARY KEY,
+            year INTEGER NOT NULL,
+            total_days INTEGER DEFAULT 29,
+            used_days INTEGER DEFAULT 0,
+            UNIQUE(year)
+        )
+    ''')
+
+    # Üzemanyag fogyasztás
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS fuel_consumption (
+            id INTEGER PRIMARY KEY,
+            vehicle_id INTEGER,
+            date TEXT,
+            odometer_reading INTEGER,
+            fuel_amount REAL,
+            fuel_price REAL,
+            total_cost REAL,
+            location TEXT,
+            full_tank BOOLEAN,
+            avg_consumption REAL,
+            FOREIGN KEY (vehicle_id) REFERENCES vehicles(id)
+        )
+    ''')
+
+    # Alkalmazottak tábla
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            birth_date TEXT,
+            birth_place TEXT,
+            address TEXT,
+            mothers_name TEXT,
+            tax_number TEXT,
+            social_security_number TEXT,
+            bank_name TEXT,
+            bank_account TEXT,
+            title TEXT,
+            vacation_days INTEGER DEFAULT 29,
+            used_vacation_days INTEGER DEFAULT 0
+        )
+    ''')
+
+    # Felhasználók és audit napló (korábban az EnhancedAuthManager hozta létre)
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP,
+            login_attempts INTEGER DEFAULT 0,
+            locked_until TIMESTAMP,
+            password_changed_at TIMESTAMP,
+            requires_password_change BOOLEAN DEFAULT FALSE
+        )
+    ''')
+
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            user_id INTEGER,
+            action TEXT NOT NULL,
+            details TEXT,
+            ip_address TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+
+
+def _rename_tachograph_column(db) -> None:
+    """A régi DatabaseHandler séma 'tachograph' oszlopa helyett 'tachograph_type'"""
+    columns = _table_columns(db, 'vehicles')
+    if 'tachograph_type' in columns:
+        return
+    if 'tachograph' in columns:
+        db.execute_query("ALTER TABLE vehicles RENAME COLUMN tachograph TO tachograph_type")
+    else:
+        db.execute_query("ALTER TABLE vehicles ADD COLUMN tachograph_type TEXT")
+
+
+def _unify_addresses(db) -> None:
+    """
+    Az addresses tábla két eltérő változatának egyesítése.
+
+    A régi DatabaseHandler séma címrészeket tárolt (address oszlop nélkül),
+    a kezelők viszont az address/price oszlopokat használják.
+    """
+    columns = _table_columns(db, 'addresses')
+    if 'address' not in columns:
+        # Tábla újraépítése: a kötelező címrészekből összeállított cím szöveggel
+        db.execute_query('''
+            CREATE TABLE addresses_new (
+                id INTEGER PRIMARY KEY,
+                address TEXT NOT NULL UNIQUE,
+                price INTEGER DEFAULT 0,
+                postal_code TEXT,
+                city TEXT,
+                street TEXT,
+                house_number TEXT,
+                floor_door TEXT
+            )
+        ''')
+        db.execute_query('''
+            INSERT OR IGNORE INTO addresses_new
+                (id, address, postal_code, city, street, house_number, floor_door)
+            SELECT id,
+                   postal_code || ' ' || city || ', ' || street || ' ' || house_number
+                       || COALESCE('/' || NULLIF(floor_door, ''), ''),
+                   postal_code, city, street, house_number, floor_door
+            FROM addresses
+        ''')
+        db.execute_query("DROP TABLE addresses")
+        db.execute_query("ALTER TABLE addresses_new RENAME TO addresses")
+        return
+
+    for column, definition in (('price', 'INTEGER DEFAULT 0'), ('postal_code', 'TEXT'),
+                               ('city', 'TEXT'), ('street', 'TEXT'),
+                               ('house_number', 'TEXT'), ('floor_door', 'TEXT')):
+        if column not in columns:
+            db.execute_query(f"ALTER TABLE addresses ADD COLUMN {column} {definition}")
+
+
+# Az egyes lépések indexei rögzített másolatként: a DatabaseHandler.MANAGED_INDEXES
+# bővülése nem változtathatja meg, mit csinál egy korábbi lépés friss adatbázison
+INDEXES_V4 = {
+    'idx_deliveries_date': ('deliveries', ('delivery_date',)),
+    'idx_deliveries_driver_date': ('deliveries', ('driver_id', 'delivery_date')),
+    'idx_deliveries_factory_date': ('deliveries', ('factory_id', 'delivery_date')),
+    'idx_deliveries_zone': ('deliveries', ('zone_id',)),
+    'idx_deliveries_status': ('deliveries', ('status',)),
+    'idx_fuel_consumption_vehicle_date': ('fuel_consumption', ('vehicle_id', 'date')),
+    'idx_factory_zone_prices_factory': ('factory_zone_prices', ('factory_id', 'zone_name')),
+}
+
+INDEXES_V10 = {
+    'idx_fuel_consumption_vehicle_odometer': ('fuel_consumption', ('vehicle_id', 'odometer_reading')),
+}
+
+
+def _create_managed_indexes(db) -> None:
+    """A kezelt indexek első készletének létrehozása"""
+    db.ensure_indexes(INDEXES_V4)
+
+
+def _create_driver_record_tables(db) -> None:
+    """Munkaórák és m3 bejegyzések (korábban sofőr-hónaponkénti Excel fájlokban)"""
+    # Sofőrönként és naponként egy munkaidő bejegyzés (a munkaóra táblázat egy sora)
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS work_hours (
+            id INTEGER PRIMARY KEY,
+            driver_id INTEGER NOT NULL,
+            work_date TEXT NOT NULL,
+            work_type TEXT NOT NULL,
+            start_time TEXT,
+            end_time TEXT,
+            hours REAL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (driver_id, work_date),
+            FOREIGN KEY (driver_id) REFERENCES drivers(id)
+        )
+    ''')
+
+    # A fuvar táblázat cellái: naponként és övezetenként a beírt m3 értékek sorrendben
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS delivery_m3_entries (
+            id INTEGER PRIMARY KEY,
+            driver_id INTEGER NOT NULL,
+            delivery_date TEXT NOT NULL,
+            zone_name TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            m3 REAL NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (driver_id, delivery_date, zone_name, position),
+            FOREIGN KEY (driver_id) REFERENCES drivers(id)
+        )
+    ''')
+
+
+def _create_import_tables(db) -> None:
+    """Fuvar adatok (fuvar_adatok.xlsx) tábla és az Excel import nyilvántartása"""
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS transport_records (
+            id INTEGER PRIMARY KEY,
+            driver_id INTEGER NOT NULL,
+            transport_date TEXT NOT NULL,
+            transport_number TEXT NOT NULL,
+            departure TEXT,
+            arrival TEXT,
+            distance REAL,
+            fuel REAL,
+            UNIQUE (driver_id, transport_date, transport_number),
+            FOREIGN KEY (driver_id) REFERENCES drivers(id)
+        )
+    ''')
+
+    # Már betöltött fájlok: változatlan méret és módosítási idő esetén az import kihagyja
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS imported_files (
+            path TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            imported_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _create_address_search_index(db) -> None:
+    """
+    Teljes szöveges keresőindex az addresses.address oszlopra.
+
+    Az unicode61 tokenizáló remove_diacritics 2 beállítása az ő/ű betűket
+    is ékezet nélkülire alakítja, így a "szolo" keresés a "Szőlő utca"
+    címet is megtalálja. Az index a triggerek révén követi a tábla változásait.
+    """
+    db.execute_query('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS addresses_fts USING fts5(
+            address,
+            content='addresses',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    ''')
+    db.execute_query('''
+        CREATE TRIGGER IF NOT EXISTS addresses_fts_insert AFTER INSERT ON addresses BEGIN
+            INSERT INTO addresses_fts (rowid, address) VALUES (new.id, new.address);
+        END
+    ''')
+    db.execute_query('''
+        CREATE TRIGGER IF NOT EXISTS addresses_fts_delete AFTER DELETE ON addresses BEGIN
+            INSERT INTO addresses_fts (addresses_fts, rowid, address) VALUES ('delete', old.id, old.address);
+        END
+    ''')
+    db.execute_query('''
+        CREATE TRIGGER IF NOT EXISTS addresses_fts_update AFTER UPDATE OF address ON addresses BEGIN
+            INSERT INTO addresses_fts (addresses_fts, rowid, address) VALUES ('delete', old.id, old.address);
+            INSERT INTO addresses_fts (rowid, address) VALUES (new.id, new.address);
+        END
+    ''')
+    # A meglévő címek indexelése
+    db.execute_query("INSERT INTO addresses_fts (addresses_fts) VALUES ('rebuild')")
+
+
+def _create_zones(db) -> None:
+    """
+    Övezetek táblája numerikus km határokkal.
+
+    Korábban az övezetek csak "Övezet 0-5" ... "Övezet 45-50" szövegként
+    léteztek, a határokat minden használatkor a névből kellett kiolvasni.
+    """
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS zones (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            min_km REAL NOT NULL,
+            max_km REAL NOT NULL,
+            CHECK (min_km < max_km)
+        )
+    ''')
+    db.execute_many(
+        "INSERT OR IGNORE INTO zones (name, min_km, max_km) VALUES (?, ?, ?)",
+        [(f"Övezet {km}-{km + 5}", km, km + 5) for km in range(0, 50, 5)]
+    )
+
+
+# A billing_daily_summary kulcsa; csak a sofőrrel, gyárral és övezettel rendelkező fuvarok számítanak
+_SUMMARY_KEY = "delivery_date, driver_id, factory_id, zone_id, status"
+_SUMMARY_WHEN = "{row}.driver_id IS NOT NULL AND {row}.factory_id IS NOT NULL AND {row}.zone_id IS NOT NULL"
+
+
+def _summary_add(row: str, sign: str) -> str:
+    """Egy fuvar hozzáadása (+) vagy levonása (-) a napi összesítőben"""
+    return f'''
+        INSERT INTO billing_daily_summary ({_SUMMARY_KEY}, delivery_count, total_amount)
+        VALUES ({row}.delivery_date, {row}.driver_id, {row}.factory_id, {row}.zone_id,
+                COALESCE({row}.status, 'pending'), {sign}1, {sign}COALESCE({row}.amount, 0))
+        ON CONFLICT ({_SUMMARY_KEY}) DO UPDATE SET
+            delivery_count = delivery_count + excluded.delivery_count,
+            total_amount = total_amount + excluded.total_amount;
+    '''
+
+
+def _summary_cleanup(row: str) -> str:
+    """A kiürült összesítő sor törlése"""
+    return f'''
+        DELETE FROM billing_daily_summary
+        WHERE delivery_date = {row}.delivery_date AND driver_id = {row}.driver_id
+          AND factory_id = {row}.factory_id AND zone_id = {row}.zone_id
+          AND status = COALESCE({row}.status, 'pending') AND delivery_count <= 0;
+    '''
+
+
+def _create_billing_summary(db) -> None:
+    """
+    Napi számlázási összesítő (nap, sofőr, gyár, övezet, státusz szerint).
+
+    A sorokat a deliveries tábla triggerei tartják naprakészen, így a
+    számlázási összesítő nézet nem a teljes fuvar táblát csoportosítja.
+    Az összeg (mennyiség * egységár) olvasáskor számolódik, mert az övezeti
+    díj utólag is módosulhat.
+    """
+    db.execute_query(f'''
+        CREATE TABLE IF NOT EXISTS billing_daily_summary (
+            delivery_date TEXT NOT NULL,
+            driver_id INTEGER NOT NULL,
+            factory_id INTEGER NOT NULL,
+            zone_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            delivery_count INTEGER NOT NULL,
+            total_amount REAL NOT NULL,
+            PRIMARY KEY ({_SUMMARY_KEY})
+        )
+    ''')
+
+    new_when = _SUMMARY_WHEN.format(row='new')
+    old_when = _SUMMARY_WHEN.format(row='old')
+    db.execute_query(f'''
+        CREATE TRIGGER IF NOT EXISTS billing_summary_insert
+        AFTER INSERT ON deliveries WHEN {new_when}
+        BEGIN {_summary_add('new', '+')} END
+    ''')
+    db.execute_query(f'''
+        CREATE TRIGGER IF NOT EXISTS billing_summary_delete
+        AFTER DELETE ON deliveries WHEN {old_when}
+        BEGIN {_summary_add('old', '-')} {_summary_cleanup('old')} END
+    ''')
+    # Módosításkor a régi sor levonása és az új hozzáadása (külön triggerben, mert a WHEN eltérhet)
+    db.execute_query(f'''
+        CREATE TRIGGER IF NOT EXISTS billing_summary_update_old
+        AFTER UPDATE OF {_SUMMARY_KEY}, amount ON deliveries WHEN {old_when}
+        BEGIN {_summary_add('old', '-')} {_summary_cleanup('old')} END
+    ''')
+    db.execute_query(f'''
+        CREATE TRIGGER IF NOT EXISTS billing_summary_update_new
+        AFTER UPDATE OF {_SUMMARY_KEY}, amount ON deliveries WHEN {new_when}
+        BEGIN {_summary_add('new', '+')} END
+    ''')
+
+    # A meglévő fuvarok összesítése
+    db.execute_query("DELETE FROM billing_daily_summary")
+    db.execute_query(f'''
+        INSERT INTO billing_daily_summary ({_SUMMARY_KEY}, delivery_count, total_amount)
+        SELECT delivery_date, driver_id, factory_id, zone_id, COALESCE(status, 'pending'),
+               COUNT(*), SUM(COALESCE(amount, 0))
+        FROM deliveries
+        WHERE {_SUMMARY_WHEN.format(row='deliveries')}
+        GROUP BY delivery_date, driver_id, factory_id, zone_id, COALESCE(status, 'pending')
+    ''')
+
+
+def _create_fuel_odometer_index(db) -> None:
+    """fuel_consumption (vehicle_id, odometer_reading) index a fogyasztás elemzéshez"""
+    db.ensure_indexes(INDEXES_V10)
+
+
+# A 11. lépés fogyasztás számítása rögzített másolatként (a queries.FUEL_ANALYTICS_QUERY
+# 11. verziókori állapota, csak a szükséges oszlopokkal): a lekérdezés későbbi
+# módosítása nem változtathatja meg, mit csinál a lépés friss adatbázison
+FUEL_CONSUMPTION_V11 = """
+    WITH fills AS (
+        SELECT id, odometer_reading, date, fuel_amount, full_tank, avg_consumption,
+               COALESCE(SUM(CASE WHEN full_tank THEN 1 ELSE 0 END) OVER earlier, 0) AS segment,
+               MAX(CASE WHEN full_tank THEN odometer_reading END) OVER earlier AS previous_full_odometer
+        FROM fuel_consumption
+        WHERE vehicle_id = ?
+        WINDOW ordered AS (ORDER BY odometer_reading, date, id),
+               earlier AS (ordered ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)
+    ),
+    segments AS (
+        SELECT *,
+               CASE WHEN full_tank AND odometer_reading > previous_full_odometer
+                    THEN odometer_reading - previous_full_odometer END AS segment_distance
+        FROM fills
+    )
+    SELECT id, avg_consumption,
+           SUM(fuel_amount) OVER in_segment * 100.0 / segment_distance AS consumption
+    FROM segments
+    WINDOW in_segment AS (PARTITION BY segment ORDER BY odometer_reading, date, id)
+    ORDER BY odometer_reading, date, id
+"""
+
+
+def _recompute_fuel_consumption(db) -> None:
+    """
+    A tárolt átlagfogyasztás újraszámolása tele tanktól tele tankig.
+
+    Korábban csak az előző tele tankolás és az aktuális tankolás mennyisége
+    számított (a részleges tankolások kimaradtak), és törléskor a következő
+    tankolás értéke elavult.
+    """
+    vehicles = db.execute_query(
+        "SELECT DISTINCT vehicle_id FROM fuel_consumption WHERE vehicle_id IS NOT NULL")
+    for vehicle in vehicles:
+        rows = db.execute_query(FUEL_CONSUMPTION_V11, (vehicle['vehicle_id'],))
+        updates = [(row['consumption'], row['id']) for row in rows
+                   if row['avg_consumption'] != row['consumption']]
+        if updates:
+            db.execute_many("UPDATE fuel_consumption SET avg_consumption = ? WHERE id = ?", updates)
+
+
+# (verzió, leírás, migráló függvény) - szigorúan növekvő verziószámmal
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "Alap táblák", _create_base_tables),
+    (2, "vehicles.tachograph átnevezése tachograph_type-ra", _rename_tachograph_column),
+    (3, "addresses tábla egységesítése", _unify_addresses),
+    (4, "Kezelt indexek", _create_managed_indexes),
+    (5, "work_hours és delivery_m3_entries táblák", _create_driver_record_tables),
+    (6, "transport_records és imported_files táblák", _create_import_tables),
+    (7, "addresses_fts címkereső index", _create_address_search_index),
+    (8, "zones tábla", _create_zones),
+    (9, "billing_daily_summary napi számlázási összesítő", _create_billing_summary),
+    (10, "Kezelt indexek: fuel_consumption kilométeróra index", _create_fuel_odometer_index),
+    (11, "fuel_consumption.avg_consumption újraszámolása", _recompute_fuel_consumption),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(db) -> int:
+    """Az adatbázis sémaverziója (PRAGMA user_version)"""
+    return db.execute_query("PRAGMA user_version")[0][0]
+
+
+def run_migrations(db) -> int:
+    """
+    A függőben lévő migrációk futtatása.
+
+    Args:
+        db: DatabaseHandler példány
+
+    Returns:
+        Az adatbázis sémaverziója a futtatás után
+    """
+    version = current_version(db)
+    pending = [migration for migration in MIGRATIONS if migration[0] > version]
+    if not pending:
+        return version
+
+    db.execute_query('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    for number, description, migrate in pending:
+        try:
+            with db.transaction():
+                migrate(db)
+                db.execute_query(
+                    "INSERT OR REPLACE INTO schema_version (version, description) VALUES (?, ?)",
+                    (number, description)
+                )
+                # A PRAGMA nem paraméterezhető; a verziószám saját egész konstans
+                db.execute_query(f"PRAGMA user_version = {int(number)}")
+            logging.info(f"Sémamigráció lefutott: {number} - {description}")
+        except Exception as e:
+            logging.error(f"Sémamigrációs hiba ({number} - {description}): {str(e)}")
+            raise
+        version = number
+
+    return version
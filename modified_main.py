@@ -6,7 +6,6 @@ from PySide6.QtWidgets import (
     QApplication, QMessageBox, QDialog, QColorDialog, QFontDialog
 )
 from PySide6.QtCore import Qt, QDate, QTime, QTimer
-from PySide6.QtPrintSupport import QPrintDialog, QPrinter
 import sys
 import sqlite3
 import os
@@ -15,36 +14,60 @@ from datetime import datetime
 from work_hours_manager import WorkHoursManager
 from delivery_manager import DeliveryManager 
 from vacation_manager import VacationManager
-from database_manager import DatabaseManager
-from database_handler import DatabaseHandler
-from driver_file_manager import DriverFileManager
+from database_handler import get_database_handler
 from menu_manager import MenuBar
 from ui_manager import UIManager
 from security.enhanced_auth import EnhancedAuthManager  # Új import
 from security.login_dialog import LoginDialog
 from settings_dialog import SettingsDialog
 from config_manager import ConfigManager
+from address_search import AddressCompleter
+from zone_engine import get_zone_engine
+from timing import configure as configure_timing, span, timed
+
+
+# A cím legördülő listájában ennyi legutóbb felvett cím jelenik meg
+RECENT_ADDRESS_LIMIT = 50
 
 
 class FuvarAdminApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, auth_manager=None, token=None):
+        """
+        Args:
+            auth_manager: A bejelentkezéshez már használt hitelesítés kezelő
+            token: A sikeres bejelentkezés tokenje; None esetén az ablak maga kéri be
+                a bejelentkezést (a run.py a főablak moduljainak betöltése előtt teszi ezt)
+        """
         super().__init__()
-        self.db = DatabaseHandler('fuvarok.db')
-        self.auth_manager = EnhancedAuthManager(self.db)
         self.config_manager = ConfigManager()
-        
-        if not self.show_login():
-            sys.exit()
-            
-        self.initManagers()
-        self.initUI()
-        self.setupConnections()
-        self.loadInitialData()
-        # Alapértelmezett beállítások alkalmazása
-        self.applySettings()
+        configure_timing(self.config_manager)
+        self.db = self.config_manager.open_database()
+        self.auth_manager = auth_manager or EnhancedAuthManager(self.db)
 
-        # Teljes képernyős mód
-        self.showFullScreen()
+        if token is not None:
+            self.current_token = token
+        else:
+            with span('startup.login'):
+                logged_in = self.show_login()
+            if not logged_in:
+                sys.exit()
+
+        # Az indulási lépések ideje (a config.json timing_enabled beállításával)
+        with span('startup.mainWindow'):
+            with span('startup.initManagers'):
+                self.initManagers()
+            with span('startup.initUI'):
+                self.initUI()
+            with span('startup.setupConnections'):
+                self.setupConnections()
+            with span('startup.loadInitialData'):
+                self.loadInitialData()
+            # Alapértelmezett beállítások alkalmazása
+            with span('startup.applySettings'):
+                self.applySettings()
+
+            # Teljes képernyős mód
+            self.showFullScreen()
 
     def show_login(self):
         login_dialog = LoginDialog(self.auth_manager, self)
@@ -134,12 +157,27 @@ class FuvarAdminApp(QMainWindow):
         self.delivery_manager = DeliveryManager(self)
         self.vacation_manager = VacationManager(self)
         self.ui_manager = UIManager(self)
-        self.database_manager = DatabaseManager(self)
-        self.driver_file_manager = DriverFileManager()
+        # A törzsadat kezelő és a sofőr fájl kezelő az első használatkor jön létre
+        self._database_manager = None
+        self._driver_file_manager = None
         
         # Sofőr mappák létrehozása
         os.makedirs('driver_records', exist_ok=True)
 
+    @property
+    def database_manager(self):
+        if self._database_manager is None:
+            from database_manager import DatabaseManager
+            self._database_manager = DatabaseManager(self)
+        return self._database_manager
+
+    @property
+    def driver_file_manager(self):
+        if self._driver_file_manager is None:
+            from driver_file_manager import DriverFileManager
+            self._driver_file_manager = DriverFileManager()
+        return self._driver_file_manager
+
     def initUI(self):
         # UI előkészítése
         self.setWindowTitle("Fuvar Adminisztráció")
@@ -197,9 +235,12 @@ class FuvarAdminApp(QMainWindow):
             "Betegszabadság (TP)"
         ])
         
-        self.km_combo.addItems([
-            f"Övezet {i}-{i+5}" for i in range(0, 50, 5)
-        ])
+        self.km_combo.addItems(get_zone_engine(self.db).zoneNames())
+
+        # A teljes címjegyzékben beírás közben keresünk, a lista csak a legutóbbi címeket tartalmazza
+        self.address_combo.setEditable(True)
+        self.address_combo.setInsertPolicy(QComboBox.NoInsert)
+        self.address_completer = AddressCompleter(self.address_combo.lineEdit(), self.db)
 
     def setupConnections(self):
         self.driver_combo.currentTextChanged.connect(self.onDriverChanged)
@@ -211,8 +252,10 @@ class FuvarAdminApp(QMainWindow):
         self.loadVehicles()
         self.loadFactories()
         self.loadAddresses()
-        self.vacation_manager.updateVacationDisplay()
+        with span('VacationManager.updateVacationDisplay'):
+            self.vacation_manager.updateVacationDisplay()
 
+    @timed()
     def loadDrivers(self):
         try:
             drivers = self.db.execute_query("SELECT name FROM drivers ORDER BY name")
@@ -221,6 +264,7 @@ class FuvarAdminApp(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Hiba", f"Sofőrök betöltési hiba: {str(e)}")
 
+    @timed()
     def loadVehicles(self):
         try:
             vehicles = self.db.execute_query("SELECT plate_number FROM vehicles ORDER BY plate_number")
@@ -229,6 +273,7 @@ class FuvarAdminApp(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Hiba", f"Járművek betöltési hiba: {str(e)}")
 
+    @timed()
     def loadFactories(self):
         try:
             factories = self.db.load_factories()
@@ -237,9 +282,11 @@ class FuvarAdminApp(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Hiba", f"Gyárak betöltési hiba: {str(e)}")
 
+    @timed()
     def loadAddresses(self):
         try:
-            addresses = self.db.execute_query("SELECT address FROM addresses ORDER BY address")
+            addresses = self.db.execute_query(
+                "SELECT address FROM addresses ORDER BY id DESC LIMIT ?", (RECENT_ADDRESS_LIMIT,))
             self.address_combo.clear()
             self.address_combo.addItems([addr['address'] for addr in addresses])
         except Exception as e:
@@ -260,8 +307,8 @@ class FuvarAdminApp(QMainWindow):
         if hasattr(self, 'work_hours_manager'):
             self.work_hours_manager.saveWorkHours()
         
-        # Remove direct sqlite connection, use DatabaseHandler instead
-        self.db = DatabaseHandler()
+        # A közös DatabaseHandler példányt használjuk, nem nyitunk új kapcsolatot
+        self.db = get_database_handler()
         self.initManagers()
         self.initUI()
         self.setupConnections()
@@ -272,6 +319,13 @@ class FuvarAdminApp(QMainWindow):
             self.delivery_manager.saveDeliveryData()
         # További exportálási logika itt
 
+    def closeEvent(self, event):
+        # A még ki nem írt havi munkaóra munkafüzetek mentése kilépés előtt,
+        # a már futó háttér tömörítést is megvárva
+        if hasattr(self, 'work_hours_manager'):
+            self.work_hours_manager.compactWorkbooks(wait=True)
+        super().closeEvent(event)
+
 
 
 
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Irányítószám -> település keresés a címbeviteli dialógusokhoz.
+
+A postal_codes.db tartalma folyamatonként egyszer, az első használatkor
+töltődik a memóriába: a teljes irányítószámhoz szótár, a részleges
+beíráshoz (pl. "81") rendezett irányítószám lista ad javaslatokat.
+Egy irányítószámhoz több település is tartozhat.
+
+Példa:
+    service = get_postal_code_service()
+    service.city("8128")        # 'Aba'
+    service.complete("812")     # [('8121', 'Tác'), ('8122', ...), ...]
+"""
+import logging
+import os
+import sqlite3
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QModelIndex, Qt
+from PySide6.QtGui import QStandardItem, QStandardItemModel
+from PySide6.QtWidgets import QCompleter
+
+DEFAULT_POSTAL_DB = 'postal_codes.db'
+
+# Ennyi javaslat jelenik meg legfeljebb
+DEFAULT_COMPLETION_LIMIT = 20
+
+_CODE_ROLE = Qt.UserRole
+_CITY_ROLE = Qt.UserRole + 1
+
+
+class PostalCodeService:
+    """Memóriában tartott irányítószám jegyzék"""
+
+    def __init__(self, db_path: str = DEFAULT_POSTAL_DB):
+        self.db_path = db_path
+        self._cities: Dict[str, Tuple[str, ...]] = {}
+        self._codes: List[str] = []
+        self.reload()
+
+    def reload(self) -> None:
+        """A jegyzék (újra)olvasása az adatbázisból"""
+        cities: Dict[str, List[str]] = {}
+        if os.path.exists(self.db_path):
+            try:
+                conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+                try:
+                    rows = conn.execute(
+                        "SELECT postal_code, city FROM postal_codes ORDER BY postal_code, city"
+                    ).fetchall()
+                finally:
+                    conn.close()
+                for code, city in rows:
+                    cities.setdefault(str(code).strip(), []).append(city)
+            except sqlite3.Error as e:
+                logging.error(f"Irányítószám jegyzék betöltési hiba: {str(e)}")
+        else:
+            logging.warning(f"Az irányítószám adatbázis nem található: {self.db_path}")
+
+        self._cities = {code: tuple(names) for code, names in cities.items()}
+        self._codes = sorted(self._cities)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def city(self, postal_code: str) -> str:
+        """Az irányítószámhoz tartozó (első) település, ismeretlen kódnál üres szöveg"""
+        names = self._cities.get(postal_code.strip())
+        return names[0] if names else ""
+
+    def cities(self, postal_code: str) -> Tuple[str, ...]:
+        """Az irányítószámhoz tartozó összes település"""
+        return self._cities.get(postal_code.strip(), ())
+
+    def complete(self, prefix: str, limit: int = DEFAULT_COMPLETION_LIMIT) -> List[Tuple[str, str]]:
+        """(irányítószám, település) javaslatok a megadott kezdetű irányítószámokhoz"""
+        prefix = prefix.strip()
+        if not prefix:
+            return []
+        result = []
+        for i in range(bisect_left(self._codes, prefix), len(self._codes)):
+            code = self._codes[i]
+            if not code.startswith(prefix):
+                break
+            for name in self._cities[code]:
+                result.append((code, name))
+                if len(result) >= limit:
+                    return result
+        return result
+
+
+_services: Dict[str, PostalCodeService] = {}
+_services_lock = threading.Lock()
+
+
+def get_postal_code_service(db_path: str = DEFAULT_POSTAL_DB) -> PostalCodeService:
+    """Folyamatonként egyetlen, közös PostalCodeService példány"""
+    key = os.path.abspath(db_path)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = PostalCodeService(db_path)
+    return service
+
+
+class PostalCodeCompleter(QCompleter):
+    """
+    Irányítószám mező kiegészítője: beírás közben "1234 Település" javaslatokat
+    mutat, kiválasztáskor az irányítószám és a település mezőt is kitölti.
+    A teljes irányítószámból a település kitöltése a dialógus feladata.
+    """
+
+    def __init__(self, postal_edit, city_edit, service: Optional[PostalCodeService] = None,
+                 limit: int = DEFAULT_COMPLETION_LIMIT):
+        super().__init__(postal_edit)
+        self.postal_edit = postal_edit
+        self.city_edit = city_edit
+        self.service = service or get_postal_code_service()
+        self.limit = limit
+
+        self.completion_model = QStandardItemModel(self)
+        self.setModel(self.completion_model)
+        # A szűrés és a mezőbe írt érték az irányítószám, a lista a települést is mutatja
+        self.setCompletionRole(_CODE_ROLE)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+
+        postal_edit.setCompleter(self)
+        postal_edit.textEdited.connect(self.updateSuggestions)
+        self.activated[QModelIndex].connect(self.onActivated)
+
+    def updateSuggestions(self, text: str) -> None:
+        self.completion_model.clear()
+        for code, city in self.service.complete(text, self.limit):
+            item = QStandardItem(f"{code} {city}")
+            item.setData(code, _CODE_ROLE)
+            item.setData(city, _CITY_ROLE)
+            self.completion_model.appendRow(item)
+
+    def onActivated(self, index: QModelIndex) -> None:
+        # Több településes irányítószámnál a kiválasztott település kerül a mezőbe
+        self.city_edit.setText(index.data(_CITY_ROLE) or "")
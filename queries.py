@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+Az alkalmazás ismert, teljesítmény szempontjából fontos lekérdezései.
+
+A lekérdezések itt egy helyen vannak, hogy a kezelők ugyanazt az SQL-t
+használják, amelyet a lekérdezésterv-ellenőrzés (check_query_plans) vizsgál.
+Futtatás parancssorból:
+
+    python queries.py [adatbázis.db]
+
+A kimenet felsorolja a teljes tábla-bejárást (SCAN) tartalmazó terveket;
+talált hiba esetén a kilépési kód 1.
+"""
+import sys
+from typing import Dict, List, Tuple, Any
+
+# Számlázás: egy sor fuvaronként ({where} helyére a szűrőfeltételek kerülnek)
+BILLING_DETAIL_QUERY = """
+    SELECT
+        d.id as delivery_id,
+        d.delivery_date,
+        dr.name as driver_name,
+        f.name as factory_name,
+        z.zone_name,
+        d.delivery_number,
+        d.amount,
+        z.price as unit_price,
+        a.address,
+        d.status
+    FROM deliveries d
+    LEFT JOIN drivers dr ON d.driver_id = dr.id
+    LEFT JOIN factories f ON d.factory_id = f.id
+    LEFT JOIN factory_zone_prices z ON d.zone_id = z.id
+    LEFT JOIN addresses a ON d.address_id = a.id
+    WHERE {where}
+"""
+
+# Számlázás: napi összesítés sofőr, gyár, övezet és státusz szerint, a triggerekkel
+# karbantartott billing_daily_summary táblából (a billing_where miatt is "d" az álnév).
+# A fuvarok nem kerülnek beolvasásra; azonosítóikat a BILLING_SUMMARY_IDS_QUERY adja
+# a kijelölt sorokhoz.
+BILLING_SUMMARY_QUERY = """
+    SELECT
+        d.delivery_date,
+        d.driver_id,
+        d.factory_id,
+        d.zone_id,
+        dr.name as driver_name,
+        f.name as factory_name,
+        z.zone_name,
+        d.delivery_count,
+        d.total_amount,
+        z.price as zone_price,
+        d.total_amount * z.price as total_price,
+        d.status
+    FROM billing_daily_summary d
+    JOIN drivers dr ON d.driver_id = dr.id
+    JOIN factories f ON d.factory_id = f.id
+    JOIN factory_zone_prices z ON d.zone_id = z.id
+    WHERE {where}
+    ORDER BY d.delivery_date DESC
+"""
+
+# Számlázás: egy összesítő sor (sofőr, dátum, gyár, övezet, státusz) fuvarjai
+BILLING_SUMMARY_IDS_QUERY = """
+    SELECT id
+    FROM deliveries
+    WHERE driver_id = ? AND delivery_date = ? AND factory_id = ? AND zone_id = ?
+      AND COALESCE(status, 'pending') = ?
+"""
+
+# Üzemanyag: a jármű utolsó tankolásának dátuma
+LAST_FUEL_DATE_QUERY = """
+    SELECT date
+    FROM fuel_consumption
+    WHERE vehicle_id = ?
+    ORDER BY date DESC
+    LIMIT 1
+"""
+
+# Üzemanyag elemzés: ennyi lezárt (tele tanktól tele tankig tartó) szakasz a gördülő átlag
+FUEL_ROLLING_SEGMENTS = 5
+
+# Üzemanyag elemzés: kilométeróra felső határ a jármű összes tankolásához
+FUEL_MAX_ODOMETER = 2 ** 63 - 1
+
+# Üzemanyag elemzés a jármű tankolásain a megadott kilométeróra állások között.
+# A tele tankolások szakaszokra bontják a tankolásokat; a szakaszt lezáró tele
+# tankoláshoz tartozik a szakasz összes tankolt mennyisége és a két tele tankolás
+# közti távolság (így a részleges tankolások is beszámítanak).
+FUEL_ANALYTICS_QUERY = f"""
+    WITH fills AS (
+        SELECT id, date, odometer_reading, fuel_amount, total_cost, full_tank, avg_consumption,
+               odometer_reading - LAG(odometer_reading) OVER ordered AS distance,
+               LAG(date) OVER ordered AS previous_date,
+               COALESCE(SUM(CASE WHEN full_tank THEN 1 ELSE 0 END) OVER earlier, 0) AS segment,
+               MAX(CASE WHEN full_tank THEN odometer_reading END) OVER earlier AS previous_full_odometer
+        FROM fuel_consumption
+        WHERE vehicle_id = ? AND odometer_reading BETWEEN ? AND ?
+        WINDOW ordered AS (ORDER BY odometer_reading, date, id),
+               earlier AS (ordered ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)
+    ),
+    segments AS (
+        SELECT *,
+               CASE WHEN full_tank AND odometer_reading > previous_full_odometer
+                    THEN odometer_reading - previous_full_odometer END AS segment_distance
+        FROM fills
+    )
+    -- A 0. szakasz (az első tele tankolás előtti, ill. a kezdőpont előtti tankolások) nem számít
+    SELECT id, date, odometer_reading, fuel_amount, total_cost, full_tank, avg_consumption,
+           distance, previous_date, segment_distance,
+           SUM(fuel_amount) OVER in_segment * 100.0 / segment_distance AS consumption,
+           SUM(total_cost) OVER in_segment / segment_distance AS cost_per_km,
+           CASE WHEN segment_distance IS NOT NULL THEN
+               SUM(fuel_amount) FILTER (WHERE segment > 0) OVER last_n * 100.0
+               / SUM(segment_distance) OVER last_n END AS rolling_consumption,
+           SUM(fuel_amount) FILTER (WHERE segment > 0) OVER previous_n * 100.0
+               / SUM(segment_distance) OVER previous_n AS previous_rolling_consumption
+    FROM segments
+    WINDOW in_segment AS (PARTITION BY segment ORDER BY odometer_reading, date, id),
+           by_segment AS (ORDER BY segment),
+           last_n AS (by_segment RANGE BETWEEN {FUEL_ROLLING_SEGMENTS - 1} PRECEDING AND CURRENT ROW),
+           previous_n AS (by_segment RANGE BETWEEN {FUEL_ROLLING_SEGMENTS} PRECEDING AND 1 PRECEDING)
+    ORDER BY odometer_reading, date, id
+"""
+
+# Üzemanyag elemzés: a megadott állás előtti (n+1). tele tankolás (OFFSET n); innen
+# kell újraszámolni, hogy a gördülő átlag n előző szakasza is meglegyen
+FUEL_CONTEXT_START_QUERY = """
+    SELECT odometer_reading
+    FROM fuel_consumption
+    WHERE vehicle_id = ? AND full_tank AND odometer_reading < ?
+    ORDER BY odometer_reading DESC
+    LIMIT 1 OFFSET ?
+"""
+
+# Üzemanyag: a megadott állástól számított (n+1). tele tankolás (OFFSET n); a tárolt
+# átlagfogyasztás eddig változhat egy tankolás módosításakor
+FUEL_NEXT_FULL_QUERY = """
+    SELECT odometer_reading
+    FROM fuel_consumption
+    WHERE vehicle_id = ? AND full_tank AND odometer_reading >= ?
+    ORDER BY odometer_reading
+    LIMIT 1 OFFSET ?
+"""
+
+# Gyár övezeti díjai
+ZONE_PRICES_QUERY = """
+    SELECT zone_name, price
+    FROM factory_zone_prices
+    WHERE factory_id = ?
+    ORDER BY zone_name
+"""
+
+# Övezetek km határ szerint
+ZONES_QUERY = """
+    SELECT id, name, min_km, max_km
+    FROM zones
+    ORDER BY min_km
+"""
+
+# Gyár övezeti díjai azonosítóval (a deliveries.zone_id erre mutat)
+FACTORY_ZONE_PRICE_IDS_QUERY = """
+    SELECT id, zone_name, price
+    FROM factory_zone_prices
+    WHERE factory_id = ?
+"""
+
+# A gyár korábbi fuvarjai alapján irányítószámonként az egyes övezetek gyakorisága
+FACTORY_POSTAL_ZONES_QUERY = """
+    SELECT a.postal_code, z.zone_name, COUNT(*) AS delivery_count
+    FROM deliveries d
+    JOIN addresses a ON a.id = d.address_id
+    JOIN factory_zone_prices z ON z.id = d.zone_id
+    WHERE d.factory_id = ? AND a.postal_code IS NOT NULL
+    GROUP BY a.postal_code, z.zone_name
+"""
+
+# Munkaórák: a sofőr egy hónapja (UNIQUE(driver_id, work_date) index)
+WORK_HOURS_MONTH_QUERY = """
+    SELECT work_date, work_type, start_time, end_time, hours
+    FROM work_hours
+    WHERE driver_id = ? AND work_date BETWEEN ? AND ?
+    ORDER BY work_date
+"""
+
+# Fuvar m3 bejegyzések: a sofőr egy hónapja, cellánként a beírás sorrendjében
+M3_ENTRIES_MONTH_QUERY = """
+    SELECT delivery_date, zone_name, m3
+    FROM delivery_m3_entries
+    WHERE driver_id = ? AND delivery_date BETWEEN ? AND ?
+    ORDER BY delivery_date, zone_name, position
+"""
+
+
+def billing_where(date_from=None, date_to=None, driver_id=None,
+                  factory_id=None) -> Tuple[str, List[Any]]:
+    """
+    A számlázási lekérdezések WHERE feltétele és paraméterei.
+
+    A None értékű szűrők kimaradnak.
+    """
+    conditions = ["1=1"]
+    params = []
+
+    if date_from:
+        conditions.append("d.delivery_date >= ?")
+        params.append(date_from)
+
+    if date_to:
+        conditions.append("d.delivery_date <= ?")
+        params.append(date_to)
+
+    if driver_id is not None:
+        conditions.append("d.driver_id = ?")
+        params.append(driver_id)
+
+    if factory_id is not None:
+        conditions.append("d.factory_id = ?")
+        params.append(factory_id)
+
+    return " AND ".join(conditions), params
+
+
+def _known_billing_queries() -> Dict[str, Tuple[str, tuple]]:
+    """A számlázási lekérdezések jellemző szűrőkombinációi"""
+    month = ('2024-01-01', '2024-01-31')
+    combinations = {
+        'időszak': billing_where(*month),
+        'időszak+sofőr': billing_where(*month, driver_id=1),
+        'időszak+gyár': billing_where(*month, factory_id=1),
+    }
+    queries = {}
+    for name, (where, params) in combinations.items():
+        queries[f"számlázás tételes ({name})"] = (BILLING_DETAIL_QUERY.format(where=where), tuple(params))
+        queries[f"számlázás összesítő ({name})"] = (BILLING_SUMMARY_QUERY.format(where=where), tuple(params))
+    queries["számlázás összesítő sor fuvarjai"] = (BILLING_SUMMARY_IDS_QUERY, (1, '2024-01-01', 1, 1, 'pending'))
+    return queries
+
+
+# Címkeresés az addresses_fts indexben; a paraméter egy FTS5 MATCH kifejezés
+# (lásd DatabaseHandler.search_addresses), a találatok relevancia szerint
+ADDRESS_SEARCH_QUERY = """
+    SELECT a.id, a.address, a.price
+    FROM addresses_fts
+    JOIN addresses a ON a.id = addresses_fts.rowid
+    WHERE addresses_fts MATCH ?
+    ORDER BY addresses_fts.rank, a.address
+    LIMIT ?
+"""
+
+
+# Név -> (SQL, minta paraméterek); ezek terve nem tartalmazhat teljes tábla-bejárást
+KNOWN_QUERIES: Dict[str, Tuple[str, tuple]] = {
+    **_known_billing_queries(),
+    'utolsó tankolás dátuma': (LAST_FUEL_DATE_QUERY, (1,)),
+    'üzemanyag elemzés': (FUEL_ANALYTICS_QUERY, (1, 0, 200000)),
+    'üzemanyag elemzés kezdőpontja': (FUEL_CONTEXT_START_QUERY, (1, 100000, FUEL_ROLLING_SEGMENTS)),
+    'következő tele tankolás': (FUEL_NEXT_FULL_QUERY, (1, 100000, 1)),
+    'gyár övezeti díjai': (ZONE_PRICES_QUERY, (1,)),
+    'sofőr havi munkaórái': (WORK_HOURS_MONTH_QUERY, (1, '2024-01-01', '2024-01-31')),
+    'sofőr havi m3 bejegyzései': (M3_ENTRIES_MONTH_QUERY, (1, '2024-01-01', '2024-01-31')),
+    'címkeresés': (ADDRESS_SEARCH_QUERY, ('"kossuth"*', 20)),
+    'gyár övezeti díj azonosítói': (FACTORY_ZONE_PRICE_IDS_QUERY, (1,)),
+    'gyár irányítószám-övezet gyakoriságai': (FACTORY_POSTAL_ZONES_QUERY, (1,)),
+}
+
+
+def check_query_plans(db) -> Dict[str, List[str]]:
+    """
+    Lefuttatja az EXPLAIN QUERY PLAN-t az ismert lekérdezéseken.
+
+    Args:
+        db: DatabaseHandler példány
+
+    Returns:
+        Lekérdezés neve -> a teljes tábla-bejárást jelző tervsorok
+    """
+    return db.find_full_scans(KNOWN_QUERIES)
+
+
+if __name__ == "__main__":
+    from database_handler import get_database_handler
+
+    db = get_database_handler(sys.argv[1] if len(sys.argv) > 1 else 'fuvarok.db')
+    problems = check_query_plans(db)
+    for name in KNOWN_QUERIES:
+        status = "TELJES BEJÁRÁS" if name in problems else "rendben"
+        print(f"{name}: {status}")
+        for detail in problems.get(name, []):
+            print(f"    {detail}")
+    sys.exit(1 if problems else 0)
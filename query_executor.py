@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Lekérdezések futtatása háttérszálon, hogy a felület ne akadjon meg.
+
+A QueryExecutor a lekérdezéseket kulcs szerint (pl. 'billing', 'fuel')
+kezeli: ugyanazon kulcs új lekérdezése megszakítja az előzőt, és a
+régi lekérdezés már beérkező eredményei eldobódnak. Az eredmény lapokban
+érkezik a GUI szálra, így a táblázat már az első lap után kitölthető.
+
+page_size megadásakor csak az első page_size sor töltődik be; a háttérszál
+ezután nyitva tartott kurzorral várakozik, és a következő lapot a
+fetchMore(key) hatására ugyanabból a kurzorból olvassa (jellemzően a
+táblamodell fetchMore-ja görgetéskor). Így a nagy táblák (üzemanyag,
+számlázás) sem kerülnek egészben a memóriába, a lekérdezés csak egyszer
+fut, és a lapok ugyanarról az adatbázis-állapotról készülnek. A várakozó
+lekérdezés egy szálat és egy kapcsolatot foglal, amíg végig nem olvasták,
+vagy új lekérdezés / cancel nem váltja fel.
+
+Példa:
+    executor = QueryExecutor(db, self)
+    executor.batchReady.connect(lambda key, rows: model.appendRows(rows))
+    executor.failed.connect(lambda key, message: self.showError("Hiba", message))
+    executor.submit('fuel', "SELECT ... FROM fuel_consumption", (), page_size=200)
+    ...
+    if executor.canFetchMore('fuel'):
+        executor.fetchMore('fuel')
+"""
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+# Ennyi sort küld egyszerre a háttérszál a GUI szálnak
+DEFAULT_BATCH_SIZE = 500
+
+# A megszakítás ellenőrzése ennyi SQLite virtuális gép utasításonként történik
+_PROGRESS_INTERVAL = 1000
+
+
+class _TaskSignals(QObject):
+    """A háttérfeladat jelzései (kulcs, generáció, adat)"""
+    batch = Signal(str, int, object)
+    page = Signal(str, int, int)    # a lap betöltődött, a feladat a következő kérésre vár
+    done = Signal(str, int, int)
+    error = Signal(str, int, str)
+
+
+class _QueryTask(QRunnable):
+    """Egy lekérdezés végrehajtása a szálkészlet egyik szálán"""
+
+    def __init__(self, db, key: str, generation: int, query: str, params: tuple,
+                 batch_size: int, signals: _TaskSignals, page_size: Optional[int] = None):
+        super().__init__()
+        self.db = db
+        self.key = key
+        self.generation = generation
+        self.query = query
+        self.params = params
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self.signals = signals
+        self.cancelled = threading.Event()
+        self.resume = threading.Event()  # a következő lap kérése (megszakításkor is jelez)
+
+    def _waitForNextPage(self) -> None:
+        self.resume.wait()
+        self.resume.clear()
+
+    def run(self):
+        conn = None
+        count = 0
+        page_rows = 0
+        failed = True
+        profiling = self.db.profiling
+        elapsed = 0.0  # a lapok közti várakozás nélkül
+        start = time.perf_counter()
+        try:
+            # A pool foglaltsága esetén az acquire is hibát dobhat
+            conn = self.db.conn
+            # A progress handler nem nulla visszatérési értéke megszakítja a lekérdezést
+            conn.set_progress_handler(self.cancelled.is_set, _PROGRESS_INTERVAL)
+            cursor = conn.execute(self.query, self.params)
+            try:
+                while not self.cancelled.is_set():
+                    size = self.batch_size
+                    if self.page_size:
+                        size = min(size, self.page_size - page_rows)
+                    rows = cursor.fetchmany(size)
+                    if not rows:
+                        break
+                    count += len(rows)
+                    page_rows += len(rows)
+                    self.signals.batch.emit(self.key, self.generation, rows)
+                    if self.page_size and page_rows >= self.page_size:
+                        self.signals.page.emit(self.key, self.generation, page_rows)
+                        elapsed += time.perf_counter() - start
+                        self._waitForNextPage()
+                        start = time.perf_counter()
+                        page_rows = 0
+            finally:
+                cursor.close()
+            failed = False
+            if not self.cancelled.is_set():
+                self.signals.done.emit(self.key, self.generation, page_rows)
+        except sqlite3.OperationalError as e:
+            if not self.cancelled.is_set():
+                logging.error(f"Háttér lekérdezési hiba ({self.key}): {str(e)}")
+                self.signals.error.emit(self.key, self.generation, str(e))
+        except Exception as e:
+            logging.error(f"Háttér lekérdezési hiba ({self.key}): {str(e)}")
+            self.signals.error.emit(self.key, self.generation, str(e))
+        finally:
+            # A megszakított lekérdezés nem kerül a statisztikába
+            if profiling and conn is not None and not self.cancelled.is_set():
+                elapsed += time.perf_counter() - start
+                self.db.profiler.record(self.query, elapsed * 1000, count, failed)
+            if conn is not None:
+                conn.set_progress_handler(None, 0)
+                # A kapcsolat visszakerül a poolba, a szálkészlet szála nem tartja meg
+                self.db.release_connection()
+
+
+class QueryExecutor(QObject):
+    """Kulcsonként legfeljebb egy futó háttér lekérdezés, megszakítással"""
+
+    batchReady = Signal(str, object)     # kulcs, sorok listája
+    finished = Signal(str, int)          # kulcs, a betöltött sorok (lapozásnál a lap) száma
+    failed = Signal(str, str)            # kulcs, hibaüzenet
+    loadingChanged = Signal(str, bool)   # kulcs, fut-e még
+
+    def __init__(self, db, parent=None, max_threads: int = 2):
+        """
+        Args:
+            db: DatabaseHandler példány
+            parent: Szülő QObject (általában a dialógus)
+            max_threads: Párhuzamos lekérdezések száma; kisebb legyen a
+                kapcsolat pool méreténél, hogy a GUI szálnak is jusson kapcsolat
+        """
+        super().__init__(parent)
+        self.db = db
+        self.max_threads = max_threads
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self._generations: Dict[str, int] = {}
+        self._tasks: Dict[str, Tuple[_QueryTask, _TaskSignals]] = {}
+        # A következő lap kérésére váró (nyitott kurzorú) lekérdezések kulcsai
+        self._paused: Set[str] = set()
+
+    def submit(self, key: str, query: str, params: tuple = (),
+               batch_size: int = DEFAULT_BATCH_SIZE, page_size: Optional[int] = None) -> int:
+        """
+        Lekérdezés indítása háttérszálon; az azonos kulcsú futó lekérdezés megszakad.
+
+        Args:
+            page_size: Ha meg van adva, csak az első page_size sor töltődik be;
+                a következő lapokat a fetchMore(key) olvassa ugyanabból a kurzorból
+
+        Returns:
+            A lekérdezés generációs száma
+        """
+        self.cancel(key, notify=False)
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+
+        signals = _TaskSignals()
+        signals.batch.connect(self._onBatch)
+        signals.page.connect(self._onPage)
+        signals.done.connect(self._onDone)
+        signals.error.connect(self._onError)
+        task = _QueryTask(self.db, key, generation, query, tuple(params), batch_size, signals, page_size)
+        self._tasks[key] = (task, signals)
+
+        self.loadingChanged.emit(key, True)
+        self.thread_pool.start(task)
+        return generation
+
+    def canFetchMore(self, key: str) -> bool:
+        """Vár-e a kulcs lekérdezése a következő lap kérésére"""
+        return key in self._paused
+
+    def fetchMore(self, key: str) -> None:
+        """A lapozott lekérdezés következő lapjának olvasása a nyitva tartott kurzorból"""
+        if key not in self._paused:
+            return
+        self._setPaused(key, False)
+        self.loadingChanged.emit(key, True)
+        self._tasks[key][0].resume.set()
+
+    def _setPaused(self, key: str, paused: bool) -> None:
+        if paused:
+            self._paused.add(key)
+        else:
+            self._paused.discard(key)
+        # A várakozó lekérdezés szálat foglal; a többi lekérdezésnek ettől még jut szál
+        self.thread_pool.setMaxThreadCount(self.max_threads + len(self._paused))
+
+    def cancel(self, key: str, notify: bool = True) -> None:
+        """A kulcshoz tartozó futó lekérdezés megszakítása; a késve érkező eredmények eldobódnak"""
+        entry = self._tasks.pop(key, None)
+        if entry is None:
+            return
+        was_loading = key not in self._paused
+        self._setPaused(key, False)
+        entry[0].cancelled.set()
+        entry[0].resume.set()
+        self._generations[key] = self._generations.get(key, 0) + 1
+        if notify and was_loading:
+            self.loadingChanged.emit(key, False)
+
+    def cancelAll(self) -> None:
+        for key in list(self._tasks):
+            self.cancel(key)
+
+    def isLoading(self, key: str) -> bool:
+        return key in self._tasks and key not in self._paused
+
+    def _isCurrent(self, key: str, generation: int) -> bool:
+        return key in self._tasks and self._generations.get(key) == generation
+
+    def _onBatch(self, key, generation, rows):
+        if self._isCurrent(key, generation):
+            self.batchReady.emit(key, rows)
+
+    def _onPage(self, key, generation, count):
+        if self._isCurrent(key, generation):
+            self._setPaused(key, True)
+            self.loadingChanged.emit(key, False)
+            self.finished.emit(key, count)
+
+    def _onDone(self, key, generation, count):
+        if self._isCurrent(key, generation):
+            del self._tasks[key]
+            self.loadingChanged.emit(key, False)
+            self.finished.emit(key, count)
+
+    def _onError(self, key, generation, message):
+        if self._isCurrent(key, generation):
+            del self._tasks[key]
+            self.loadingChanged.emit(key, False)
+            self.failed.emit(key, message)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Lekérdezés profilozás a DatabaseHandler-hez.
+
+Bekapcsolt profilozásnál (DatabaseHandler.enable_profiling) minden
+execute_query / execute_many hívás ideje és sorainak száma rögzül. Az
+utasítások ujjlenyomat szerint csoportosulnak: a szöveg- és
+számkonstansok "?"-re, az IN listák "(...)"-ra cserélődnek, így az
+összefűzött értékekkel épített lekérdezések is egy sorba kerülnek.
+A SLOW_QUERY_MS-nál lassabb hívások figyelmeztetésként naplózódnak.
+
+A statisztika (darab, összidő, p50 / p95 / max, sorok) a folyamat végéig
+a memóriában marad; megjelenítése: Adatbázis > Lekérdezés statisztika.
+"""
+import logging
+import re
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+# Ennél lassabb (ms) hívás figyelmeztetést ír a naplóba
+DEFAULT_SLOW_QUERY_MS = 200
+
+# Ujjlenyomatonként ennyi legutóbbi időtartamból számolódnak a percentilisek
+SAMPLE_LIMIT = 500
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """Az utasítás normalizált alakja (konstansok nélkül, egy sorban)"""
+    text = _STRING_RE.sub('?', query)
+    text = _NUMBER_RE.sub('?', text)
+    text = _SPACE_RE.sub(' ', text).strip()
+    return _IN_LIST_RE.sub('IN (...)', text)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class _QueryStat:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'rows', 'slow_count', 'errors', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.slow_count = 0
+        self.errors = 0
+        self.samples = deque(maxlen=SAMPLE_LIMIT)
+
+
+class QueryProfiler:
+    """Ujjlenyomatonként összesített lekérdezés statisztika"""
+
+    def __init__(self, slow_query_ms: float = DEFAULT_SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self._stats: Dict[str, _QueryStat] = {}
+        self._lock = threading.Lock()
+
+    def record(self, query: str, duration_ms: float, rows: Optional[int] = None,
+               failed: bool = False) -> None:
+        """Egy végrehajtás rögzítése"""
+        key = fingerprint(query)
+        slow = duration_ms >= self.slow_query_ms
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = _QueryStat()
+            stat.count += 1
+            stat.total_ms += duration_ms
+            stat.max_ms = max(stat.max_ms, duration_ms)
+            stat.rows += rows or 0
+            stat.slow_count += slow
+            stat.errors += failed
+            stat.samples.append(duration_ms)
+        if slow:
+            logging.warning(f"Lassú lekérdezés ({duration_ms:.1f} ms, {rows} sor): {key[:300]}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """A statisztika sorai összidő szerint csökkenő sorrendben"""
+        with self._lock:
+            items = [(key, stat, sorted(stat.samples)) for key, stat in self._stats.items()]
+        result = [{
+            'fingerprint': key,
+            'count': stat.count,
+            'total_ms': stat.total_ms,
+            'avg_ms': stat.total_ms / stat.count,
+            'p50_ms': _percentile(samples, 0.50),
+            'p95_ms': _percentile(samples, 0.95),
+            'max_ms': stat.max_ms,
+            'rows': stat.rows,
+            'slow_count': stat.slow_count,
+            'errors': stat.errors,
+        } for key, stat, samples in items]
+        result.sort(key=lambda row: row['total_ms'], reverse=True)
+        return result
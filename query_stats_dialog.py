@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Lekérdezés statisztika dialógus (Adatbázis > Lekérdezés statisztika).
+
+A DatabaseHandler profilozójának összesített adatait mutatja ujjlenyomatonként,
+összidő szerint csökkenő sorrendben; innen kapcsolható a profilozás és
+exportálható a táblázat Excel fájlba.
+"""
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QAbstractItemView, QCheckBox, QDialog, QFileDialog, QHBoxLayout, QMessageBox,
+    QPushButton, QTableView, QVBoxLayout
+)
+
+from query_table_model import QueryTableModel, Column
+
+_RIGHT = Qt.AlignRight | Qt.AlignVCenter
+_MS = lambda value: f"{value:,.1f}"
+_COUNT = lambda value: f"{value:,}"
+
+STAT_COLUMNS = [
+    Column('fingerprint', "Lekérdezés", None, Qt.AlignLeft | Qt.AlignVCenter),
+    Column('count', "Darab", _COUNT, _RIGHT),
+    Column('total_ms', "Összidő (ms)", _MS, _RIGHT),
+    Column('avg_ms', "Átlag (ms)", _MS, _RIGHT),
+    Column('p50_ms', "p50 (ms)", _MS, _RIGHT),
+    Column('p95_ms', "p95 (ms)", _MS, _RIGHT),
+    Column('max_ms', "Max (ms)", _MS, _RIGHT),
+    Column('rows', "Sorok", _COUNT, _RIGHT),
+    Column('slow_count', "Lassú", _COUNT, _RIGHT),
+    Column('errors', "Hiba", _COUNT, _RIGHT),
+]
+
+
+class QueryStatsDialog(QDialog):
+    def __init__(self, db, config_manager=None, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.config_manager = config_manager
+        self.setWindowTitle("Lekérdezés statisztika")
+        self.setMinimumSize(1000, 600)
+
+        layout = QVBoxLayout()
+
+        self.profiling_check = QCheckBox(
+            f"Profilozás bekapcsolva (lassú: {self.db.profiler.slow_query_ms:g} ms felett)")
+        self.profiling_check.setChecked(self.db.profiling)
+        self.profiling_check.toggled.connect(self.onProfilingToggled)
+        layout.addWidget(self.profiling_check)
+
+        self.model = QueryTableModel(STAT_COLUMNS, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setWordWrap(False)
+        self.table.horizontalHeader().setStretchLastSection(False)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        for text, slot in (("Frissítés", self.loadStats), ("Nullázás", self.resetStats),
+                           ("Excel export", self.exportStats), ("Bezárás", self.accept)):
+            btn = QPushButton(text)
+            btn.clicked.connect(slot)
+            btn_layout.addWidget(btn)
+        layout.addLayout(btn_layout)
+
+        self.setLayout(layout)
+        self.loadStats()
+
+    def onProfilingToggled(self, checked):
+        if checked:
+            self.db.enable_profiling()
+        else:
+            self.db.disable_profiling()
+        if self.config_manager is not None:
+            self.config_manager.set('query_profiling', checked)
+
+    def loadStats(self):
+        self.model.setRows(self.db.profiler.snapshot())
+        self.table.resizeColumnsToContents()
+        self.table.setColumnWidth(0, min(self.table.columnWidth(0), 500))
+
+    def resetStats(self):
+        self.db.profiler.reset()
+        self.loadStats()
+
+    def exportStats(self):
+        try:
+            filename, _ = QFileDialog.getSaveFileName(
+                self, "Excel mentése", "lekerdezes_statisztika.xlsx", "Excel fájlok (*.xlsx)")
+            if not filename:
+                return
+            from excel_export import export_rows
+            # Nyers (számként tárolt) értékek, hogy Excelben rendezhetők legyenek
+            rows = ([self.model.value(row, col) for col in range(self.model.columnCount())]
+                    for row in range(self.model.rowCount()))
+            export_rows(filename, self.model.headers(), rows, sheet_title="Lekérdezések")
+            QMessageBox.information(self, "Siker", "Excel exportálás sikeres!")
+        except Exception as e:
+            QMessageBox.critical(self, "Hiba", f"Excel exportálási hiba: {str(e)}")
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Lekérdezés eredményére épülő táblamodell QTableView-hoz.
+
+A modell a nyers adatbázis sorokat tárolja, a cellák szövegét csak
+megjelenítéskor állítja elő. Nagy eredményhalmaznál a sorokat lapokban
+olvassa (DatabaseHandler.stream_query, fetchMore), így csak a ténylegesen
+megjelenített sorok kerülnek a memóriába. Exportnál a modell be sem töltött
+sorai is formázhatók a modell oszlopai szerint (formatRecord).
+
+Példa:
+    model = QueryTableModel([
+        Column('id', "ID"),
+        Column('fuel_amount', "Mennyiség (L)", lambda v: f"{v:.1f}"),
+    ])
+    view.setModel(model)
+    model.setQuery(db, "SELECT id, fuel_amount FROM fuel_consumption")
+"""
+import logging
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+# Ennyi sort olvasunk be egyszerre a kurzorból
+DEFAULT_BATCH_SIZE = 200
+
+
+class Column(NamedTuple):
+    """
+    Egy megjelenített oszlop leírása.
+
+    key: a sor oszlopának neve/indexe, vagy a teljes sorból értéket számoló függvény
+    header: fejléc szövege
+    formatter: az értékből megjelenített szöveget készítő függvény (None érték esetén nem hívódik)
+    alignment: a cella szövegének igazítása
+    """
+    key: Union[str, int, Callable[[Any], Any]]
+    header: str
+    formatter: Optional[Callable[[Any], str]] = None
+    alignment: Qt.AlignmentFlag = Qt.AlignCenter
+
+
+class QueryTableModel(QAbstractTableModel):
+    """Csak olvasható táblamodell adatbázis sorokhoz, lapozó betöltéssel"""
+
+    def __init__(self, columns: Sequence[Column], parent=None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.batch_size = batch_size
+        self._rows: List[Any] = []
+        self._stream: Optional[Iterator[List[Any]]] = None
+        # Külső (pl. háttérszálas) lapozás: van-e még lap, illetve a következő lap kérése
+        self._can_fetch: Optional[Callable[[], bool]] = None
+        self._fetch: Optional[Callable[[], None]] = None
+
+    # --- Betöltés ---
+
+    def setQuery(self, db, query: str, params: tuple = ()) -> None:
+        """
+        Lekérdezés futtatása; az első lap azonnal, a többi görgetéskor töltődik be.
+
+        Args:
+            db: DatabaseHandler példány
+            query: SQL lekérdezés szövege
+            params: Lekérdezés paraméterei
+        """
+        self.beginResetModel()
+        self._closeStream()
+        self._can_fetch = self._fetch = None
+        self._rows = []
+        try:
+            self._stream = db.stream_query(query, tuple(params), self.batch_size)
+            self._rows.extend(self._fetchBatch())
+        finally:
+            self.endResetModel()
+
+    def setRows(self, rows: Sequence[Any]) -> None:
+        """Már beolvasott sorok megjelenítése"""
+        self.beginResetModel()
+        self._closeStream()
+        self._can_fetch = self._fetch = None
+        self._rows = list(rows)
+        self.endResetModel()
+
+    def setFetcher(self, can_fetch: Callable[[], bool], fetch: Callable[[], None]) -> None:
+        """
+        Külső lapozás beállítása (pl. QueryExecutor.canFetchMore / fetchMore).
+
+        A nézet görgetéskor a fetch függvényt hívja; az aszinkron betöltött
+        lap sorai appendRows-zal érkeznek. A következő setQuery / setRows
+        (clear) megszünteti.
+        """
+        self._can_fetch = can_fetch
+        self._fetch = fetch
+
+    def appendRows(self, rows: Sequence[Any]) -> None:
+        """Sorok hozzáfűzése (pl. a QueryExecutor háttérszálon olvasott lapjai)"""
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        """A modell kiürítése"""
+        self.setRows([])
+
+    def fetchAll(self) -> None:
+        """
+        A még be nem olvasott sorok betöltése (pl. exportálás előtt).
+
+        Csak setQuery-vel betöltött modellre; külső lapozásnál (setFetcher)
+        a lapok aszinkron érkeznek.
+        """
+        while self._stream is not None:
+            self.fetchMore()
+
+    def _fetchBatch(self) -> List[Any]:
+        """A következő lap a lekérdezésből; a kimerült lekérdezés kurzorát lezárja"""
+        if self._stream is None:
+            return []
+        try:
+            batch = next(self._stream, [])
+        except Exception as e:
+            logging.error(f"Sorok beolvasási hiba: {str(e)}")
+            self._stream = None
+            raise
+        if len(batch) < self.batch_size:
+            self._closeStream()
+        return batch
+
+    def _closeStream(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        if self._stream is not None:
+            return True
+        return self._can_fetch is not None and self._can_fetch()
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if parent.isValid():
+            return
+        if self._stream is not None:
+            self.appendRows(self._fetchBatch())
+        elif self._fetch is not None:
+            self._fetch()
+
+    # --- Hozzáférés ---
+
+    def rowData(self, row: int) -> Any:
+        """A megadott sorhoz tartozó adatbázis sor (sqlite3.Row)"""
+        return self._rows[row]
+
+    def value(self, row: int, column: int) -> Any:
+        """Egy cella nyers (formázatlan) értéke"""
+        key = self.columns[column].key
+        record = self._rows[row]
+        return key(record) if callable(key) else record[key]
+
+    def displayText(self, row: int, column: int) -> str:
+        """Egy cella megjelenített szövege"""
+        return self._format(self.columns[column], self.value(row, column))
+
+    def formatRecord(self, record: Any) -> List[str]:
+        """
+        Egy (akár a modellbe be nem töltött) adatbázis sor szövegei a modell oszlopai szerint
+
+        Példa (export a teljes eredmény betöltése nélkül):
+            rows = (model.formatRecord(record)
+                    for batch in db.stream_query(query, params) for record in batch)
+        """
+        return [self._format(column, column.key(record) if callable(column.key) else record[column.key])
+                for column in self.columns]
+
+    @staticmethod
+    def _format(column: Column, value: Any) -> str:
+        if value is None or value == "":
+            return ""
+        return column.formatter(value) if column.formatter else str(value)
+
+    def headers(self) -> List[str]:
+        return [column.header for column in self.columns]
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            try:
+                return self.displayText(index.row(), index.column())
+            except Exception as e:
+                logging.error(f"Cella formázási hiba: {str(e)}")
+                return ""
+        if role == Qt.TextAlignmentRole:
+            return int(self.columns[index.column()].alignment)
+        if role == Qt.UserRole:
+            return self.value(index.row(), index.column())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section].header
+        return super().headerData(section, orientation, role)
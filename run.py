@@ -1,8 +1,15 @@
 # -*- coding: utf-8 -*-
 import sys
 import logging
-from PySide6.QtWidgets import QApplication
-from modified_main import FuvarAdminApp
+from PySide6.QtWidgets import QApplication, QDialog
+
+# Induláskor csak a bejelentkezéshez szükséges modulok töltődnek be; a főablak
+# moduljai (modified_main és a kezelők) a sikeres bejelentkezés után.
+# Az induló importok ideje: python startup_report.py
+from config_manager import ConfigManager
+from security.enhanced_auth import EnhancedAuthManager
+from security.login_dialog import LoginDialog
+import timing
 
 logging.basicConfig(
    level=logging.DEBUG,
@@ -10,13 +17,34 @@ logging.basicConfig(
    filename='debug.log'
 )
 
+
+def login(auth_manager):
+   """A bejelentkező dialógus; sikeres bejelentkezésnél a token, egyébként None"""
+   login_dialog = LoginDialog(auth_manager)
+   if login_dialog.exec() == QDialog.Accepted:
+       return login_dialog.token
+   return None
+
+
 if __name__ == "__main__":
    try:
        app = QApplication(sys.argv)
-       window = FuvarAdminApp()
+       config_manager = ConfigManager()
+       timing.configure(config_manager)
+       auth_manager = EnhancedAuthManager(config_manager.open_database())
+
+       # A bejelentkezés ideje a felhasználó gépelését is tartalmazza
+       with timing.span('startup.login'):
+           token = login(auth_manager)
+       if token is None:
+           sys.exit()
+
+       with timing.span('startup.import'):
+           from modified_main import FuvarAdminApp
+       window = FuvarAdminApp(auth_manager, token)
        window.show()
        sys.exit(app.exec())
-       
+
    except Exception as e:
        logging.error(f"Hiba: {str(e)}", exc_info=True)
-       raise
\ No newline at end of file
+       raise
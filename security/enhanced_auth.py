@@ -14,8 +14,7 @@ class EnhancedAuthManager:
         self.db = db_handler
         self.security_config = SecurityConfig()
         self.failed_attempts = {}
-        self._setup_auth_table()
-        self._setup_audit_log()
+        # A users és audit_log táblákat a sémamigrációk hozzák létre
         self.create_admin_if_not_exists()
 
     def create_admin_if_not_exists(self):
@@ -27,36 +26,6 @@ class EnhancedAuthManager:
         except Exception as e:
             logging.error(f"Admin létrehozási hiba: {str(e)}")
         
-    def _setup_auth_table(self):
-        query = """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_login TIMESTAMP,
-            login_attempts INTEGER DEFAULT 0,
-            locked_until TIMESTAMP,
-            password_changed_at TIMESTAMP,
-            requires_password_change BOOLEAN DEFAULT FALSE
-        )"""
-        self.db.execute_query(query)
-        
-    def _setup_audit_log(self):
-        """Audit log tábla létrehozása"""
-        query = """
-        CREATE TABLE IF NOT EXISTS audit_log (
-            id INTEGER PRIMARY KEY,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            user_id INTEGER,
-            action TEXT NOT NULL,
-            details TEXT,
-            ip_address TEXT,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )"""
-        self.db.execute_query(query)
-
     def _validate_password(self, password: str) -> Tuple[bool, str]:
         """Jelszó validáció"""
         if len(password) < self.security_config.MIN_PASSWORD_LENGTH:
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Induló importidő riport (python -X importtime alapján).
+
+Minden vizsgált modul friss Python folyamatban töltődik be, így a mért idő
+a hidegindításé. Alapértelmezésben a bejelentkezésig betöltődő modulok
+(run) és a teljes főablak (modified_main) kerül mérésre; a riport a
+legdrágább importokat is felsorolja. A --history fájlba soronként egy
+mérés kerül, így az idő kiadásonként követhető.
+
+Használat:
+    python startup_report.py
+    python startup_report.py modified_main --top 30 --history startup_times.csv
+"""
+import argparse
+import csv
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime
+from typing import List, NamedTuple, Sequence
+
+DEFAULT_MODULES = ('run', 'modified_main')
+
+# "import time:       self [us] |  cumulative | imported package"
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def measure_imports(module: str, repeat: int = 3) -> List[ImportTime]:
+    """
+    A modul importjának mérése külön folyamatban.
+
+    A legkisebb összidejű futás számít (az első futás a .pyc fájlokat is
+    előállíthatja).
+    """
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    best: List[ImportTime] = []
+    for _ in range(max(1, repeat)):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            capture_output=True, text=True, env=env,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"A(z) {module} importja sikertelen:\n{result.stderr[-2000:]}")
+        times = []
+        for line in result.stderr.splitlines():
+            match = _IMPORTTIME_RE.match(line)
+            if match:
+                times.append(ImportTime(match.group(4), int(match.group(1)), int(match.group(2)),
+                                        len(match.group(3)) // 2))
+        if not best or total_us(times) < total_us(best):
+            best = times
+    return best
+
+
+def total_us(times: Sequence[ImportTime]) -> int:
+    """A legfelső szintű importok együttes ideje"""
+    return sum(time.cumulative_us for time in times if time.depth == 0)
+
+
+def append_history(path: str, module: str, times: Sequence[ImportTime]) -> None:
+    new_file = not os.path.exists(path)
+    with open(path, 'a', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        if new_file:
+            writer.writerow(['timestamp', 'module', 'total_ms', 'module_count'])
+        writer.writerow([datetime.now().isoformat(timespec='seconds'), module,
+                         f"{total_us(times) / 1000:.1f}", len(times)])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Induló importidő riport")
+    parser.add_argument('modules', nargs='*', default=list(DEFAULT_MODULES),
+                        help="Vizsgált modulok (alapértelmezés: %(default)s)")
+    parser.add_argument('--top', type=int, default=15, help="Ennyi legdrágább import kiírása")
+    parser.add_argument('--repeat', type=int, default=3, help="Mérések száma modulonként")
+    parser.add_argument('--history', help="CSV fájl, amelyhez a mérés hozzáfűződik")
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        times = measure_imports(module, args.repeat)
+        print(f"{module}: {total_us(times) / 1000:.1f} ms, {len(times)} modul")
+        for time in sorted(times, key=lambda t: t.cumulative_us, reverse=True)[:args.top]:
+            print(f"    {time.cumulative_us / 1000:8.1f} ms  {'  ' * time.depth}{time.module}")
+        if args.history:
+            append_history(args.history, module, times)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
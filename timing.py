@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Könnyűsúlyú időmérés (span) az indulás és más lassú lépések vizsgálatához.
+
+Kikapcsolt állapotban a span és a timed egyetlen feltételvizsgálat; bekapcsolva
+minden lezárt span egy JSON sorként kerül a naplófájlba (span neve, szülő
+span, időtartam ms-ban, sikeres volt-e, a megadott extra mezők), és az utolsó
+RECENT_LIMIT mérés a memóriában is lekérdezhető (recent_spans).
+
+Bekapcsolás a config.json-ban: "timing_enabled": true, "timing_log": "timing.log"
+
+Példa:
+    with span('startup.initUI'):
+        ...
+
+    @timed()
+    def loadDrivers(self): ...
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+DEFAULT_TIMING_LOG = 'timing.log'
+
+# Ennyi legutóbbi mérés marad a memóriában
+RECENT_LIMIT = 1000
+
+_logger = logging.getLogger('fuvar.timing')
+_logger.propagate = False  # a mérések ne kerüljenek a debug.log-ba
+
+_enabled = False
+_handler: Optional[logging.Handler] = None
+_local = threading.local()
+_recent: deque = deque(maxlen=RECENT_LIMIT)
+_recent_lock = threading.Lock()
+
+
+def enable(log_path: str = DEFAULT_TIMING_LOG) -> None:
+    """Mérés bekapcsolása; a spanok a megadott fájlba íródnak (JSON soronként)"""
+    global _enabled, _handler
+    if _handler is None or getattr(_handler, 'baseFilename', None) != os.path.abspath(log_path):
+        if _handler is not None:
+            _logger.removeHandler(_handler)
+            _handler.close()
+        _handler = logging.FileHandler(log_path, encoding='utf-8')
+        _handler.setFormatter(logging.Formatter('%(message)s'))
+        _logger.addHandler(_handler)
+        _logger.setLevel(logging.INFO)
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def configure(config_manager) -> None:
+    """A ConfigManager timing_enabled / timing_log beállításának alkalmazása"""
+    if config_manager.get('timing_enabled', False):
+        enable(config_manager.get('timing_log', DEFAULT_TIMING_LOG))
+    else:
+        disable()
+
+
+def _stack() -> List[str]:
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+@contextmanager
+def span(name: str, **fields: Any) -> Iterator[None]:
+    """
+    Egy lépés idejének mérése.
+
+    A beágyazott spanok szülője a külső span, így a naplóból a lépések
+    hierarchiája is kiolvasható.
+    """
+    if not _enabled:
+        yield
+        return
+
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    ok = True
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        stack.pop()
+        _record({
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'span': name,
+            'parent': parent,
+            'duration_ms': round(duration_ms, 3),
+            'ok': ok,
+            **fields,
+        })
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Dekorátor: a függvény minden hívása egy span (alapértelmezett név: Osztály.metódus)"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _record(entry: Dict[str, Any]) -> None:
+    with _recent_lock:
+        _recent.append(entry)
+    try:
+        _logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+    except Exception as e:
+        logging.error(f"Időmérés naplózási hiba: {str(e)}")
+
+
+def recent_spans() -> List[Dict[str, Any]]:
+    """Az utolsó RECENT_LIMIT lezárt span (a legrégebbi elöl)"""
+    with _recent_lock:
+        return list(_recent)
@@ -4,6 +4,7 @@ from PySide6.QtWidgets import (
     QTableWidget, QTableWidgetItem, QHeaderView
 )
 from PySide6.QtCore import Qt, QDate
+from zone_engine import get_zone_engine
 
 class UIManager:
     def __init__(self, parent=None):
@@ -268,7 +269,7 @@ class UIManager:
 
     def setupDeliveryTable(self):
         self.parent.delivery_table = QTableWidget()
-        headers = ["Dátum"] + [f"Övezet {i}-{i+5}" for i in range(0, 45, 5)]
+        headers = ["Dátum"] + get_zone_engine().zoneNames()
         self.setupTableHeader(self.parent.delivery_table, headers)
         self.setupTableRows(self.parent.delivery_table)
 
@@ -1,194 +1,147 @@
 # -*- coding: utf-8 -*-
 from PySide6.QtWidgets import QTableWidget, QTableWidgetItem, QMessageBox
-from PySide6.QtCore import Qt, QDate, QTime
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+from PySide6.QtCore import Qt, QDate, QTime, QTimer, QThreadPool
+import logging
 import os
+import threading
 from datetime import datetime
+from database_handler import get_database_handler
+from queries import WORK_HOURS_MONTH_QUERY
+from timing import timed
 
-class WorkHoursManager:
-    def __init__(self, parent=None):
-        self.parent = parent
-        self.work_table = None
-        self.transport_table = None
+HEADERS = [
+    "Dátum", "Nap",
+    "Sima Munkanap\nKezdés", "Sima Munkanap\nVégzés", "Ledolgozott\nÓrák",
+    "Műhely\nKezdés", "Műhely\nVégzés", "Műhely\nÓrák",
+    "Szabadság", "Betegszabadság\n(TP)"
+]
+
+DAY_NAMES = ['Hétfő', 'Kedd', 'Szerda', 'Csütörtök', 'Péntek', 'Szombat', 'Vasárnap']
+
+# Az utolsó mentés után ennyi idővel íródnak újra a módosult havi munkafüzetek
+COMPACT_DELAY_MS = 10000
 
-    def setup_work_table(self, table):
-        self.work_table = table# -*- coding: utf-8 -*-
-from PySide6.QtWidgets import QTableWidget, QTableWidgetItem, QMessageBox
-from PySide6.QtCore import Qt, QDate, QTime
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-import os
-from datetime import datetime
 
 class WorkHoursManager:
+    """
+    Munkaórák kezelése.
+
+    Az adatok a work_hours táblában vannak (sofőrönként és naponként egy sor),
+    egy nap mentése egyetlen upsert. A havi munkafüzet nem mentésenként íródik
+    újra: a módosult hónapokat a compactWorkbooks() írja ki késleltetve
+    (COMPACT_DELAY_MS) vagy kilépéskor, háttérszálon, illetve az
+    exportWorkHours() kérésre.
+    """
+
     def __init__(self, parent=None):
         self.parent = parent
         self.work_table = None
-        self.transport_table = None
+        self.db = get_database_handler()
+
+        # (sofőr, év, hónap) -> a munkafüzet újraírása szükséges
+        self._dirty_months = set()
+        self._dirty_lock = threading.Lock()
+        # Egyetlen háttérszál, így két tömörítés nem írja egyszerre ugyanazt a fájlt
+        self.compact_pool = QThreadPool(parent)
+        self.compact_pool.setMaxThreadCount(1)
+        self.compact_timer = QTimer(parent)
+        self.compact_timer.setSingleShot(True)
+        self.compact_timer.setInterval(COMPACT_DELAY_MS)
+        self.compact_timer.timeout.connect(self.compactWorkbooks)
 
     def setup_work_table(self, table):
         self.work_table = table
         self.setup_headers()
 
-    def setup_transport_table(self, table):
-        self.transport_table = table
-        self.setup_transport_headers()
-
     def setup_headers(self):
-        headers = [
-            "Dátum", "Nap", 
-            "Sima Munkanap\nKezdés", "Sima Munkanap\nVégzés", "Ledolgozott\nÓrák",
-            "Műhely\nKezdés", "Műhely\nVégzés", "Műhely\nÓrák",
-            "Szabadság", "Betegszabadság\n(TP)"
-        ]
-        self.work_table.setColumnCount(len(headers))
-        self.work_table.setHorizontalHeaderLabels(headers)
-    
+        self.work_table.setColumnCount(len(HEADERS))
+        self.work_table.setHorizontalHeaderLabels(HEADERS)
+
         # Oszlopok szélességének beállítása
         for col in range(self.work_table.columnCount()):
             self.work_table.setColumnWidth(col, 120)
 
-    def setup_transport_headers(self):
-        headers = [
-            "Dátum", "Fuvar ID", "Indulás", "Érkezés", "Távolság", "Üzemanyag"
-        ]
-        self.transport_table.setColumnCount(len(headers))
-        self.transport_table.setHorizontalHeaderLabels(headers)
-    
-        # Oszlopok szélességének beállítása
-        for col in range(self.transport_table.columnCount()):
-            self.transport_table.setColumnWidth(col, 120)
+    @staticmethod
+    def _calculateHours(start_time, end_time):
+        start = QTime.fromString(start_time, "HH:mm")
+        end = QTime.fromString(end_time, "HH:mm")
+        return round(start.secsTo(end) / 3600.0, 2)
+
+    @staticmethod
+    def _rowValues(record):
+        """Egy work_hours rekord a táblázat 2. oszlopától kezdődő cellaértékei"""
+        values = [""] * (len(HEADERS) - 2)
+        hours = "" if record['hours'] is None else str(record['hours'])
+        if record['work_type'] == "Sima munkanap":
+            values[0:3] = [record['start_time'] or "", record['end_time'] or "", hours]
+        elif record['work_type'] == "Műhely nap":
+            values[3:6] = [record['start_time'] or "", record['end_time'] or "", hours]
+        elif record['work_type'] == "Szabadság":
+            values[6] = "1"
+        elif record['work_type'] == "Betegszabadság (TP)":
+            values[7] = "1"
+        return values
+
+    def _setRowValues(self, row, values):
+        for col, value in enumerate(values, start=2):
+            item = QTableWidgetItem(value)
+            item.setTextAlignment(Qt.AlignCenter)
+            self.work_table.setItem(row, col, item)
 
     def updateWorkTable(self, start_time, end_time, work_type):
         current_date = self.parent.date_edit.date().toString('yyyy-MM-dd')
-    
+        hours = self._calculateHours(start_time, end_time)
+
         for row in range(self.work_table.rowCount()):
             if self.work_table.item(row, 0).text() == current_date:
-                # Clear previous entries for this row
-                for col in range(2, self.work_table.columnCount()):
-                    self.work_table.setItem(row, col, QTableWidgetItem(""))
-            
-                if work_type == "Sima munkanap":
-                    self.work_table.setItem(row, 2, QTableWidgetItem(start_time))
-                    self.work_table.setItem(row, 3, QTableWidgetItem(end_time))
-                    # Calculate hours
-                    start = QTime.fromString(start_time, "HH:mm")
-                    end = QTime.fromString(end_time, "HH:mm")
-                    hours = round(start.secsTo(end) / 3600.0, 2)
-                    self.work_table.setItem(row, 4, QTableWidgetItem(str(hours)))
-                
-                elif work_type == "Műhely nap":
-                    self.work_table.setItem(row, 5, QTableWidgetItem(start_time))
-                    self.work_table.setItem(row, 6, QTableWidgetItem(end_time))
-                    # Calculate hours
-                    start = QTime.fromString(start_time, "HH:mm")
-                    end = QTime.fromString(end_time, "HH:mm")
-                    hours = round(start.secsTo(end) / 3600.0, 2)
-                    self.work_table.setItem(row, 7, QTableWidgetItem(str(hours)))
-                
-                elif work_type == "Szabadság":
-                    self.work_table.setItem(row, 8, QTableWidgetItem("1"))
-                
-                elif work_type == "Betegszabadság (TP)":
-                    self.work_table.setItem(row, 9, QTableWidgetItem("1"))
-            
-                # Ensure all cells are center-aligned
-                for col in range(self.work_table.columnCount()):
-                    item = self.work_table.item(row, col)
-                    if item:
-                        item.setTextAlignment(Qt.AlignCenter)
+                self._setRowValues(row, self._rowValues({
+                    'work_type': work_type, 'start_time': start_time,
+                    'end_time': end_time, 'hours': hours
+                }))
                 break
 
     def saveWorkHours(self):
+        """Az aktuális nap munkaidejének mentése (upsert a work_hours táblába)"""
         if not self.parent.driver_combo.currentText():
             QMessageBox.warning(self.parent, "Hiba", "Válasszon sofőrt!")
             return False
 
         try:
-            current_driver = self.parent.driver_combo.currentText()
-            month_dir = os.path.join('driver_records', current_driver, 
-                                   f"{datetime.now().year}_{datetime.now().month:02d}")
-            os.makedirs(month_dir, exist_ok=True)
-    
-            excel_path = os.path.join(month_dir, 'munkaora_nyilvantartas.xlsx')
-    
-            # Meglévő Excel betöltése vagy új létrehozása
-            if os.path.exists(excel_path):
-                wb = load_workbook(excel_path)
-            else:
-                wb = Workbook()
-            ws = wb.active
-            ws.title = "Munkaórák"
+            driver_id = self.db.get_driver_id(self.parent.driver_combo.currentText())
+            if driver_id is None:
+                QMessageBox.warning(self.parent, "Hiba", "A sofőr nem található az adatbázisban!")
+                return False
 
-            # Aktuális dátum és adatok mentése
             current_date = self.parent.date_edit.date().toString('yyyy-MM-dd')
             start_time = self.parent.start_time.time().toString('HH:mm')
             end_time = self.parent.end_time.time().toString('HH:mm')
             work_type = self.parent.type_combo.currentText()
 
+            # Szabadság és betegszabadság esetén nincs kezdés/végzés
+            if work_type in ("Sima munkanap", "Műhely nap"):
+                hours = self._calculateHours(start_time, end_time)
+            else:
+                start_time = end_time = hours = None
+
+            self.db.execute_query("""
+                INSERT INTO work_hours (driver_id, work_date, work_type, start_time, end_time, hours)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (driver_id, work_date) DO UPDATE SET
+                    work_type = excluded.work_type,
+                    start_time = excluded.start_time,
+                    end_time = excluded.end_time,
+                    hours = excluded.hours,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (driver_id, current_date, work_type, start_time, end_time, hours))
+
             # Adatok frissítése a munkalapon
             self.updateWorkTable(start_time, end_time, work_type)
 
-            # Fejléc cellák formázása
-            headers = [
-                "Dátum", "Nap", 
-                "Sima Munkanap\nKezdés", "Sima Munkanap\nVégzés", "Ledolgozott\nÓrák",
-                "Műhely\nKezdés", "Műhely\nVégzés", "Műhely\nÓrák",
-                "Szabadság", "Betegszabadság\n(TP)"
-            ]
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill("solid", fgColor="4F81BD")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            header_border = Border(
-                left=Side(style="thin"),
-                right=Side(style="thin"),
-                top=Side(style="thin"),
-                bottom=Side(style="thin")
-            )
-
-            for col, header in enumerate(headers, start=1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-                cell.border = header_border
-                cell.alignment = Alignment(wrap_text=True)  # Szöveg tördelése
-
-            # Óra számítás hozzáadása
-            for row in range(2, ws.max_row + 1):
-                start_time = ws.cell(row=row, column=3).value  # Kezdés oszlop
-                end_time = ws.cell(row=row, column=4).value    # Végzés oszlop
-                if start_time and end_time:
-                    try:
-                        start = datetime.strptime(start_time, '%H:%M')
-                        end = datetime.strptime(end_time, '%H:%M')
-                        hours = (end - start).seconds / 3600
-                        ws.cell(row=row, column=5, value=round(hours, 2))  # Ledolgozott órák
-                    except:
-                        pass
-
-            # Excel mentése
-            for row in range(self.work_table.rowCount()):
-                for col in range(self.work_table.columnCount()):
-                    item = self.work_table.item(row, col)
-                    if item:
-                        ws.cell(row=row+2, column=col+1, value=item.text())
-
-            # Oszlopok szélességének beállítása
-            for col in ws.columns:
-                max_length = 0
-                column = col[0].column_letter  # Get the column name
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = (max_length + 2)
-                ws.column_dimensions[column].width = adjusted_width
-
-            wb.save(excel_path)
+            date = self.parent.date_edit.date()
+            with self._dirty_lock:
+                self._dirty_months.add((self.parent.driver_combo.currentText(), date.year(), date.month()))
+            self.compact_timer.start()
+
             QMessageBox.information(self.parent, "Siker", "Munkaórák mentve!")
             return True
 
@@ -196,17 +149,23 @@ class WorkHoursManager:
             QMessageBox.critical(self.parent, "Hiba", f"Mentési hiba: {str(e)}")
             return False
 
+    def loadMonth(self, driver, year, month):
+        """A sofőr adott havi munkaidő bejegyzései dátum szerint"""
+        driver_id = self.db.get_driver_id(driver)
+        if driver_id is None:
+            return {}
+        first_day = QDate(year, month, 1)
+        last_day = first_day.addDays(first_day.daysInMonth() - 1)
+        rows = self.db.execute_query(WORK_HOURS_MONTH_QUERY, (
+            driver_id, first_day.toString('yyyy-MM-dd'), last_day.toString('yyyy-MM-dd')
+        ))
+        return {row['work_date']: row for row in rows}
+
+    @timed()
     def loadWorkHours(self, current_driver):
         try:
-            month_dir = os.path.join('driver_records', current_driver, 
-                                   f"{datetime.now().year}_{datetime.now().month:02d}")
-            excel_path = os.path.join(month_dir, 'munkaora_nyilvantartas.xlsx')
-            
-            if not os.path.exists(excel_path):
-                return False
-
-            wb = load_workbook(excel_path, data_only=True)
-            ws = wb.active
+            now = datetime.now()
+            records = self.loadMonth(current_driver, now.year, now.month)
 
             # Clear existing data except dates and days
             for row in range(self.work_table.rowCount()):
@@ -214,308 +173,105 @@ class WorkHoursManager:
                     self.work_table.setItem(row, col, None)
 
             # Load data
-            for excel_row in range(2, ws.max_row + 1):
-                date = ws.cell(row=excel_row, column=1).value
-                if not date:
-                    continue
-                
-                for table_row in range(self.work_table.rowCount()):
-                    table_date = self.work_table.item(table_row, 0)
-                    if table_date and table_date.text() == str(date):
-                        for col in range(2, self.work_table.columnCount()):
-                            value = ws.cell(row=excel_row, column=col+1).value
-                            if value is not None:
-                                item = QTableWidgetItem(str(value))
-                                item.setTextAlignment(Qt.AlignCenter)
-                                self.work_table.setItem(table_row, col, item)
-                        break
+            for table_row in range(self.work_table.rowCount()):
+                table_date = self.work_table.item(table_row, 0)
+                if table_date and table_date.text() in records:
+                    self._setRowValues(table_row, self._rowValues(records[table_date.text()]))
 
-            return True
+            return bool(records)
 
         except Exception as e:
             QMessageBox.warning(self.parent, "Hiba", f"Betöltési hiba: {str(e)}")
             return False
 
-    def saveTransportData(self):
-        if not self.parent.driver_combo.currentText():
-            QMessageBox.warning(self.parent, "Hiba", "Válasszon sofőrt!")
-            return False
-
-        try:
-            current_driver = self.parent.driver_combo.currentText()
-            month_dir = os.path.join('driver_records', current_driver, 
-                                   f"{datetime.now().year}_{datetime.now().month:02d}")
-            os.makedirs(month_dir, exist_ok=True)
-    
-            excel_path = os.path.join(month_dir, 'fuvar_adatok.xlsx')
-    
-            # Meglévő Excel betöltése vagy új létrehozása
-            if os.path.exists(excel_path):
-                wb = load_workbook(excel_path)
-            else:
-                wb = Workbook()
-            ws = wb.active
-            ws.title = "Fuvar Adatok"
-
-            # Fejléc cellák formázása
-            headers = [
-                "Dátum", "Fuvar ID", "Indulás", "Érkezés", "Távolság", "Üzemanyag"
-            ]
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill("solid", fgColor="4F81BD")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            header_border = Border(
-                left=Side(style="thin"),
-                right=Side(style="thin"),
-                top=Side(style="thin"),
-                bottom=Side(style="thin")
-            )
-
-            for col, header in enumerate(headers, start=1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-                cell.border = header_border
-                cell.alignment = Alignment(wrap_text=True)  # Szöveg tördelése
-
-            # Excel mentése
-            for row in range(self.transport_table.rowCount()):
-                for col in range(self.transport_table.columnCount()):
-                    item = self.transport_table.item(row, col)
-                    if item:
-                        ws.cell(row=row+2, column=col+1, value=item.text())
-
-            # Oszlopok szélességének beállítása
-            for col in ws.columns:
-                max_length = 0
-                column = col[0].column_letter  # Get the column name
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = (max_length + 2)
-                ws.column_dimensions[column].width = adjusted_width
-
-            wb.save(excel_path)
-            QMessageBox.information(self.parent, "Siker", "Fuvar adatok mentve!")
-            return True
-
-        except Exception as e:
-            QMessageBox.critical(self.parent, "Hiba", f"Mentési hiba: {str(e)}")
-            return False
-
-    def loadTransportData(self, current_driver):
+    @staticmethod
+    def defaultExportPath(driver, year, month):
+        """driver_records/<sofőr>/<ÉÉÉÉ_HH>/munkaora_nyilvantartas.xlsx (a könyvtár létrejön)"""
+        month_dir = os.path.join('driver_records', driver, f"{year}_{month:02d}")
+        os.makedirs(month_dir, exist_ok=True)
+        return os.path.join(month_dir, 'munkaora_nyilvantartas.xlsx')
+
+    def writeWorkbook(self, excel_path, driver, year, month):
+        """A sofőr havi munkaóra nyilvántartásának kiírása az adatbázisból"""
+        records = self.loadMonth(driver, year, month)
+
+        # A hónap minden napja, a bejegyzéssel rendelkező napok kitöltve
+        def rows():
+            first_day = QDate(year, month, 1)
+            for i in range(first_day.daysInMonth()):
+                day = first_day.addDays(i)
+                date_str = day.toString('yyyy-MM-dd')
+                values = [date_str, DAY_NAMES[day.dayOfWeek() - 1]]
+                if date_str in records:
+                    values += self._rowValues(records[date_str])
+                yield values
+
+        # Az openpyxl betöltése lassú, csak az első exportnál töltődik be (nem az induláskor)
+        from excel_export import export_rows
+        export_rows(excel_path, HEADERS, rows(), sheet_title="Munkaórák")
+
+    def compactWorkbooks(self, wait=False):
+        """
+        A mentések óta módosult havi munkafüzetek újraírása háttérszálon.
+
+        Args:
+            wait: Megvárja az összes (a korábban indított) tömörítés végét (kilépéskor)
+
+        Returns:
+            Az újraírásra ütemezett munkafüzetek száma
+        """
+        self.compact_timer.stop()
+        with self._dirty_lock:
+            months, self._dirty_months = self._dirty_months, set()
+        if months:
+            self.compact_pool.start(lambda: self._writeWorkbooks(months))
+        if wait:
+            self.compact_pool.waitForDone()
+        return len(months)
+
+    def _writeWorkbooks(self, months):
+        """A havi munkafüzetek kiírása (a compact_pool szálán fut)"""
         try:
-            month_dir = os.path.join('driver_records', current_driver, 
-                                   f"{datetime.now().year}_{datetime.now().month:02d}")
-            excel_path = os.path.join(month_dir, 'fuvar_adatok.xlsx')
-            
-            if not os.path.exists(excel_path):
-                return False
-
-            wb = load_workbook(excel_path, data_only=True)
-            ws = wb.active
-
-            # Clear existing data
-            for row in range(self.transport_table.rowCount()):
-                for col in range(self.transport_table.columnCount()):
-                    self.transport_table.setItem(row, col, None)
-
-            # Load data
-            for excel_row in range(2, ws.max_row + 1):
-                for col in range(1, ws.max_column + 1):
-                    value = ws.cell(row=excel_row, column=col).value
-                    if value is not None:
-                        item = QTableWidgetItem(str(value))
-                        item.setTextAlignment(Qt.AlignCenter)
-                        self.transport_table.setItem(excel_row-2, col-1, item)
-
-            return True
-
-        except Exception as e:
-            QMessageBox.warning(self.parent, "Hiba", f"Betöltési hiba: {str(e)}")
-            return False
-        self.setup_headers()
-
-    def setup_transport_table(self, table):
-        self.transport_table = table
-        self.setup_transport_headers()
-
-    def setup_headers(self):
-        headers = [
-            "Dátum", "Nap", 
-            "Sima Munkanap\nKezdés", "Sima Munkanap\nVégzés", "Ledolgozott\nÓrák",
-            "Műhely\nKezdés", "Műhely\nVégzés", "Műhely\nÓrák",
-            "Szabadság", "Betegszabadság\n(TP)"
-        ]
-        self.work_table.setColumnCount(len(headers))
-        self.work_table.setHorizontalHeaderLabels(headers)
-    
-        # Oszlopok szélességének beállítása
-        for col in range(self.work_table.columnCount()):
-            self.work_table.setColumnWidth(col, 120)
-
-    def updateWorkTable(self, start_time, end_time, work_type):
-        current_date = self.parent.date_edit.date().toString('yyyy-MM-dd')
-    
-        for row in range(self.work_table.rowCount()):
-            if self.work_table.item(row, 0).text() == current_date:
-                # Clear previous entries for this row
-                for col in range(2, self.work_table.columnCount()):
-                    self.work_table.setItem(row, col, QTableWidgetItem(""))
-            
-                if work_type == "Sima munkanap":
-                    self.work_table.setItem(row, 2, QTableWidgetItem(start_time))
-                    self.work_table.setItem(row, 3, QTableWidgetItem(end_time))
-                    # Calculate hours
-                    start = QTime.fromString(start_time, "HH:mm")
-                    end = QTime.fromString(end_time, "HH:mm")
-                    hours = round(start.secsTo(end) / 3600.0, 2)
-                    self.work_table.setItem(row, 4, QTableWidgetItem(str(hours)))
-                
-                elif work_type == "Műhely nap":
-                    self.work_table.setItem(row, 5, QTableWidgetItem(start_time))
-                    self.work_table.setItem(row, 6, QTableWidgetItem(end_time))
-                    # Calculate hours
-                    start = QTime.fromString(start_time, "HH:mm")
-                    end = QTime.fromString(end_time, "HH:mm")
-                    hours = round(start.secsTo(end) / 3600.0, 2)
-                    self.work_table.setItem(row, 7, QTableWidgetItem(str(hours)))
-                
-                elif work_type == "Szabadság":
-                    self.work_table.setItem(row, 8, QTableWidgetItem("1"))
-                
-                elif work_type == "Betegszabadság (TP)":
-                    self.work_table.setItem(row, 9, QTableWidgetItem("1"))
-            
-                # Ensure all cells are center-aligned
-                for col in range(self.work_table.columnCount()):
-                    item = self.work_table.item(row, col)
-                    if item:
-                        item.setTextAlignment(Qt.AlignCenter)
-                break
-
-    def saveWorkHours(self):
-        if not self.parent.driver_combo.currentText():
+            for driver, year, month in sorted(months):
+                try:
+                    self.writeWorkbook(self.defaultExportPath(driver, year, month), driver, year, month)
+                except Exception as e:
+                    # A munkafüzet az adatbázisból bármikor újra előállítható, a mentést nem akasztja meg
+                    logging.error(f"Munkaóra munkafüzet írási hiba ({driver}, {year}_{month:02d}): {str(e)}")
+        finally:
+            # A kapcsolat visszakerül a poolba, a háttérszál nem tartja meg
+            self.db.release_connection()
+
+    def exportWorkHours(self, excel_path=None, driver=None, year=None, month=None):
+        """
+        Havi munkaóra nyilvántartás exportálása Excel fájlba az adatbázisból.
+
+        Alapértelmezés: az aktuális sofőr aktuális hónapja a
+        driver_records/<sofőr>/<ÉÉÉÉ_HH>/munkaora_nyilvantartas.xlsx fájlba.
+        """
+        driver = driver or self.parent.driver_combo.currentText()
+        if not driver:
             QMessageBox.warning(self.parent, "Hiba", "Válasszon sofőrt!")
             return False
 
         try:
-            current_driver = self.parent.driver_combo.currentText()
-            month_dir = os.path.join('driver_records', current_driver, 
-                                   f"{datetime.now().year}_{datetime.now().month:02d}")
-            os.makedirs(month_dir, exist_ok=True)
-    
-            excel_path = os.path.join(month_dir, 'munkaora_nyilvantartas.xlsx')
-    
-            # Meglévő Excel betöltése vagy új létrehozása
-            if os.path.exists(excel_path):
-                wb = load_workbook(excel_path)
-            else:
-                wb = Workbook()
-            ws = wb.active
-            ws.title = "Munkaórák"
-
-            # Aktuális dátum és adatok mentése
-            current_date = self.parent.date_edit.date().toString('yyyy-MM-dd')
-            start_time = self.parent.start_time.time().toString('HH:mm')
-            end_time = self.parent.end_time.time().toString('HH:mm')
-            work_type = self.parent.type_combo.currentText()
-
-            # Adatok frissítése a munkalapon
-            self.updateWorkTable(start_time, end_time, work_type)
-
-            # Fejléc cellák formázása
-            headers = [
-                "Dátum", "Nap", 
-                "Sima Munkanap\nKezdés", "Sima Munkanap\nVégzés", "Ledolgozott\nÓrák",
-                "Műhely\nKezdés", "Műhely\nVégzés", "Műhely\nÓrák",
-                "Szabadság", "Betegszabadság\n(TP)"
-            ]
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill("solid", fgColor="4F81BD")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            header_border = Border(
-                left=Side(style="thin"),
-                right=Side(style="thin"),
-                top=Side(style="thin"),
-                bottom=Side(style="thin")
-            )
-
-            for col, header in enumerate(headers, start=1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-                cell.border = header_border
-
-            # Óra számítás hozzáadása
-            for row in range(2, ws.max_row + 1):
-                start_time = ws.cell(row=row, column=3).value  # Kezdés oszlop
-                end_time = ws.cell(row=row, column=4).value    # Végzés oszlop
-                if start_time and end_time:
-                    try:
-                        start = datetime.strptime(start_time, '%H:%M')
-                        end = datetime.strptime(end_time, '%H:%M')
-                        hours = (end - start).seconds / 3600
-                        ws.cell(row=row, column=5, value=round(hours, 2))  # Ledolgozott órák
-                    except:
-                        pass
-
-            # Excel mentése
-            for row in range(self.work_table.rowCount()):
-                for col in range(self.work_table.columnCount()):
-                    item = self.work_table.item(row, col)
-                    if item:
-                        ws.cell(row=row+2, column=col+1, value=item.text())
-
-            wb.save(excel_path)
-            QMessageBox.information(self.parent, "Siker", "Munkaórák mentve!")
+            now = datetime.now()
+            year = year or now.year
+            month = month or now.month
+            if excel_path is None:
+                excel_path = self.defaultExportPath(driver, year, month)
+
+            default_path = excel_path == self.defaultExportPath(driver, year, month)
+            if default_path:
+                # Egy futó tömörítés éppen ugyanezt a fájlt írhatja
+                self.compact_pool.waitForDone()
+            self.writeWorkbook(excel_path, driver, year, month)
+            if default_path:
+                with self._dirty_lock:
+                    self._dirty_months.discard((driver, year, month))
+            QMessageBox.information(self.parent, "Siker", f"Munkaórák exportálva: {excel_path}")
             return True
 
         except Exception as e:
-            QMessageBox.critical(self.parent, "Hiba", f"Mentési hiba: {str(e)}")
+            QMessageBox.critical(self.parent, "Hiba", f"Exportálási hiba: {str(e)}")
             return False
-
-    def loadWorkHours(self, current_driver):
-        try:
-            month_dir = os.path.join('driver_records', current_driver, 
-                                   f"{datetime.now().year}_{datetime.now().month:02d}")
-            excel_path = os.path.join(month_dir, 'munkaora_nyilvantartas.xlsx')
-            
-            if not os.path.exists(excel_path):
-                return False
-
-            wb = load_workbook(excel_path, data_only=True)
-            ws = wb.active
-
-            # Clear existing data except dates and days
-            for row in range(self.work_table.rowCount()):
-                for col in range(2, self.work_table.columnCount()):
-                    self.work_table.setItem(row, col, None)
-
-            # Load data
-            for excel_row in range(2, ws.max_row + 1):
-                date = ws.cell(row=excel_row, column=1).value
-                if not date:
-                    continue
-                
-                for table_row in range(self.work_table.rowCount()):
-                    table_date = self.work_table.item(table_row, 0)
-                    if table_date and table_date.text() == str(date):
-                        for col in range(2, self.work_table.columnCount()):
-                            value = ws.cell(row=excel_row, column=col+1).value
-                            if value is not None:
-                                item = QTableWidgetItem(str(value))
-                                item.setTextAlignment(Qt.AlignCenter)
-                                self.work_table.setItem(table_row, col, item)
-                        break
-
-            return True
-
-        except Exception as e:
-            QMessageBox.warning(self.parent, "Hiba", f"Betöltési hiba: {str(e)}")
-            return False
\ No newline at end of file
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Övezet és övezeti díj hozzárendelés fuvarokhoz, geokódolás nélkül.
+
+Az övezetek a zones táblából töltődnek be (név, km határok); a távolság
+szerinti keresés a rendezett alsó határokon bináris kereséssel, a név
+szerinti keresés szótárral történik, így a felületnek nem kell az
+"Övezet 5-10" szövegekből számokat kiolvasnia. Ha a távolság nem ismert,
+az övezet a gyár korábbi fuvarjaiból tanult irányítószám -> övezet
+hozzárendelésből adódik.
+
+A gyáranként betöltött díjak és irányítószám hozzárendelések a kapcsolódó
+táblák módosításakor (DatabaseHandler változásfigyelő) érvénytelenednek.
+
+Példa:
+    engine = get_zone_engine()
+    assignment = engine.assign(factory_id, distance_km=12.5)
+    assignment.zone.name, assignment.price   # ('Övezet 10-15', 18000)
+"""
+import threading
+from bisect import bisect_right
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from database_handler import get_database_handler
+from queries import ZONES_QUERY, FACTORY_ZONE_PRICE_IDS_QUERY, FACTORY_POSTAL_ZONES_QUERY
+
+
+class Zone(NamedTuple):
+    id: int
+    name: str
+    min_km: float
+    max_km: float
+    column: int  # az övezet oszlopa a fuvar táblázatban (a 0. oszlop a dátum)
+
+
+class ZoneAssignment(NamedTuple):
+    zone: Zone
+    zone_price_id: Optional[int]  # factory_zone_prices.id, a deliveries.zone_id értéke
+    price: int
+
+
+class ZoneEngine:
+    """Övezetek és gyáranként az övezeti díjak gyorsítótára"""
+
+    def __init__(self, db=None):
+        self.db = db or get_database_handler()
+        self._zones: List[Zone] = []
+        self._starts: List[float] = []
+        self._by_name: Dict[str, Zone] = {}
+        self._prices: Dict[int, Dict[str, Tuple[int, int]]] = {}
+        self._postal_zones: Dict[int, Dict[str, str]] = {}
+        self.reload()
+        self.db.add_change_listener(self._onTablesChanged)
+
+    def reload(self) -> None:
+        """Az övezetek újraolvasása és a gyáranként tárolt adatok eldobása"""
+        zones = [
+            Zone(row['id'], row['name'], row['min_km'], row['max_km'], column)
+            for column, row in enumerate(self.db.execute_query(ZONES_QUERY), start=1)
+        ]
+        self._zones = zones
+        self._starts = [zone.min_km for zone in zones]
+        self._by_name = {zone.name: zone for zone in zones}
+        self._prices = {}
+        self._postal_zones = {}
+
+    def _onTablesChanged(self, tables: Set[str]) -> None:
+        if 'zones' in tables:
+            self.reload()
+            return
+        if 'factory_zone_prices' in tables:
+            self._prices = {}
+            self._postal_zones = {}
+        elif tables & {'deliveries', 'addresses'}:
+            self._postal_zones = {}
+
+    # --- Övezetek ---
+
+    def zones(self) -> List[Zone]:
+        """Az övezetek km határ szerinti sorrendben"""
+        return list(self._zones)
+
+    def zoneNames(self) -> List[str]:
+        return [zone.name for zone in self._zones]
+
+    def zoneByName(self, name: str) -> Optional[Zone]:
+        return self._by_name.get(name)
+
+    def zoneForDistance(self, distance_km: float) -> Optional[Zone]:
+        """A távolságot tartalmazó övezet ([min, max), a legutolsó övezet felső határa is beletartozik)"""
+        i = bisect_right(self._starts, distance_km) - 1
+        if i < 0:
+            return None
+        zone = self._zones[i]
+        if distance_km < zone.max_km or (distance_km == zone.max_km and i == len(self._zones) - 1):
+            return zone
+        return None
+
+    def column(self, name: str) -> int:
+        """Az övezet oszlopa a fuvar táblázatban, ismeretlen övezetnél 0"""
+        zone = self._by_name.get(name)
+        return zone.column if zone else 0
+
+    # --- Gyáranként ---
+
+    def _factoryPrices(self, factory_id: int) -> Dict[str, Tuple[int, int]]:
+        prices = self._prices.get(factory_id)
+        if prices is None:
+            prices = {
+                row['zone_name']: (row['id'], row['price'] or 0)
+                for row in self.db.execute_query(FACTORY_ZONE_PRICE_IDS_QUERY, (factory_id,))
+            }
+            self._prices[factory_id] = prices
+        return prices
+
+    def _factoryPostalZones(self, factory_id: int) -> Dict[str, str]:
+        postal_zones = self._postal_zones.get(factory_id)
+        if postal_zones is None:
+            # Irányítószámonként a leggyakoribb övezet
+            counts: Dict[str, Tuple[int, str]] = {}
+            for row in self.db.execute_query(FACTORY_POSTAL_ZONES_QUERY, (factory_id,)):
+                code = str(row['postal_code']).strip()
+                if row['delivery_count'] > counts.get(code, (0, ''))[0]:
+                    counts[code] = (row['delivery_count'], row['zone_name'])
+            postal_zones = {code: zone_name for code, (_, zone_name) in counts.items()}
+            self._postal_zones[factory_id] = postal_zones
+        return postal_zones
+
+    def price(self, factory_id: int, zone_name: str) -> Tuple[Optional[int], int]:
+        """(factory_zone_prices.id, díj) a gyár adott övezetére; nem beállított díjnál (None, 0)"""
+        return self._factoryPrices(factory_id).get(zone_name, (None, 0))
+
+    def assign(self, factory_id: int, distance_km: Optional[float] = None,
+               postal_code: Optional[str] = None) -> Optional[ZoneAssignment]:
+        """
+        Övezet és díj egy fuvarhoz.
+
+        Args:
+            factory_id: A gyár azonosítója
+            distance_km: A gyártól mért távolság; ha megadott, ez dönt
+            postal_code: A cím irányítószáma; távolság hiányában a gyár
+                korábbi fuvarjai alapján dönt
+
+        Returns:
+            Az övezet, a gyár övezeti díjának azonosítója és a díj; None, ha nem határozható meg
+        """
+        zone = None
+        if distance_km is not None:
+            zone = self.zoneForDistance(distance_km)
+        elif postal_code:
+            zone = self._by_name.get(self._factoryPostalZones(factory_id).get(postal_code.strip(), ''))
+        if zone is None:
+            return None
+        zone_price_id, price = self.price(factory_id, zone.name)
+        return ZoneAssignment(zone, zone_price_id, price)
+
+
+_engines: Dict[int, ZoneEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_zone_engine(db=None) -> ZoneEngine:
+    """Adatbázis kezelőnként egyetlen, közös ZoneEngine példány"""
+    db = db or get_database_handler()
+    with _engines_lock:
+        engine = _engines.get(id(db))
+        if engine is None:
+            engine = _engines[id(db)] = ZoneEngine(db)
+    return engine